@@ -0,0 +1,443 @@
+#!/usr/bin/env python
+"""Benchmarks for the radio control hot paths, run against emulated radios.
+
+    python bench/bench.py run --output results.json
+    python bench/bench.py compare baseline.json results.json
+    python bench/bench.py startup --budget-ms 300
+"""
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, Tuple
+
+import click
+
+from loopback import (REPO_ROOT, EchoServer, EmulatedCC1101, EmulatedCC2500Binary, EmulatedCC2500Text,
+                      EmulatedCC2500Usb, SinkServer, load_script)
+
+sys.path.insert(0, os.path.join(REPO_ROOT, 'src'))
+
+logger = logging.getLogger(__name__)
+
+# name -> (function returning (work units, elapsed seconds), unit, higher_is_better)
+BENCHMARKS: Dict[str, Tuple[Callable[[], Tuple[float, float]], str, bool]] = {}
+
+
+def benchmark(name: str, unit: str, higher_is_better: bool = True):
+    def decorator(func):
+        BENCHMARKS[name] = (func, unit, higher_is_better)
+        return func
+    return decorator
+
+
+def _quiet():
+    # Per-transfer INFO/DEBUG logging is not what is being measured; a rig runs at WARNING
+    logging.getLogger().setLevel(logging.WARNING)
+
+
+def _cc1101():
+    module = load_script('radios/cc1101/jammer.py', 'cc1101_jammer')
+    _quiet()
+    return module
+
+
+def _cc2500_jammer():
+    module = load_script('radios/cc2500/jammer.py', 'cc2500_jammer')
+    _quiet()
+    return module
+
+
+def _cc2500_usb():
+    module = load_script('radios/cc2500/cc2500.py', 'cc2500_usb')
+    _quiet()
+    return module
+
+
+@benchmark('cc1101.batch_write_registers', 'writes/s')
+def bench_batch_write_registers():
+    jammer = _cc1101()
+    ser = EmulatedCC1101()
+    register_values = [(addr, addr ^ 0x5A) for addr in range(0x00, 0x2F)]
+    rounds = 5
+    start = time.perf_counter()
+    for _ in range(rounds):
+        jammer.batch_write_registers(ser, register_values)
+    return rounds * len(register_values), time.perf_counter() - start
+
+
+@benchmark('cc1101.jam_frequencies', 'hops/s')
+def bench_jam_frequencies():
+    jammer = _cc1101()
+    ser = EmulatedCC1101()
+    frequencies = [433.0, 433.1, 433.2, 433.3, 433.4]
+    cycles = 20
+    start = time.perf_counter()
+    jammer.jam_frequencies(ser, frequencies, dwell=0.001, cycles=cycles)
+    return cycles * len(frequencies), time.perf_counter() - start
+
+
+@benchmark('cc1101.find_highest_rssi_channel', 's/sweep', higher_is_better=False)
+def bench_find_highest_rssi_channel():
+    jammer = _cc1101()
+    frequency_range = [433.05 + 0.025 * i for i in range(11)]
+    ser = EmulatedCC1101(active_freq2=jammer.convert_frequency_to_registers(433.2)[0])
+    start = time.perf_counter()
+    jammer.find_highest_rssi_channel(ser, frequency_range)
+    return 1, time.perf_counter() - start
+
+
+def _frequency_hopping(ser, hop_interval, cycles):
+    jammer = _cc2500_jammer()
+    frequencies = (2435, 2445, 2461)
+    stdout = sys.stdout
+    sys.stdout = open(os.devnull, 'w')  # send_command prints every response
+    try:
+        start = time.perf_counter()
+        jammer.frequency_hopping(ser, frequencies, hop_interval=hop_interval, cycles=cycles)
+        elapsed = time.perf_counter() - start
+    finally:
+        sys.stdout.close()
+        sys.stdout = stdout
+    return cycles * len(frequencies), elapsed
+
+
+@benchmark('cc2500.frequency_hopping', 'hops/s')
+def bench_frequency_hopping():
+    # Zero dwell: the hop rate is bounded only by command I/O
+    return _frequency_hopping(EmulatedCC2500Binary(), hop_interval=0, cycles=1000)
+
+
+@benchmark('cc2500.frequency_hopping.text', 'hops/s')
+def bench_frequency_hopping_text():
+    ser = EmulatedCC2500Text()
+    result = _frequency_hopping(ser, hop_interval=0, cycles=2)
+    from protocol import CMD_PING, build_frame
+    # The negotiation ping, on a line of its own, is the only thing the bridge should reject
+    garbled = [line for line in ser.rejected if line != build_frame(CMD_PING)]
+    if garbled:
+        raise RuntimeError(f"Text bridge rejected {garbled}")
+    return result
+
+
+@benchmark('cc2500.scan_for_devices', 's/sweep', higher_is_better=False)
+def bench_scan_for_devices():
+    cc2500 = _cc2500_usb()
+    dev = EmulatedCC2500Usb(hit_channel=None)
+    start = time.perf_counter()
+    cc2500.scan_for_devices(dev)
+    return 1, time.perf_counter() - start
+
+
+@benchmark('cc2500.scan_with_priors.repeat', 's/first hit', higher_is_better=False)
+def bench_scan_with_priors_repeat():
+    # A second visit to a site where the first sweep found a device on a high channel
+    from priors import ChannelPriors
+    cc2500 = _cc2500_usb()
+    dev = EmulatedCC2500Usb(hit_channel=200)
+    with tempfile.TemporaryDirectory() as directory:
+        priors = ChannelPriors(os.path.join(directory, 'priors.json'))
+        cc2500.scan_with_priors(dev, priors, 'bench', 'ISM')
+        start = time.perf_counter()
+        cc2500.scan_with_priors(dev, priors, 'bench', 'ISM')
+        return 1, time.perf_counter() - start
+
+
+def _fuzz_device(packets, pps):
+    cc2500 = _cc2500_usb()
+    dev = EmulatedCC2500Usb()
+    stdout = sys.stdout
+    sys.stdout = open(os.devnull, 'w')
+    try:
+        start = time.perf_counter()
+        cc2500.fuzz_device(dev, 0, max_packets=packets, pps=pps)
+        elapsed = time.perf_counter() - start
+    finally:
+        sys.stdout.close()
+        sys.stdout = stdout
+    return packets, elapsed
+
+
+@benchmark('cc2500.fuzz_device', 'packets/s')
+def bench_fuzz_device():
+    return _fuzz_device(200, pps=None)
+
+
+@benchmark('cc2500.fuzz_device.paced', 'packets/s')
+def bench_fuzz_device_paced():
+    # Should land on the requested 50 packets/s; a drop means the limiter is undershooting
+    return _fuzz_device(100, pps=50.0)
+
+
+@benchmark('messages.ScapyMessage.to_raw', 'msgs/s')
+def bench_scapy_to_raw():
+    from scapy.layers.inet import IP, UDP
+    from scapy.packet import Raw
+    from messages import ScapyMessage
+    message = ScapyMessage(IP(dst='10.0.0.1') / UDP(sport=4000, dport=5000) / Raw(b'\xAA' * 48))
+    count = 2000
+    start = time.perf_counter()
+    for _ in range(count):
+        message.to_raw()
+    return count, time.perf_counter() - start
+
+
+def _raw_message(data: bytes):
+    from messages import Message
+
+    class RawMessage(Message):
+        def to_raw(self) -> bytes:
+            return self.packet
+
+        def from_raw(self, data: bytes):
+            self.packet = data
+            return data
+
+    return RawMessage(data)
+
+
+@benchmark('connection.Connection.send', 'msgs/s')
+def bench_connection_send():
+    from connection import Connection
+
+    sink = SinkServer()
+    conn = Connection(sink.host, sink.port)
+    conn.open()
+    message = _raw_message(b'\x55' * 64)
+    count = 20000
+    try:
+        start = time.perf_counter()
+        for _ in range(count):
+            conn.send(message)
+        elapsed = time.perf_counter() - start
+    finally:
+        conn.close()
+        sink.close()
+    return count, elapsed
+
+
+@benchmark('connection.Connection.recv', 'round trips/s')
+def bench_connection_recv():
+    from connection import Connection
+
+    echo = EchoServer()
+    conn = Connection(echo.host, echo.port)
+    conn.open()
+    message = _raw_message(b'\x55' * 64)
+    count = 2000
+    try:
+        start = time.perf_counter()
+        for _ in range(count):
+            conn.send(message)
+            conn.recv(expected_length=64)
+        elapsed = time.perf_counter() - start
+    finally:
+        conn.close()
+        echo.close()
+    return count, elapsed
+
+
+@benchmark('connection.Connection.recv.unanswered', 's/case', higher_is_better=False)
+def bench_connection_recv_unanswered():
+    # What a target that has stopped answering costs per case once its RTT is known
+    from connection import Connection
+
+    echo = EchoServer(delay=0.001)
+    conn = Connection(echo.host, echo.port)
+    conn.open()
+    message = _raw_message(b'\x55' * 64)
+    cases = 20
+    try:
+        for _ in range(50):
+            conn.send(message)
+            conn.recv(expected_length=64)
+        echo.muted = True
+        start = time.perf_counter()
+        for _ in range(cases):
+            conn.send(message)
+            conn.recv(expected_length=64)
+        elapsed = time.perf_counter() - start
+    finally:
+        conn.close()
+        echo.close()
+    return cases, elapsed
+
+
+@benchmark('tracing.trace', 'events/s')
+def bench_tracing_trace():
+    # The per-packet cost tracing adds to a hot path while it is on
+    import tracing
+    payload = b'\x55' * 64
+    count = 200000
+    tracing.enable()
+    try:
+        start = time.perf_counter()
+        for _ in range(count):
+            tracing.trace(tracing.RADIO_TX, 'bench', payload)
+        elapsed = time.perf_counter() - start
+    finally:
+        tracing.disable()
+    return count, elapsed
+
+
+@benchmark('radio.targeted.rate_limited', 'packets/s')
+def bench_targeted_rate_limited():
+    # One slow target per channel: every visit ends with a payload held back by the target's limit
+    from drivers.dryrun import DryRunModule
+    from target import Target
+    cases = 40
+    module = DryRunModule('bench', {"packet_count": cases, "target_budget": 0.02, "seed": 1})
+    module.set_mode('fuzzing', 'targeted', [Target.from_dict({"name": "slow", "rssi": -50, "baud_rate": None,
+                                                              "com_port": None, "frequency": 433.92})])
+    module.set_rate(pps=100, target='slow')
+    module.case_limit = cases
+    start = time.perf_counter()
+    module.run()
+    elapsed = time.perf_counter() - start
+    if module.packets_sent != cases or module.resume_index != cases:
+        raise RuntimeError(f"Lost cases: drew {module.case_index}, sent {module.packets_sent}, "
+                           f"resume index {module.resume_index}")
+    return cases, elapsed
+
+
+@benchmark('analysis.observations', 'rows/s')
+def bench_analysis_observations():
+    # The chunked passes over already-converted columns: 50 swept channels plus a hopping device
+    import numpy as np
+    from analysis import RSSI, DEVICE, HopStats, Occupancy, RssiTracks
+    rows = 1_000_000
+    rng = np.random.default_rng(0)
+    device = np.arange(rows) % 51 == 50
+    columns = {'timestamp': 1.7e9 + np.arange(rows) * 0.001,
+               'kind': np.where(device, DEVICE, RSSI).astype(np.uint8),
+               'identifier': np.where(device, 0, 1).astype(np.int32),
+               'frequency': 433.0 + 0.1 * (np.arange(rows) % 50),
+               'rssi': np.where(rng.random(rows) < 0.2, -60.0, -100.0).astype(np.float32)}
+    passes = [Occupancy(), RssiTracks(['hopper', 'sweep']), HopStats(['hopper', 'sweep'])]
+    chunk_rows = 100_000
+    start = time.perf_counter()
+    for offset in range(0, rows, chunk_rows):
+        chunk = {name: column[offset:offset + chunk_rows] for name, column in columns.items()}
+        for analysis in passes:
+            analysis.update(chunk)
+    for analysis in passes:
+        analysis.table()
+    return rows, time.perf_counter() - start
+
+
+def cli_startup_time() -> float:
+    """Wall time of a cold `cli.py --help` in a fresh interpreter."""
+    start = time.perf_counter()
+    subprocess.run([sys.executable, os.path.join(REPO_ROOT, 'src', 'cli.py'), '--help'],
+                   check=True, stdout=subprocess.DEVNULL, cwd=os.path.join(REPO_ROOT, 'src'))
+    return time.perf_counter() - start
+
+
+@benchmark('cli.startup', 's', higher_is_better=False)
+def bench_cli_startup():
+    return 1, cli_startup_time()
+
+
+def run_benchmarks(names, repeat: int) -> Dict[str, Dict]:
+    results = {}
+    for name in names:
+        func, unit, higher_is_better = BENCHMARKS[name]
+        samples = []
+        try:
+            for _ in range(repeat):
+                work, elapsed = func()
+                samples.append(work / elapsed if higher_is_better else elapsed / work)
+        except ImportError as e:
+            logger.warning(f"Skipping {name}: {e}")
+            click.echo(f"{name:40} skipped ({e})")
+            continue
+        value = statistics.median(samples)
+        results[name] = {
+            "value": value,
+            "unit": unit,
+            "higher_is_better": higher_is_better,
+            "samples": samples,
+        }
+        click.echo(f"{name:40} {value:14.3f} {unit}")
+    return results
+
+
+def compare_results(baseline: Dict, current: Dict, threshold: float):
+    """Yield (name, old, new, change, regressed) for benchmarks present in both runs."""
+    for name, new in current["results"].items():
+        old = baseline["results"].get(name)
+        if old is None or not old["value"]:
+            continue
+        change = (new["value"] - old["value"]) / old["value"]
+        worse = -change if new["higher_is_better"] else change
+        yield name, old["value"], new["value"], change, worse > threshold
+
+
+@click.group(help="Radio control benchmarks")
+def cli():
+    logging.basicConfig(level=logging.WARNING)
+
+
+@cli.command(name="run")
+@click.option("--output", type=click.Path(), help="Write results to this JSON file")
+@click.option("--only", multiple=True, help="Run only the named benchmark(s)")
+@click.option("--repeat", default=3, show_default=True, help="Runs per benchmark; the median is kept")
+def run(output, only, repeat):
+    """Run the benchmarks."""
+    names = list(only) if only else list(BENCHMARKS)
+    unknown = [name for name in names if name not in BENCHMARKS]
+    if unknown:
+        raise click.BadParameter(f"Unknown benchmark(s): {', '.join(unknown)}")
+    report = {
+        "created": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": run_benchmarks(names, repeat),
+    }
+    if output:
+        with open(output, 'w') as file:
+            json.dump(report, file, indent=2)
+        click.echo(f"Results written to {output}")
+
+
+@cli.command(name="compare")
+@click.argument("baseline", type=click.Path(exists=True))
+@click.argument("current", type=click.Path(exists=True))
+@click.option("--threshold", default=0.10, show_default=True, help="Relative slowdown that counts as a regression")
+def compare(baseline, current, threshold):
+    """Compare two result files and flag regressions."""
+    with open(baseline, 'r') as file:
+        old_report = json.load(file)
+    with open(current, 'r') as file:
+        new_report = json.load(file)
+
+    regressions = 0
+    for name, old, new, change, regressed in compare_results(old_report, new_report, threshold):
+        flag = "REGRESSION" if regressed else ""
+        regressions += regressed
+        click.echo(f"{name:40} {old:14.3f} -> {new:14.3f} {change:+8.1%} {flag}")
+    if regressions:
+        click.echo(f"{regressions} regression(s) above {threshold:.0%}")
+        sys.exit(1)
+
+
+@cli.command(name="startup")
+@click.option("--budget-ms", default=300.0, show_default=True, help="Cold start budget for `cli.py --help`")
+@click.option("--repeat", default=5, show_default=True, help="Runs; the median is compared with the budget")
+def startup(budget_ms, repeat):
+    """Fail if CLI cold start goes over budget, e.g. because a heavy import crept in."""
+    elapsed_ms = statistics.median(cli_startup_time() for _ in range(repeat)) * 1e3
+    click.echo(f"cli.py --help: {elapsed_ms:.1f} ms (budget {budget_ms:.0f} ms)")
+    if elapsed_ms > budget_ms:
+        click.echo("Over budget; check `python -X importtime src/cli.py --help` for the culprit")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    cli()
@@ -0,0 +1,221 @@
+import importlib.util
+import os
+import socket
+import sys
+import time
+from threading import Thread
+from typing import List, Optional
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def load_script(relpath: str, name: str):
+    """Import a radio script by path under a unique module name."""
+    path = os.path.join(REPO_ROOT, relpath)
+    script_dir = os.path.dirname(path)
+    if script_dir not in sys.path:
+        sys.path.insert(0, script_dir)  # for `from registers import *`
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class LoopbackSerial:
+    """Minimal pyserial stand-in. Subclasses decide what the radio answers."""
+
+    def __init__(self, baudrate: Optional[int] = None):
+        # When baudrate is set, writes take as long as the bytes would on the wire
+        self.baudrate = baudrate
+        self.is_open = True
+        self.bytes_written = 0
+        self._rx = bytearray()
+
+    @property
+    def in_waiting(self) -> int:
+        return len(self._rx)
+
+    def respond(self, data: bytes) -> bytes:
+        return data
+
+    def write(self, data: bytes) -> int:
+        if self.baudrate:
+            time.sleep(len(data) * 10 / self.baudrate)
+        self.bytes_written += len(data)
+        self._rx += self.respond(bytes(data))
+        return len(data)
+
+    def read(self, size: int = 1) -> bytes:
+        data = bytes(self._rx[:size])
+        del self._rx[:size]
+        return data
+
+    def read_all(self) -> bytes:
+        data = bytes(self._rx)
+        self._rx.clear()
+        return data
+
+    def reset_input_buffer(self):
+        self._rx.clear()
+
+    def close(self):
+        self.is_open = False
+
+
+class EmulatedCC1101(LoopbackSerial):
+    """CP2102 + CC1101 UART module with a register file behind it."""
+
+    def __init__(self, baudrate: Optional[int] = None, active_freq2: Optional[int] = None):
+        super().__init__(baudrate)
+        self.registers = bytearray(0x40)
+        self.registers[0x31] = 0x14  # VERSION
+        self.active_freq2 = active_freq2
+
+    def respond(self, data: bytes) -> bytes:
+        addr = data[0]
+        if len(data) >= 2:
+            # Register write: echo the written value back
+            self.registers[addr & 0x3F] = data[1]
+            return bytes([data[1]] * (len(data) - 1) + [0x0F])
+        if addr & 0x80:
+            reg = addr & 0x3F
+            if reg == 0x34:  # RSSI
+                return bytes([0x40 if self._on_active_channel() else 0x90])
+            if reg == 0x38:  # PKTSTATUS, carrier sense bit
+                return bytes([0x40 if self._on_active_channel() else 0x00])
+            return bytes([self.registers[reg]])
+        return bytes([0x0F])  # Strobe: chip status byte
+
+    def _on_active_channel(self) -> bool:
+        return self.active_freq2 is not None and self.registers[0x0D] == self.active_freq2
+
+
+class EmulatedCC2500Text(LoopbackSerial):
+    """CC2500 bridge speaking the line-based text protocol.
+
+    Bytes are buffered up to each newline like the firmware does, so stray
+    bytes ahead of a command (say, a binary ping) make that line an error.
+    """
+
+    STROBES = (b'SRES', b'SIDLE', b'STX')
+
+    def __init__(self, baudrate: Optional[int] = None):
+        super().__init__(baudrate)
+        self.registers = {}
+        self.rejected: List[bytes] = []
+        self._line = bytearray()
+
+    def respond(self, data: bytes) -> bytes:
+        self._line += data
+        replies = bytearray()
+        while b'\n' in self._line:
+            line, _, rest = bytes(self._line).partition(b'\n')
+            self._line = bytearray(rest)
+            line = line.rstrip(b'\r')
+            replies += self._execute(line) if line else b''
+        return bytes(replies)
+
+    def _execute(self, line: bytes) -> bytes:
+        words = line.split()
+        if line in self.STROBES:
+            return b'OK\n'
+        if len(words) == 3 and words[0] == b'SET' and words[2].isdigit():
+            self.registers[words[1].decode()] = int(words[2])
+            return b'OK\n'
+        self.rejected.append(line)
+        return b'ERR\n'
+
+
+class EmulatedCC2500Binary(LoopbackSerial):
+    """CC2500 bridge speaking the binary framed protocol: one 3-byte ack per frame."""
+
+    def respond(self, data: bytes) -> bytes:
+        acks = bytearray()
+        i = 0
+        while i + 3 <= len(data) and data[i] == 0xA5:
+            length = data[i + 2]
+            acks += bytes([0x5A, data[i + 1], 0x00])
+            i += 4 + length
+        return bytes(acks)
+
+
+class EmulatedCC2500Usb:
+    """pyusb device stand-in for the CC2500 vendor control protocol."""
+
+    def __init__(self, hit_channel: Optional[int] = None):
+        self.hit_channel = hit_channel
+        self.transfers = 0
+        self._channel = 0
+        self._reads: List[int] = []
+
+    def ctrl_transfer(self, bmRequestType, bRequest, wValue=0, wIndex=0, data_or_wLength=None, timeout=None):
+        self.transfers += 1
+        if bmRequestType & 0x80:
+            length = data_or_wLength
+            if not self._reads:
+                hit = self._channel == self.hit_channel
+                # RSSI then RXBYTES, as scan_for_devices reads them
+                self._reads = [0x80 if hit else 0x10, 0x04 if hit else 0x00]
+            return bytes([self._reads.pop(0)] + [0] * (length - 1))
+        data = data_or_wLength or []
+        if bRequest == 0x40 and len(data) == 2 and data[0] == 0x0A:
+            self._channel = data[1]
+            self._reads = []
+        return len(data)
+
+
+class EchoServer:
+    """Local TCP server that echoes everything back, after delay seconds, unless muted."""
+
+    def __init__(self, delay: float = 0.0):
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.sock.bind(('127.0.0.1', 0))
+        self.sock.listen(1)
+        self.host, self.port = self.sock.getsockname()
+        self.delay = delay
+        self.muted = False
+        self.thread = Thread(target=self._serve, daemon=True)
+        self.thread.start()
+
+    def _serve(self):
+        conn, _ = self.sock.accept()
+        with conn:
+            while True:
+                data = conn.recv(65536)
+                if not data:
+                    break
+                if self.muted:
+                    continue
+                if self.delay:
+                    time.sleep(self.delay)
+                conn.sendall(data)
+
+    def close(self):
+        self.sock.close()
+        self.thread.join(timeout=1)
+
+
+class SinkServer:
+    """Local TCP server that drains and counts everything sent to it."""
+
+    def __init__(self):
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.sock.bind(('127.0.0.1', 0))
+        self.sock.listen(1)
+        self.host, self.port = self.sock.getsockname()
+        self.bytes_received = 0
+        self.thread = Thread(target=self._serve, daemon=True)
+        self.thread.start()
+
+    def _serve(self):
+        conn, _ = self.sock.accept()
+        with conn:
+            while True:
+                data = conn.recv(65536)
+                if not data:
+                    break
+                self.bytes_received += len(data)
+
+    def close(self):
+        self.sock.close()
+        self.thread.join(timeout=1)
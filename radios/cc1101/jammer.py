@@ -1,17 +1,19 @@
 import serial
 import time
 import logging
+import os
 
-import usb.core
-import usb.util
 from registers import *
 import sys
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'src'))
+from hopping import HopScheduler, run_plan
+from selection import DEFAULT_REPLAN_INTERVAL, ChannelSelector, PlanUpdater
+import tracing
+
 '''
 cp2102 USB to UART + CC1101 UART module
 '''
-# Configure logging
-logging.basicConfig(level=logging.DEBUG)
 
 def init_serial(port, baudrate):
     try:
@@ -24,11 +26,14 @@ def init_serial(port, baudrate):
         return None
 
 def spi_transfer(ser, data, sleep_duration=0.01):
-    logging.debug(f"Sending SPI data: {data}")
+    # Runs several times per hop: trace rather than log (WARDRIVER_TRACE=path to record)
+    if tracing.enabled:
+        tracing.trace(tracing.SPI_WRITE, 'cc1101', data)
     ser.write(data)
     time.sleep(sleep_duration)
     response = ser.read(len(data))
-    logging.debug(f"SPI transfer response: {response}")
+    if tracing.enabled:
+        tracing.trace(tracing.SPI_READ if response else tracing.SPI_TIMEOUT, 'cc1101', response, len(response))
     if not response:
         logging.error(f"No response received for SPI transfer with data: {data}")
         return bytes([0])
@@ -85,7 +90,8 @@ def configure_cc1101(ser):
     logging.info("CC1101 configuration complete")
 
 def set_frequency(ser, freq2, freq1, freq0):
-    logging.info(f"Setting frequency to: FREQ2=0x{freq2:02X}, FREQ1=0x{freq1:02X}, FREQ0=0x{freq0:02X}")
+    if tracing.enabled:
+        tracing.trace(tracing.TUNE, 'cc1101', bytes([freq2, freq1, freq0]))
     batch_write_registers(ser, [(CC1101_FREQ2, freq2), (CC1101_FREQ1, freq1), (CC1101_FREQ0, freq0)])
 
 def convert_frequency_to_registers(frequency_mhz):
@@ -97,24 +103,48 @@ def convert_frequency_to_registers(frequency_mhz):
     freq0 = freq & 0xFF
     return freq2, freq1, freq0
 
-def jam_frequencies(ser, raw_frequencies, packets_per_freq=10, spi_sleep=0.0005):
-    frequencies = [convert_frequency_to_registers(freq) for freq in raw_frequencies]
+def jam_frequencies(ser, raw_frequencies, dwell=0.01, spi_sleep=0.0005, cycles=None, selector=None,
+                    replan_interval=DEFAULT_REPLAN_INTERVAL):
+    # dwell: seconds on air per frequency, held against absolute deadlines by HopScheduler
+    # selector: a ChannelSelector; one pass of len(raw_frequencies) * dwell seconds is split over its
+    #   weighted channels, following it while running, with raw_frequencies as the fallback
+    frequencies = {raw_freq: convert_frequency_to_registers(raw_freq) for raw_freq in raw_frequencies}
     if not frequencies:
         logging.error("No frequencies provided for jamming.")
         return
+
+    def retune(raw_freq):
+        if raw_freq not in frequencies:
+            frequencies[raw_freq] = convert_frequency_to_registers(raw_freq)
+        set_frequency(ser, *frequencies[raw_freq])
+
+    cycle = len(raw_frequencies) * dwell
+    plan = selector.plan(cycle, min_dwell=dwell / 5) if selector else []
+    scheduler = HopScheduler(
+        plan or [(raw_freq, dwell) for raw_freq in raw_frequencies],
+        retune=retune,
+        tx_on=lambda: spi_transfer(ser, bytes([CC1101_STX]), sleep_duration=spi_sleep),  # Enter TX mode
+        tx_off=lambda: spi_transfer(ser, bytes([CC1101_SIDLE]), sleep_duration=spi_sleep),  # Exit TX mode
+        cycles=cycles,
+    )
+    updater = None
+    if selector is not None:
+        updater = PlanUpdater(selector, scheduler, cycle, min_dwell=dwell / 5, interval=replan_interval,
+                              fallback=[(raw_freq, dwell) for raw_freq in raw_frequencies])
+        updater.start()
+    logging.info(f"Jamming frequencies: {[frequency for frequency, _ in scheduler.plan]} MHz, "
+                 f"dwell {dwell * 1e3:.3f} ms")
     try:
-        while True:
-            for raw_freq, freq in zip(raw_frequencies, frequencies):
-                set_frequency(ser, *freq)
-                for _ in range(packets_per_freq):
-                    spi_transfer(ser, bytes([CC1101_STX]), sleep_duration=spi_sleep)  # Enter TX mode
-                    logging.info(f"Jamming frequency: {raw_freq} MHz, registers: {freq}")
-                    spi_transfer(ser, bytes([CC1101_SIDLE]), sleep_duration=spi_sleep)  # Exit TX mode
+        run_plan(scheduler)
     except KeyboardInterrupt:
         logging.info("Jamming stopped by user")
     finally:
+        if updater:
+            updater.stop()
         ser.close()
         logging.info("Serial port closed")
+        scheduler.log_stats()
+    return scheduler.stats()
 
 def read_rssi(ser):
     response = spi_transfer(ser, bytes([CC1101_RSSI | 0x80]), sleep_duration=0.001)
@@ -135,22 +165,40 @@ def check_carrier_sense(ser):
     carrier_sense = pktstatus & 0x40  # Carrier sense bit
     return carrier_sense != 0
 
-def find_highest_rssi_channel(ser, frequency_range):
-    max_rssi = -float('inf')
-    best_freq_mhz = None
-    best_freq_regs = None
+def send_packet(ser, payload, spi_sleep=0.0005):
+    # Burst write the TX FIFO, then transmit it
+    spi_transfer(ser, bytes([CC1101_TXFIFO | CC1101_WRITE_BURST]) + bytes(payload), sleep_duration=spi_sleep)
+    spi_transfer(ser, bytes([CC1101_STX]), sleep_duration=spi_sleep)
+
+def scan_channels(ser, frequency_range, settle=0.1):
+    # Yields (frequency MHz, RSSI dBm, carrier sense) for each frequency
     for freq_mhz in frequency_range:
         freq2, freq1, freq0 = convert_frequency_to_registers(freq_mhz)
         set_frequency(ser, freq2, freq1, freq0)
         spi_transfer(ser, bytes([CC1101_SRX]), sleep_duration=0.001)  # Enter RX mode
-        time.sleep(0.1)  # Wait for the CC1101 to settle in RX mode
+        time.sleep(settle)  # Wait for the CC1101 to settle in RX mode
         rssi = read_rssi(ser)
         carrier_sense = check_carrier_sense(ser)
         logging.info(f"Scanned frequency: {freq_mhz} MHz, RSSI: {rssi} dBm, Carrier Sense: {carrier_sense}")
+        yield freq_mhz, rssi, carrier_sense
+
+def sense_channels(ser, frequency_range, selector, sweeps=3, settle=0.1):
+    # Feed a ChannelSelector from a few sweeps, so channels are weighted by how often they are busy
+    # rather than picked from one snapshot
+    for _ in range(sweeps):
+        for freq_mhz, rssi, carrier_sense in scan_channels(ser, frequency_range, settle):
+            selector.record(freq_mhz, rssi, bool(carrier_sense))
+    return selector.weights()
+
+def find_highest_rssi_channel(ser, frequency_range):
+    max_rssi = -float('inf')
+    best_freq_mhz = None
+    best_freq_regs = None
+    for freq_mhz, rssi, carrier_sense in scan_channels(ser, frequency_range):
         if carrier_sense and rssi > max_rssi:
             max_rssi = rssi
             best_freq_mhz = freq_mhz
-            best_freq_regs = (freq2, freq1, freq0)
+            best_freq_regs = convert_frequency_to_registers(freq_mhz)
     if best_freq_regs is None:
         logging.error("No valid frequencies found during RSSI scan.")
         return None 
@@ -221,6 +269,10 @@ def check_device_connection(port, baudrate):
     
     
 if __name__ == "__main__":
+    # Configure logging
+    logging.basicConfig(level=logging.DEBUG)
+    tracing.enable_from_env()
+
     port = "COM4"  # Adjust as necessary for your system
     baudrate = 115200  # Maximum supported baud rate
 
@@ -239,11 +291,13 @@ if __name__ == "__main__":
         #raw_frequencies = [433.0, 433.1, 433.2, 433.3, 433.4]  # Frequencies in MHz
         raw_frequencies = None
         
-        # Find the highest RSSI channel if no frequencies are passed in
+        # Weight the busiest channels if no frequencies are passed in
+        selector = None
         if not raw_frequencies:
             frequency_range = [433.05 + 0.025 * i for i in range(int((434.775 - 433.05) / 0.025) + 1)]
-            best_freq = find_highest_rssi_channel(ser, frequency_range)
-            raw_frequencies = [best_freq]
+            selector = ChannelSelector()
+            weights = sense_channels(ser, frequency_range, selector)
+            raw_frequencies = list(weights) or [find_highest_rssi_channel(ser, frequency_range)]
         
         # Jam the defined frequencies
-        jam_frequencies(ser, raw_frequencies, packets_per_freq=10, spi_sleep=0.0005)
\ No newline at end of file
+        jam_frequencies(ser, raw_frequencies, dwell=0.01, spi_sleep=0.0005, selector=selector)
\ No newline at end of file
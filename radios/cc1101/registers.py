@@ -1,6 +1,3 @@
-import usb.core
-import usb.util
-
 # Define CC1101 register addresses
 CC1101_IOCFG2 = 0x00  # GDO2 output pin configuration
 CC1101_IOCFG1 = 0x01  # GDO1 output pin configuration
@@ -50,6 +47,7 @@ CC1101_TEST2 = 0x2C  # Various test settings
 CC1101_TEST1 = 0x2D  # Various test settings
 CC1101_TEST0 = 0x2E  # Various test settings
 CC1101_PATABLE = 0x3E
+CC1101_TXFIFO = 0x3F
 
 # Define CC1101 strobe commands
 CC1101_SRES = 0x30  # Reset chip
@@ -97,9 +95,10 @@ CC1101_CHIP_RDYn = 0x80  # Indicates chip is ready
 VID_SILABS = 0x10C4
 PID_CP210x = 0xEA60
 CP210x_CONFIG = 0xFF
-CTRL_IN = usb.util.CTRL_IN
-CTRL_OUT = usb.util.CTRL_OUT
-CTRL_TYPE_VENDOR = usb.util.CTRL_TYPE_VENDOR
+# Same values as usb.util.CTRL_IN/CTRL_OUT/CTRL_TYPE_VENDOR, without importing pyusb
+CTRL_IN = 0x80
+CTRL_OUT = 0x00
+CTRL_TYPE_VENDOR = 0x40
 
 # Constants for CC1101
 CC1101_SRES = 0x30
\ No newline at end of file
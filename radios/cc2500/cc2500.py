@@ -1,25 +1,182 @@
-import usb.core
-import usb.util
+import os
+import sys
 import time
 import random
+import weakref
+from collections import deque
+from concurrent.futures import Future
+from threading import Condition, Thread
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'src'))
+from ratelimit import RateLimiter
+from priors import location_key, open_priors
 
 # Constants for CC2500
 CMD_STROBE = 0x30
 CMD_WRITE = 0x40
 CMD_READ = 0x80
 CC2500_CHANNR = 0x0A
+CC2500_FREQ2 = 0x0D
 CC2500_RSSI = 0x34
 CC2500_RXBYTES = 0x3B
+CC2500_TXFIFO = 0x3F
+CC2500_SRES = 0x30
+CC2500_SRX = 0x34
+CC2500_STX = 0x35
+CC2500_SIDLE = 0x36
+
+# A control transfer on a healthy dongle takes about a millisecond; anything near this is a hung device
+TIMEOUT_MS = 100
+# Time each channel listens in RX. A hit needs a packet received within it (RXBYTES > 0), so a
+# shorter window misses devices that transmit less often; scans trade speed for detection here
+SCAN_SETTLE = 0.01
+# Channels queued ahead of the one being checked, so the worker never waits on the caller between channels
+SCAN_WINDOW = 4
+MAX_QUEUED = 64
+# Channel 0 at 2400 MHz: FREQ = 2400 MHz * 2^16 / 26 MHz crystal (reset FREQ is 0x5D93B1, about 2433 MHz)
+BASE_FREQ_WORD = 0x5C4EC4
 
 def send_command(dev, cmd, data):
-    dev.ctrl_transfer(0x40, cmd, 0, 0, data, 5000)
+    dev.ctrl_transfer(0x40, cmd, 0, 0, data, TIMEOUT_MS)
 
 def read_response(dev, length):
-    return dev.ctrl_transfer(0xC0, CMD_READ, 0, 0, length, 5000)
+    return dev.ctrl_transfer(0xC0, CMD_READ, 0, 0, length, TIMEOUT_MS)
+
+class UsbCommandQueue:
+    # Runs one dongle's control transfers in order on a worker thread, so callers don't wait on USB.
+    # Consecutive register writes become one burst write (so do consecutive TX FIFO writes), and
+    # consecutive strobes one strobe transfer: the CC2500 takes several header bytes per CSn.
+    # Reads return futures. An error drops what was queued after it, fails the pending reads and is
+    # raised by the next write, strobe, read or flush, so a dead dongle stops its caller on the next call.
+
+    def __init__(self, dev, max_queued=MAX_QUEUED):
+        self.dev = dev
+        self.max_queued = max_queued
+        self.transfers = 0
+        self._ops = deque()  # [kind, request or delay, data or future]
+        self._busy = False
+        self._error = None
+        self._closed = False
+        self._changed = Condition()
+        self._thread = Thread(target=self._run, name='cc2500-usb', daemon=True)
+        self._thread.start()
+
+    def _put(self, op, merge=None):
+        with self._changed:
+            if self._closed:
+                raise RuntimeError("USB command queue is closed")
+            if self._error is not None:
+                error, self._error = self._error, None
+                raise error
+            while len(self._ops) >= self.max_queued:
+                self._changed.wait()
+            last = self._ops[-1] if self._ops else None
+            if merge and last and merge(last):
+                last[2].extend(op[2][1:] if op[0] == 'write' else op[2])
+            else:
+                self._ops.append(op)
+            self._changed.notify_all()
+
+    def write(self, register, values):
+        def follows(last):
+            if last[0] != 'write':
+                return False
+            if register == CC2500_TXFIFO:
+                return last[2][0] == CC2500_TXFIFO
+            return register < CC2500_SRES and last[2][0] + len(last[2]) - 1 == register
+        self._put(['write', CMD_WRITE, [register] + list(values)], follows)
+
+    def strobe(self, *strobes):
+        self._put(['strobe', CMD_STROBE, list(strobes)], lambda last: last[0] == 'strobe')
+
+    def delay(self, seconds):
+        # Held on the worker, so the caller keeps queueing
+        self._put(['delay', seconds, None])
+
+    def read(self, length=1):
+        future = Future()
+        self._put(['read', length, future])
+        return future
+
+    def cancel(self):
+        # Drop everything not yet started, e.g. the rest of a scan after a hit
+        with self._changed:
+            for op in self._ops:
+                if op[0] == 'read':
+                    op[2].cancel()
+            self._ops.clear()
+            self._changed.notify_all()
+
+    def flush(self, timeout=None):
+        with self._changed:
+            if not self._changed.wait_for(lambda: not self._ops and not self._busy, timeout):
+                raise TimeoutError("USB command queue did not drain")
+            error, self._error = self._error, None
+        if error is not None:
+            raise error
+
+    def close(self):
+        try:
+            self.flush()
+        finally:
+            with self._changed:
+                self._closed = True
+                self._changed.notify_all()
+            self._thread.join()
+
+    def _run(self):
+        while True:
+            with self._changed:
+                self._changed.wait_for(lambda: self._ops or self._closed)
+                if not self._ops:
+                    return
+                op = self._ops.popleft()
+                self._busy = True
+                self._changed.notify_all()
+            kind, arg, data = op
+            try:
+                if kind == 'delay':
+                    time.sleep(arg)
+                elif kind == 'read':
+                    if data.set_running_or_notify_cancel():
+                        data.set_result(self.dev.ctrl_transfer(0xC0, CMD_READ, 0, 0, arg, TIMEOUT_MS))
+                        self.transfers += 1
+                else:
+                    self.dev.ctrl_transfer(0x40, arg, 0, 0, data, TIMEOUT_MS)
+                    self.transfers += 1
+            except Exception as e:
+                if kind == 'read':
+                    data.set_exception(e)
+                with self._changed:
+                    self._error = self._error or e
+                    # What follows assumed this transfer went through
+                    for pending in self._ops:
+                        if pending[0] == 'read' and pending[2].set_running_or_notify_cancel():
+                            pending[2].set_exception(e)
+                    self._ops.clear()
+            with self._changed:
+                self._busy = False
+                self._changed.notify_all()
+
+_queues = weakref.WeakKeyDictionary()
+
+def command_queue(dev):
+    # One queue per device, shared by every helper below
+    queue = _queues.get(dev)
+    if queue is None:
+        queue = _queues[dev] = UsbCommandQueue(dev)
+    return queue
+
+def close_queue(dev):
+    queue = _queues.pop(dev, None)
+    if queue is not None:
+        queue.close()
 
 def reset_cc2500(dev):
-    send_command(dev, CMD_STROBE, [0x30])
-    time.sleep(0.1)
+    queue = command_queue(dev)
+    queue.strobe(CC2500_SRES)
+    queue.delay(0.1)
+    queue.flush()
 
 def configure_cc2500(dev, mode):
     if mode == 'ISM':
@@ -39,40 +196,97 @@ def configure_cc2500(dev, mode):
             # Add more SRD-specific configurations here
         ]
 
+    queue = command_queue(dev)
     for reg, value in config:
-        send_command(dev, CMD_WRITE, [reg, value])
+        queue.write(reg, [value])
+    queue.write(CC2500_FREQ2, list(BASE_FREQ_WORD.to_bytes(3, 'big')))
+    queue.flush()
+
+def set_channel(dev, channel):
+    command_queue(dev).write(CC2500_CHANNR, [channel])
 
-def scan_for_devices(dev):
-    for channel in range(255):
-        send_command(dev, CMD_WRITE, [CC2500_CHANNR, channel])
-        send_command(dev, CMD_STROBE, [0x34])  # SRX
-        time.sleep(0.01)
-        rssi = read_response(dev, 1)[0]
-        rx_bytes = read_response(dev, 1)[0] & 0x7F  # Get RX bytes
-        send_command(dev, CMD_STROBE, [0x36])  # SIDLE
+def send_packet(dev, payload):
+    # Queued: returns as soon as the packet is in line, errors surface at the next call
+    queue = command_queue(dev)
+    queue.write(CC2500_TXFIFO, payload)
+    queue.strobe(CC2500_STX)
+    queue.delay(0.01)
+    queue.strobe(CC2500_SIDLE)
 
-        if rssi >= 0x80 and rx_bytes > 0:
-            return channel
+def _probe(queue, channel, settle):
+    queue.write(CC2500_CHANNR, [channel])
+    queue.strobe(CC2500_SRX)
+    queue.delay(settle)
+    rssi = queue.read(1)
+    rx_bytes = queue.read(1)
+    queue.strobe(CC2500_SIDLE)
+    return channel, rssi, rx_bytes
 
-    return None
+def scan_for_devices(dev, channels=range(255), settle=SCAN_SETTLE, window=SCAN_WINDOW, on_result=None):
+    # The next few channels are queued while one is checked; the rest are dropped on the first hit.
+    # on_result(channel, hit) hears about every channel checked, in order
+    queue = command_queue(dev)
+    channels = iter(channels)
+    probes = deque()
+    try:
+        while True:
+            while len(probes) < window:
+                channel = next(channels, None)
+                if channel is None:
+                    break
+                probes.append(_probe(queue, channel, settle))
+            if not probes:
+                return None
+            channel, rssi, rx_bytes = probes.popleft()
+            hit = rssi.result()[0] >= 0x80 and rx_bytes.result()[0] & 0x7F > 0
+            if on_result:
+                on_result(channel, hit)
+            if hit:
+                return channel
+    finally:
+        queue.cancel()
+        queue.strobe(CC2500_SIDLE)
+        queue.flush()
 
-def fuzz_device(dev, channel):
+def scan_with_priors(dev, priors, location, mode, channels=range(255), **kwargs):
+    # Channels with past hits here go first, then the sweep resumes after the last channel it checked
+    hot, rest = priors.order(location, mode, channels)
+    sweep = set(rest)
+    last = []
+
+    def on_result(channel, hit):
+        priors.record(location, mode, channel, hit)
+        if channel in sweep:
+            last[:] = [channel]
+
+    channel = scan_for_devices(dev, hot + rest, on_result=on_result, **kwargs)
+    priors.finish_scan(location, mode, last[0] + 1 if last else None)
+    priors.save()
+    return channel
+
+def fuzz_device(dev, channel, max_packets=None, pps=10.0, bps=None):
+    # pps/bps of None send as fast as the dongle accepts packets
     print(f"Fuzzing device on channel {channel}")
-    while True:
+    set_channel(dev, channel)
+    limiter = RateLimiter(pps=pps, bps=bps)
+    sent = 0
+    while max_packets is None or sent < max_packets:
         # Random packet size and payload
         packet_size = random.randint(1, 64)
         payload = [random.randint(0, 255) for _ in range(packet_size)]
 
-        # Send packet
-        send_command(dev, CMD_WRITE, [0x3F] + payload)  # TX FIFO
-        send_command(dev, CMD_STROBE, [0x35])  # STX
-        time.sleep(0.01)
-        send_command(dev, CMD_STROBE, [0x36])  # SIDLE
+        limiter.acquire(packet_size)
+        send_packet(dev, payload)
 
-        # Short delay between fuzzing packets
-        time.sleep(0.1)
+        sent += 1
+    command_queue(dev).flush()
+    stats = limiter.stats()
+    print(f"Sent {sent} packets at {stats['achieved_pps']:.1f} packets/s")
 
 def main():
+    import usb.core
+    import usb.util
+
     dev = usb.core.find(idVendor=0x0451, idProduct=0x16AE)
     if dev is None:
         raise ValueError('Device not found')
@@ -81,15 +295,18 @@ def main():
     usb.util.claim_interface(dev, 0)
 
     reset_cc2500(dev)
+    priors = open_priors()
+    location = location_key(name=os.environ.get('WARDRIVER_LOCATION'))
 
     while True:
-        mode = random.choice(['ISM', 'SRD'])
+        mode = priors.pick_mode(location, ['ISM', 'SRD'])
         configure_cc2500(dev, mode)
-        channel = scan_for_devices(dev)
+        channel = scan_with_priors(dev, priors, location, mode)
         if channel is not None:
             print(f"Found device on channel {channel} in {mode} mode")
             fuzz_device(dev, channel)
 
+    close_queue(dev)
     usb.util.release_interface(dev, 0)
     usb.util.dispose_resources(dev)
 
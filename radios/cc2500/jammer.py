@@ -1,57 +1,87 @@
 import serial
 import time
+import os
+import sys
 
-# Configure the serial port
-ser = serial.Serial('COM3', 115200, timeout=1)  # Replace 'COM3' with your actual COM port
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'src'))
+from hopping import HopScheduler, run_plan
+from selection import DEFAULT_REPLAN_INTERVAL, PlanUpdater
+from protocol import negotiate, frequency_to_registers
+import tracing
 
-def send_command(command):
+def open_serial(port='COM3', baudrate=115200):
+    # Replace 'COM3' with your actual COM port
+    return serial.Serial(port, baudrate, timeout=1)
+
+def send_command(ser, command):
     ser.write(command.encode())
     time.sleep(0.05)
     response = ser.read_all()
     print(response.decode('utf-8'))
 
-def init_cc2500():
+def init_cc2500(ser):
     # Reset command
-    send_command('SRES\n')
+    send_command(ser, 'SRES\n')
     time.sleep(0.1)
     
     # Basic configuration settings (if needed)
-    # send_command('SET IOCFG0 0x06\n')  # GDO0 Output Pin Configuration
+    # send_command(ser, 'SET IOCFG0 0x06\n')  # GDO0 Output Pin Configuration
 
-def set_frequency(frequency):
-    freq_setting = int((frequency / 26.0) * 65536)
-    freq2 = (freq_setting >> 16) & 0xFF
-    freq1 = (freq_setting >> 8) & 0xFF
-    freq0 = freq_setting & 0xFF
-    
-    send_command(f'SET FREQ2 {freq2}\n')
-    send_command(f'SET FREQ1 {freq1}\n')
-    send_command(f'SET FREQ0 {freq0}\n')
+def set_frequency(ser, frequency):
+    freq2, freq1, freq0 = frequency_to_registers(frequency)
+
+    send_command(ser, f'SET FREQ2 {freq2}\n')
+    send_command(ser, f'SET FREQ1 {freq1}\n')
+    send_command(ser, f'SET FREQ0 {freq0}\n')
 
-def start_jamming():
+def start_jamming(ser):
     # Enable TX mode
-    send_command('STX\n')
+    send_command(ser, 'STX\n')
 
-def stop_jamming():
+def stop_jamming(ser):
     # Reset to stop transmission
-    send_command('SRES\n')
+    send_command(ser, 'SRES\n')
 
-def frequency_hopping():
-    frequencies = [2435, 2445, 2461]  # Specified frequencies
-    hop_interval = 0.05  # 50 milliseconds per frequency
-    
-    while True:
-        for frequency in frequencies:
-            set_frequency(frequency)
-            start_jamming()
-            time.sleep(hop_interval)
-            stop_jamming()
+def frequency_hopping(ser, frequencies=(2435, 2445, 2461), hop_interval=0.05, cycles=None, protocol=None,
+                      selector=None, replan_interval=DEFAULT_REPLAN_INTERVAL):
+    # hop_interval: 50 milliseconds per frequency, command round trips included
+    # cycles: number of passes over frequencies, None to hop until interrupted
+    # protocol: binary framing when the bridge supports it, text commands otherwise
+    # selector: a ChannelSelector fed by a receiving radio; the hop plan follows its weighted
+    #   channels, one pass of len(frequencies) * hop_interval seconds, and frequencies are the
+    #   fallback while it has heard nothing
+    if protocol is None:
+        protocol = negotiate(ser, send_command)
+    protocol.prepare(frequencies)
+    scheduler = HopScheduler(
+        [(frequency, hop_interval) for frequency in frequencies],
+        retune=protocol.tune_tx,  # one retune+TX frame per hop
+        tx_off=protocol.end_hop,
+        cycles=cycles,
+    )
+    updater = None
+    if selector is not None:
+        updater = PlanUpdater(selector, scheduler, cycle=len(frequencies) * hop_interval, min_dwell=hop_interval / 5,
+                              interval=replan_interval,
+                              on_plan=lambda plan: protocol.prepare([frequency for frequency, _ in plan]))
+        updater.start()
+    try:
+        return run_plan(scheduler)
+    finally:
+        if updater:
+            updater.stop()
+        protocol.close()
+        scheduler.log_stats()
 
 if __name__ == "__main__":
-    init_cc2500()
+    tracing.enable_from_env()
+    ser = open_serial()
+    init_cc2500(ser)
+    protocol = negotiate(ser, send_command)
     try:
-        frequency_hopping()
+        frequency_hopping(ser, protocol=protocol)
     except KeyboardInterrupt:
-        stop_jamming()
+        protocol.reset()
+        protocol.close()
         ser.close()
         print("Jamming stopped")
@@ -0,0 +1,186 @@
+import time
+import logging
+
+'''
+Binary framing for the CC2500 serial bridge.
+
+Frame:  0xA5 | cmd | len | payload[len] | crc8(cmd, len, payload)
+Ack:    0x5A | cmd | status (0x00 = OK)
+
+The bridge acks every frame, but the host does not wait for them one by one;
+acks are drained in batches once ACK_WINDOW frames are outstanding.
+'''
+
+FRAME_SYNC = 0xA5
+ACK_SYNC = 0x5A
+ACK_LEN = 3
+ACK_OK = 0x00
+
+CMD_PING = 0x01
+CMD_RESET = 0x02     # SRES
+CMD_TUNE_TX = 0x03   # FREQ2, FREQ1, FREQ0, then STX
+CMD_IDLE = 0x04      # SIDLE
+
+ACK_WINDOW = 16
+PING_TIMEOUT = 0.05
+
+F_XOSC = 26.0  # Crystal oscillator frequency in MHz
+
+
+def _crc8_table(poly=0x07):
+    table = []
+    for byte in range(256):
+        crc = byte
+        for _ in range(8):
+            crc = ((crc << 1) ^ poly) & 0xFF if crc & 0x80 else (crc << 1) & 0xFF
+        table.append(crc)
+    return bytes(table)
+
+CRC8_TABLE = _crc8_table()
+
+
+def crc8(data):
+    crc = 0
+    for byte in data:
+        crc = CRC8_TABLE[crc ^ byte]
+    return crc
+
+
+def frequency_to_registers(frequency):
+    freq_setting = int((frequency / F_XOSC) * 65536)
+    return (freq_setting >> 16) & 0xFF, (freq_setting >> 8) & 0xFF, freq_setting & 0xFF
+
+
+def build_frame(cmd, payload=b''):
+    body = bytes([cmd, len(payload)]) + bytes(payload)
+    return bytes([FRAME_SYNC]) + body + bytes([crc8(body)])
+
+
+class BinaryProtocol:
+    def __init__(self, ser, ack_window=ACK_WINDOW):
+        self.ser = ser
+        self.ack_window = ack_window
+        self.pending = 0
+        self.acked = 0
+        self.naks = 0
+        self._rx = bytearray()
+        self._frames = {}
+        self._reset_frame = build_frame(CMD_RESET)
+        self._idle_frame = build_frame(CMD_IDLE)
+
+    def prepare(self, frequencies):
+        """Precompute the retune+TX frame for every hop frequency."""
+        for frequency in frequencies:
+            self._frames[frequency] = build_frame(CMD_TUNE_TX, frequency_to_registers(frequency))
+
+    def _send(self, frame):
+        self.ser.write(frame)
+        self.pending += 1
+
+    def tune_tx(self, frequency):
+        frame = self._frames.get(frequency)
+        if frame is None:
+            frame = self._frames[frequency] = build_frame(CMD_TUNE_TX, frequency_to_registers(frequency))
+        self._send(frame)
+
+    def idle(self):
+        self._send(self._idle_frame)
+
+    def reset(self):
+        self._send(self._reset_frame)
+
+    def end_hop(self):
+        # Only touch the port for acks once a full window is outstanding
+        if self.pending >= self.ack_window:
+            self.poll_acks()
+
+    def poll_acks(self):
+        """Consume whatever acks have arrived without blocking."""
+        waiting = self.ser.in_waiting
+        if waiting:
+            self._rx += self.ser.read(waiting)
+        self._parse_acks()
+
+    def flush(self, timeout=0.1):
+        """Wait up to timeout for every outstanding frame to be acked."""
+        deadline = time.monotonic() + timeout
+        while self.pending > 0 and time.monotonic() < deadline:
+            self.poll_acks()
+            if self.pending > 0:
+                time.sleep(0.001)
+        if self.pending > 0:
+            logging.warning(f"{self.pending} CC2500 frames not acknowledged")
+        return self.pending == 0
+
+    def _parse_acks(self):
+        while len(self._rx) >= ACK_LEN:
+            if self._rx[0] != ACK_SYNC:
+                # Resynchronise on the next ack marker
+                del self._rx[0]
+                continue
+            status = self._rx[2]
+            del self._rx[:ACK_LEN]
+            self.pending = max(self.pending - 1, 0)
+            if status == ACK_OK:
+                self.acked += 1
+            else:
+                self.naks += 1
+                logging.warning(f"CC2500 bridge rejected frame, status 0x{status:02X}")
+
+    def close(self):
+        self.flush()
+
+
+class TextProtocol:
+    """Original line-based protocol, kept for bridges without binary framing."""
+
+    def __init__(self, ser, send_command):
+        self.ser = ser
+        self.send_command = send_command
+
+    def prepare(self, frequencies):
+        pass
+
+    def tune_tx(self, frequency):
+        freq2, freq1, freq0 = frequency_to_registers(frequency)
+        self.send_command(self.ser, f'SET FREQ2 {freq2}\n')
+        self.send_command(self.ser, f'SET FREQ1 {freq1}\n')
+        self.send_command(self.ser, f'SET FREQ0 {freq0}\n')
+        self.send_command(self.ser, 'STX\n')
+
+    def idle(self):
+        self.send_command(self.ser, 'SIDLE\n')
+
+    def reset(self):
+        self.send_command(self.ser, 'SRES\n')
+
+    def end_hop(self):
+        # Reset to stop transmission before the next retune
+        self.reset()
+
+    def close(self):
+        pass
+
+
+def negotiate(ser, send_command, timeout=PING_TIMEOUT):
+    """Return a BinaryProtocol if the bridge answers a binary ping, else the text fallback."""
+    ser.reset_input_buffer()
+    ser.write(build_frame(CMD_PING))
+    deadline = time.monotonic() + timeout
+    response = b''
+    while len(response) < ACK_LEN and time.monotonic() < deadline:
+        response += ser.read(ser.in_waiting or 0)
+        time.sleep(0.001)
+    if response[:2] == bytes([ACK_SYNC, CMD_PING]):
+        logging.info("CC2500 bridge supports binary framing")
+        return BinaryProtocol(ser)
+    # A text bridge is holding the ping in its line buffer: end that line so the next command starts clean
+    ser.write(b'\n')
+    deadline = time.monotonic() + timeout
+    response = b''
+    while b'\n' not in response and time.monotonic() < deadline:
+        response += ser.read(ser.in_waiting or 0)
+        time.sleep(0.001)
+    ser.reset_input_buffer()
+    logging.info("CC2500 bridge did not answer binary ping, using text protocol")
+    return TextProtocol(ser, send_command)
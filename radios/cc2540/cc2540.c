@@ -16,6 +16,7 @@
 
 #define POWER_RETRIES 10
 #define FUZZ_PACKET_SIZE 32
+#define MAX_DEVICES 1024  // Oldest devices are dropped past this, so long captures stay bounded
 
 typedef struct BLEDevice {
     uint16_t vid;
@@ -27,11 +28,39 @@ typedef struct BLEDevice {
     struct BLEDevice* next;  // Link to the next device (simple linked list)
 } BLEDevice;
 
-BLEDevice* first_device = NULL;  // Head of the linked list of devices
+BLEDevice* first_device = NULL;  // Head of the linked list of devices, most recently seen first
+int device_count = 0;
+
+BLEDevice* find_device(const char* mac_address) {
+    BLEDevice* device = first_device;
+    while (device != NULL && strcmp(device->mac_address, mac_address) != 0) {
+        device = device->next;
+    }
+    return device;
+}
 
 void add_device(BLEDevice* device) {
     device->next = first_device;
     first_device = device;
+    if (++device_count <= MAX_DEVICES) return;
+
+    // Drop the tail, i.e. the device seen longest ago
+    BLEDevice* previous = first_device;
+    while (previous->next->next != NULL) {
+        previous = previous->next;
+    }
+    free(previous->next);
+    previous->next = NULL;
+    device_count--;
+}
+
+void free_devices() {
+    while (first_device != NULL) {
+        BLEDevice* next = first_device->next;
+        free(first_device);
+        first_device = next;
+    }
+    device_count = 0;
 }
 
 void print_devices() {
@@ -47,6 +76,15 @@ void analyze_and_store_data(uint8_t* data, int len, int channel) {
     // Placeholder for packet analysis
     // You would parse the BLE packets here and extract the necessary information
     // For demonstration, let's assume we have a function that can parse and return BLE device info
+    const char* mac_address = "AA:BB:CC:DD:EE:FF";  // Example MAC
+
+    // A device seen again is updated in place rather than added twice
+    BLEDevice* known = find_device(mac_address);
+    if (known != NULL) {
+        known->rssi = -42;  // Example RSSI
+        known->channel = channel;
+        return;
+    }
 
     BLEDevice* new_device = malloc(sizeof(BLEDevice));
     if (new_device == NULL) return;
@@ -55,7 +93,7 @@ void analyze_and_store_data(uint8_t* data, int len, int channel) {
     new_device->vid = 0x451;  // Example VID
     new_device->pid = 0x16B3;  // Example PID
     strcpy(new_device->name, "Example BLE Device");
-    strcpy(new_device->mac_address, "AA:BB:CC:DD:EE:FF");
+    strcpy(new_device->mac_address, mac_address);
     new_device->rssi = -42;  // Example RSSI
     new_device->channel = channel;
 
@@ -236,6 +274,7 @@ int main(int argc, char *argv[]) {
     libusb_set_option(context, LIBUSB_OPTION_LOG_LEVEL, LIBUSB_LOG_LEVEL_WARNING);
     sniff(context, 0x451, 0x16B3, channel);
     print_devices();
+    free_devices();
     libusb_exit(context);
 
     return 0;
@@ -1,36 +1,118 @@
 from ctypes import c_int, POINTER, Structure, c_char_p, c_void_p, c_uint16
 import ctypes
+import time
+
+# Vendor requests of the CC2540 sniffer firmware, as in cc2540.c
+# from https://github.com/andrewdodd/ccsniffpiper/blob/master/ccsniffpiper.py
+GET_IDENT = 0xC0
+SET_POWER = 0xC5
+GET_POWER = 0xC6
+SET_START = 0xD0
+SET_END = 0xD1
+SET_CHAN = 0xD2
+SEND_DATA = 0xC9
+
+TIMEOUT = 1000
+POWER_RETRIES = 10
+BULK_EP = 0x83
 
 # Define the BLEDevice structure as it appears in C
 class BLEDevice(Structure):
-    _fields_ = [
-        ('vid', c_uint16),
-        ('pid', c_uint16),
-        ('name', c_char_p),
-        ('mac_address', c_char_p),
-        ('rssi', c_int),
-        ('channel', c_int),
-        ('next', POINTER(BLEDevice))  # Pointer to the next device (simple linked list)
-    ]
+    pass
+
+BLEDevice._fields_ = [
+    ('vid', c_uint16),
+    ('pid', c_uint16),
+    ('name', c_char_p),
+    ('mac_address', c_char_p),
+    ('rssi', c_int),
+    ('channel', c_int),
+    ('next', POINTER(BLEDevice))  # Pointer to the next device (simple linked list)
+]
+
+# pyusb equivalents of the cc2540.c helpers, used by the wardriver driver
+
+def get_ident(dev):
+    return bytes(dev.ctrl_transfer(0xC0, GET_IDENT, 0x00, 0x00, 32, TIMEOUT))
+
+def set_power(dev, power, retries=POWER_RETRIES):
+    dev.ctrl_transfer(0x40, SET_POWER, 0x00, power, None, TIMEOUT)
+    # get power until it is the same as configured in set_power
+    for _ in range(retries):
+        if dev.ctrl_transfer(0xC0, GET_POWER, 0x00, 0x00, 1, TIMEOUT)[0] == power:
+            return True
+    return False
+
+def set_channel(dev, channel):
+    dev.ctrl_transfer(0x40, SET_CHAN, 0x00, 0x00, [channel & 0xFF], TIMEOUT)
+    dev.ctrl_transfer(0x40, SET_CHAN, 0x00, 0x01, [(channel >> 8) & 0xFF], TIMEOUT)
+
+def start_capture(dev):
+    dev.ctrl_transfer(0x40, SET_START, 0x00, 0x00, None, TIMEOUT)
+
+def stop_capture(dev):
+    dev.ctrl_transfer(0x40, SET_END, 0x00, 0x00, None, TIMEOUT)
+
+def setup(dev, channel):
+    get_ident(dev)
+    set_power(dev, 0x04)
+    dev.ctrl_transfer(0x40, SEND_DATA, 0x00, 0x00, None, TIMEOUT)
+    set_channel(dev, channel)
+    start_capture(dev)
+
+def send_data(dev, payload):
+    return dev.ctrl_transfer(0x40, SEND_DATA, 0x00, 0x00, bytes(payload), TIMEOUT)
+
+def read_frames(dev, duration, timeout=100):
+    # Bulk reads for `duration` seconds; yields raw sniffer frames
+    import usb.core
+    deadline = time.monotonic() + duration
+    while time.monotonic() < deadline:
+        try:
+            data = dev.read(BULK_EP, 1024, timeout)
+        except usb.core.USBTimeoutError:
+            continue
+        if data:
+            yield bytes(data)
+
+def parse_frame(frame):
+    # Sniffer header: info (1), length (2), timestamp (4), packet length (1), then
+    # access address (4), PDU header (2), AdvA (6) ... RSSI and FCS/status bytes last
+    if len(frame) < 8 + 12 + 2:
+        return None
+    packet = frame[8:8 + frame[7]]
+    if len(packet) < 12:
+        return None
+    mac_address = ':'.join(f"{byte:02X}" for byte in reversed(packet[6:12]))
+    rssi = packet[-2] - 256 if packet[-2] >= 128 else packet[-2]
+    return mac_address, rssi - 73  # CC2540 RSSI offset
+
+def main():
+    # Load the shared library
+    lib = ctypes.CDLL('./cc2540.so')
+
+    # Set argument types and return types for the functions
+    lib.libusb_init.argtypes = [c_void_p]
+    lib.libusb_init.restype = None
 
-# Load the shared library
-lib = ctypes.CDLL('./cc2540.so')
+    lib.sniff.argtypes = [c_void_p, c_uint16, c_uint16, c_int]
+    lib.sniff.restype = None
 
-# Set argument types and return types for the functions
-lib.libusb_init.argtypes = [c_void_p]
-lib.libusb_init.restype = None
+    lib.print_devices.argtypes = []
+    lib.print_devices.restype = None
 
-lib.sniff.argtypes = [c_void_p, c_uint16, c_uint16, c_int]
-lib.sniff.restype = None
+    lib.free_devices.argtypes = []
+    lib.free_devices.restype = None
 
-lib.print_devices.argtypes = []
-lib.print_devices.restype = None
+    # Initialize libusb (assuming there's a relevant function exposed)
+    lib.libusb_init(None)
 
-# Initialize libusb (assuming there's a relevant function exposed)
-lib.libusb_init(None)
+    # Start the sniffer
+    lib.sniff(None, 0x451, 0x16B3, 37)
 
-# Start the sniffer
-lib.sniff(None, 0x451, 0x16B3, 37)
+    # Print devices, then release the list
+    lib.print_devices()
+    lib.free_devices()
 
-# Print devices
-lib.print_devices()
\ No newline at end of file
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+import logging
+from threading import Lock
+from typing import Callable, Dict, List, Optional, Iterable
+from radio import RadioModule
+
+logger = logging.getLogger(__name__)
+
+OBJECTIVES = ('coverage', 'duty')
+
+
+class Assignment:
+    """Channels (MHz) one module is responsible for, and the share of its time each gets."""
+
+    def __init__(self, identifier: str, channels: List[float], dwell: Dict[float, float]):
+        self.identifier = identifier
+        self.channels = channels
+        self.dwell = dwell
+
+    def __repr__(self):
+        return f"Assignment(identifier={self.identifier}, channels={len(self.channels)})"
+
+    def to_dict(self) -> Dict:
+        return {"identifier": self.identifier, "channels": self.channels,
+                "dwell": {str(channel): share for channel, share in self.dwell.items()}}
+
+
+class BandAllocator:
+    """Splits channels between radio modules so no two watch the same channel.
+
+    'coverage' spreads every plan channel over the modules able to tune it,
+    balancing how long each module needs to visit its share (weighted
+    occupancy over the module's hop rate). 'duty' gives the target channels
+    to as many different modules as possible so each target gets the largest
+    share of a radio's time; modules left over cover the rest of the plan.
+    Occupancy weights both which channels a busy module keeps and how its
+    dwell time is split.
+    """
+
+    def __init__(self, objective: str = 'coverage', targets: Optional[Iterable[float]] = None):
+        self.modules: Dict[str, RadioModule] = {}
+        self.failed: set = set()
+        self.plan: List[float] = []
+        self.custom_plan = False
+        self.occupancy: Dict[float, float] = {}
+        self.assignments: Dict[str, Assignment] = {}
+        self.uncovered: List[float] = []
+        self.listeners: List[Callable[[Dict[str, Assignment]], None]] = []
+        self._lock = Lock()
+        self.set_objective(objective, targets)
+
+    def set_objective(self, objective: str, targets: Optional[Iterable[float]] = None):
+        if objective not in OBJECTIVES:
+            raise ValueError(f"Objective must be one of {', '.join(OBJECTIVES)}")
+        if objective == 'duty' and not targets:
+            raise ValueError("The duty objective needs target channels")
+        self.objective = objective
+        self.targets = sorted(set(targets or []))
+
+    def set_modules(self, modules: Iterable[RadioModule]):
+        with self._lock:
+            self.modules = {module.identifier: module for module in modules}
+            self.failed &= set(self.modules)
+            if not self.custom_plan:
+                self.plan = self._default_plan()
+        self.rebalance()
+
+    def set_plan(self, channels: Optional[Iterable[float]]):
+        """Channels to allocate; None goes back to every channel the modules support by default."""
+        with self._lock:
+            self.custom_plan = channels is not None
+            self.plan = sorted(set(channels)) if channels is not None else self._default_plan()
+        self.rebalance()
+
+    def update_occupancy(self, occupancy: Dict[float, float]):
+        with self._lock:
+            self.occupancy.update(occupancy)
+        self.rebalance()
+
+    def module_failed(self, identifier: str):
+        logger.warning(f"Radio module {identifier} failed, reallocating its channels")
+        with self._lock:
+            self.failed.add(identifier)
+        self.rebalance()
+
+    def reset_failures(self):
+        with self._lock:
+            if not self.failed:
+                return
+            self.failed.clear()
+        self.rebalance()
+
+    def _default_plan(self) -> List[float]:
+        channels = set()
+        for module in self.modules.values():
+            channels.update(module.default_channels())
+        return sorted(channels)
+
+    def _weight(self, channel: float) -> float:
+        # Unobserved channels still get a nominal share
+        return max(self.occupancy.get(channel, 1.0), 0.01)
+
+    def _cost(self, module: RadioModule, channel: float) -> float:
+        # Time the module spends on the channel, relative to how fast it can hop
+        return self._weight(channel) / (module.capabilities.max_hop_rate or 1.0)
+
+    def _assign(self, channels: List[float], modules: List[RadioModule], load: Dict[str, float],
+                chosen: Dict[str, List[float]], spread: bool) -> List[float]:
+        uncovered = []
+        capable = {channel: [module for module in modules if module.capabilities.covers(channel)]
+                   for channel in channels}
+        # Most constrained channels first, then the busiest
+        for channel in sorted(channels, key=lambda c: (len(capable[c]), -self._weight(c))):
+            candidates = capable[channel]
+            if not candidates:
+                uncovered.append(channel)
+                continue
+            if spread:
+                # Prefer a module that has no target yet, so targets do not share a radio
+                candidates = [module for module in candidates if not chosen[module.identifier]] or candidates
+            module = min(candidates, key=lambda m: load[m.identifier] + self._cost(m, channel))
+            load[module.identifier] += self._cost(module, channel)
+            chosen[module.identifier].append(channel)
+        return uncovered
+
+    def rebalance(self) -> Dict[str, Assignment]:
+        with self._lock:
+            modules = [module for identifier, module in self.modules.items() if identifier not in self.failed]
+            load = {module.identifier: 0.0 for module in modules}
+            chosen: Dict[str, List[float]] = {module.identifier: [] for module in modules}
+            if self.objective == 'duty':
+                uncovered = self._assign(self.targets, modules, load, chosen, spread=True)
+                idle = [module for module in modules if not chosen[module.identifier]]
+                rest = [channel for channel in self.plan if channel not in set(self.targets)]
+                uncovered += self._assign(rest, idle, load, chosen, spread=False)
+            else:
+                uncovered = self._assign(self.plan, modules, load, chosen, spread=False)
+
+            assignments = {}
+            for identifier, channels in chosen.items():
+                channels.sort()
+                total = sum(self._weight(channel) for channel in channels)
+                dwell = {channel: self._weight(channel) / total for channel in channels}
+                assignments[identifier] = Assignment(identifier, channels, dwell)
+            self.assignments = assignments
+            self.uncovered = uncovered
+            listeners = list(self.listeners)
+
+        if uncovered:
+            logger.info(f"{len(uncovered)} channel(s) not covered by any working module")
+        for listener in listeners:
+            listener(assignments)
+        return assignments
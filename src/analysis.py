@@ -0,0 +1,550 @@
+import csv
+import json
+import logging
+import mmap
+import os
+import sqlite3
+import struct
+from contextlib import closing
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+from numpy.lib.format import open_memmap
+
+from corpus import RECORD
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MEMORY_BUDGET = 256 * 1024 * 1024  # bytes of working set per analysis pass
+OCCUPIED_DBM = -90.0
+DEFAULT_TRACK_BIN = 10.0  # s
+DEFAULT_BURST_GAP = 0.05  # s between packets of one burst
+
+# observation kinds as stored in the kind column
+KINDS = {'rssi': 1, 'device': 2}
+RSSI, DEVICE = KINDS['rssi'], KINDS['device']
+
+OBSERVATION_COLUMNS = {'timestamp': np.float64, 'kind': np.uint8, 'identifier': np.int32,
+                       'frequency': np.float64, 'rssi': np.float32}
+PCAP_COLUMNS = {'timestamp': np.float64, 'length': np.uint32}
+CORPUS_COLUMNS = {'payload_len': np.uint32, 'response_len': np.uint32, 'latency': np.float32}
+
+# (byte order, timestamp fraction unit) by pcap magic number
+PCAP_MAGIC = {0xa1b2c3d4: ('<', 1e-6), 0xd4c3b2a1: ('>', 1e-6), 0xa1b23c4d: ('<', 1e-9), 0x4d3cb2a1: ('>', 1e-9)}
+PCAP_HEADER_SIZE = 24
+
+# Latency histogram for fuzz logs: 1 us to 100 s in log steps, so percentiles need no sort
+LATENCY_BINS = np.logspace(-6, 2, 161)
+
+PYTHON_ROW_BYTES = 512
+
+
+class ColumnStore:
+    """A recording converted to one .npy file per column, opened memory-mapped.
+
+    Conversion happens once per source file; later runs reuse the columns
+    as long as the source's size and mtime are unchanged.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        with open(os.path.join(directory, 'meta.json'), 'r') as file:
+            self.meta = json.load(file)
+        self.rows = self.meta['rows']
+        self.columns = {name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode='r')
+                        for name in self.meta['columns']}
+
+    def chunks(self, chunk_rows: int) -> Iterator[Dict[str, np.ndarray]]:
+        for start in range(0, self.rows, chunk_rows):
+            yield {name: column[start:start + chunk_rows] for name, column in self.columns.items()}
+
+    @staticmethod
+    def is_current(directory: str, source: str) -> bool:
+        try:
+            with open(os.path.join(directory, 'meta.json'), 'r') as file:
+                meta = json.load(file)
+        except (FileNotFoundError, ValueError):
+            return False
+        stat = os.stat(source)
+        return meta.get('source_size') == stat.st_size and meta.get('source_mtime') == stat.st_mtime
+
+    @staticmethod
+    def create(directory: str, source: str, columns: Dict[str, Any], rows: int) -> Dict[str, np.memmap]:
+        os.makedirs(directory, exist_ok=True)
+        # meta.json is written last, by finish(), so an interrupted conversion is redone
+        if os.path.exists(os.path.join(directory, 'meta.json')):
+            os.unlink(os.path.join(directory, 'meta.json'))
+        return {name: open_memmap(os.path.join(directory, f"{name}.npy"), mode='w+', dtype=dtype, shape=(rows,))
+                for name, dtype in columns.items()}
+
+    @staticmethod
+    def finish(directory: str, source: str, columns: Dict[str, np.memmap], **extra):
+        for column in columns.values():
+            column.flush()
+        stat = os.stat(source)
+        meta = {"source": os.path.abspath(source), "source_size": stat.st_size, "source_mtime": stat.st_mtime,
+                "rows": len(next(iter(columns.values()))) if columns else 0, "columns": list(columns), **extra}
+        with open(os.path.join(directory, 'meta.json'), 'w') as file:
+            json.dump(meta, file)
+
+
+def _cache_dir(cache_root: str, source: str) -> str:
+    return os.path.join(cache_root, os.path.basename(source) + '.columns')
+
+
+def convert_observations(db_path: str, cache_root: str, chunk_rows: int) -> ColumnStore:
+    """Columns of an observations.db (see observations.py), streamed out of SQLite a chunk at a time."""
+    directory = _cache_dir(cache_root, db_path)
+    if ColumnStore.is_current(directory, db_path):
+        return ColumnStore(directory)
+    with closing(sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)) as conn:
+        # Rows recorded while converting wait for the next run
+        rows, last_id = conn.execute('SELECT COUNT(*), COALESCE(MAX(id), 0) FROM observations').fetchone()
+        columns = ColumnStore.create(directory, db_path, OBSERVATION_COLUMNS, rows)
+        identifiers: Dict[str, int] = {}
+        cursor = conn.execute('SELECT timestamp, kind, identifier, frequency, rssi FROM observations '
+                              'WHERE id <= ? ORDER BY id', (last_id,))
+        position = 0
+        while True:
+            batch = cursor.fetchmany(chunk_rows)
+            if not batch:
+                break
+            end = position + len(batch)
+            timestamps, kinds, names, frequencies, rssis = zip(*batch)
+            columns['timestamp'][position:end] = timestamps
+            columns['kind'][position:end] = [KINDS.get(kind, 0) for kind in kinds]
+            columns['identifier'][position:end] = [identifiers.setdefault(name, len(identifiers)) for name in names]
+            # None (no frequency or RSSI reported) becomes NaN
+            columns['frequency'][position:end] = np.array(frequencies, dtype=np.float64)
+            columns['rssi'][position:end] = np.array(rssis, dtype=np.float32)
+            position = end
+    ColumnStore.finish(directory, db_path, columns, identifiers=sorted(identifiers, key=identifiers.get))
+    logger.info(f"Converted {rows} observations from {db_path}")
+    return ColumnStore(directory)
+
+
+def _walk_records(buffer, start: int, header: struct.Struct, skip) -> Iterator[Tuple[int, tuple]]:
+    # Variable-length records: only the headers are read, straight from the mapping
+    offset = start
+    end = len(buffer)
+    while offset + header.size <= end:
+        fields = header.unpack_from(buffer, offset)
+        yield offset, fields
+        offset += header.size + skip(fields)
+
+
+def _convert_records(path: str, cache_root: str, chunk_rows: int, start: int, header: struct.Struct, skip,
+                     columns_spec: Dict[str, Any], values, **extra) -> ColumnStore:
+    directory = _cache_dir(cache_root, path)
+    if ColumnStore.is_current(directory, path):
+        return ColumnStore(directory)
+    with open(path, 'rb') as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+        # Two passes over the headers, so the columns can be sized up front instead of grown in memory
+        rows = sum(1 for _ in _walk_records(buffer, start, header, skip))
+        columns = ColumnStore.create(directory, path, columns_spec, rows)
+        pending: Dict[str, List] = {name: [] for name in columns_spec}
+        position = 0
+        for count, (_, fields) in enumerate(_walk_records(buffer, start, header, skip), 1):
+            for name, value in zip(columns_spec, values(fields)):
+                pending[name].append(value)
+            if count % chunk_rows == 0:
+                position = _flush_pending(columns, pending, position)
+        _flush_pending(columns, pending, position)
+    ColumnStore.finish(directory, path, columns, **extra)
+    logger.info(f"Converted {rows} records from {path}")
+    return ColumnStore(directory)
+
+
+def _flush_pending(columns: Dict[str, np.memmap], pending: Dict[str, List], position: int) -> int:
+    count = 0
+    for name, values in pending.items():
+        count = len(values)
+        columns[name][position:position + count] = values
+        values.clear()
+    return position + count
+
+
+def convert_pcap(path: str, cache_root: str, chunk_rows: int) -> ColumnStore:
+    """Packet timestamps and lengths of a libpcap capture."""
+    with open(path, 'rb') as file:
+        magic = struct.unpack('<I', file.read(4))[0]
+    if magic not in PCAP_MAGIC:
+        raise ValueError(f"{path} is not a pcap file")
+    order, unit = PCAP_MAGIC[magic]
+    header = struct.Struct(f"{order}IIII")  # seconds, fraction, captured length, original length
+    return _convert_records(path, cache_root, chunk_rows, PCAP_HEADER_SIZE, header, lambda fields: fields[2],
+                            PCAP_COLUMNS, lambda fields: (fields[0] + fields[1] * unit, fields[3]))
+
+
+def convert_corpus(path: str, cache_root: str, chunk_rows: int) -> ColumnStore:
+    """Payload length, response length and latency of every case in a corpus.log (see corpus.py)."""
+    return _convert_records(path, cache_root, chunk_rows, 0, RECORD, lambda fields: fields[2] + fields[3],
+                            CORPUS_COLUMNS, lambda fields: (fields[2], fields[3], fields[4]))
+
+
+def _percentiles(values: np.ndarray, prefix: str) -> Dict[str, float]:
+    if not len(values):
+        return {f"{prefix}_mean": np.nan, f"{prefix}_p50": np.nan, f"{prefix}_p95": np.nan, f"{prefix}_max": np.nan}
+    p50, p95 = np.percentile(values, [50, 95])
+    return {f"{prefix}_mean": float(values.mean()), f"{prefix}_p50": float(p50), f"{prefix}_p95": float(p95),
+            f"{prefix}_max": float(values.max())}
+
+
+class Occupancy:
+    """Per channel: RSSI samples, share at or above the threshold, mean and peak RSSI, and bursts.
+
+    A burst is a run of consecutive occupied samples on a channel; it lasts
+    from its first occupied sample until the channel is next seen clear.
+    """
+
+    def __init__(self, threshold: float = OCCUPIED_DBM):
+        self.threshold = threshold
+        self.stats: Dict[float, np.ndarray] = {}  # frequency -> [samples, occupied, rssi sum, peak]
+        self.bursts: Dict[float, List[np.ndarray]] = {}
+        self.open_bursts: Dict[float, float] = {}  # frequency -> start of a burst still running
+
+    def update(self, chunk: Dict[str, np.ndarray]):
+        mask = (chunk['kind'] == RSSI) & ~np.isnan(chunk['frequency']) & ~np.isnan(chunk['rssi'])
+        if not mask.any():
+            return
+        frequency = chunk['frequency'][mask]
+        rssi = chunk['rssi'][mask].astype(np.float64)
+        timestamp = chunk['timestamp'][mask]
+        occupied = rssi >= self.threshold
+
+        channels, index = np.unique(frequency, return_inverse=True)
+        samples = np.bincount(index, minlength=len(channels))
+        hits = np.bincount(index, weights=occupied, minlength=len(channels))
+        sums = np.bincount(index, weights=rssi, minlength=len(channels))
+        peaks = np.full(len(channels), -np.inf)
+        np.maximum.at(peaks, index, rssi)
+        for i, channel in enumerate(channels.tolist()):
+            stats = self.stats.setdefault(channel, np.array([0.0, 0.0, 0.0, -np.inf]))
+            stats[:3] += (samples[i], hits[i], sums[i])
+            stats[3] = max(stats[3], peaks[i])
+
+        # Group by channel, keeping time order within each, then find runs of occupied samples
+        order = np.argsort(index, kind='stable')
+        index, timestamp, occupied = index[order], timestamp[order], occupied[order]
+        group_start = np.ones(len(index), dtype=bool)
+        group_start[1:] = index[1:] != index[:-1]
+        group_end = np.ones(len(index), dtype=bool)
+        group_end[:-1] = group_start[1:]
+        previous = np.zeros(len(index), dtype=bool)
+        previous[1:] = occupied[:-1]
+        previous &= ~group_start
+        following = np.zeros(len(index), dtype=bool)
+        following[:-1] = occupied[1:]
+        following &= ~group_end
+        starts = np.flatnonzero(occupied & ~previous)
+        ends = np.flatnonzero(occupied & ~following)
+        start_times = timestamp[starts]
+        closed = ~group_end[ends]
+        clear_times = np.full(len(ends), np.nan)
+        clear_times[closed] = timestamp[ends[closed] + 1]
+
+        # Bursts running across the chunk boundary
+        first_rows = np.flatnonzero(group_start)
+        run_at_first = dict(zip(starts.tolist(), range(len(starts))))
+        for row in first_rows.tolist():
+            channel = channels[index[row]]
+            carried = self.open_bursts.pop(channel, None)
+            if carried is None:
+                continue
+            if occupied[row]:
+                start_times[run_at_first[row]] = carried
+            else:
+                self._add_bursts(channel, np.array([timestamp[row] - carried]))
+        for run in np.flatnonzero(~closed).tolist():
+            self.open_bursts[channels[index[ends[run]]]] = start_times[run]
+        durations = clear_times - start_times
+        run_channels = index[starts]
+        for i in np.unique(run_channels[closed]).tolist():
+            self._add_bursts(channels[i], durations[closed & (run_channels == i)])
+
+    def _add_bursts(self, channel: float, durations: np.ndarray):
+        self.bursts.setdefault(channel, []).append(durations.astype(np.float32))
+
+    def table(self) -> List[Dict[str, Any]]:
+        rows = []
+        for channel, (samples, hits, total, peak) in sorted(self.stats.items()):
+            bursts = np.concatenate(self.bursts.get(channel, [np.empty(0, np.float32)]))
+            rows.append({"frequency": channel, "samples": int(samples), "occupancy": hits / samples,
+                         "mean_rssi": total / samples, "peak_rssi": peak, "bursts": len(bursts),
+                         **_percentiles(bursts, "burst_s")})
+        return rows
+
+
+class RssiTracks:
+    """Per device, RSSI per time bin: sightings, mean and max, for plotting how a device came and went."""
+
+    def __init__(self, identifiers: List[str], bin_seconds: float = DEFAULT_TRACK_BIN):
+        self.identifiers = identifiers
+        self.bin_seconds = bin_seconds
+        self.origin: Optional[float] = None
+        self.keys = np.empty(0, np.int64)
+        self.counts = np.empty(0, np.int64)
+        self.sums = np.empty(0, np.float64)
+        self.maxima = np.empty(0, np.float64)
+
+    def update(self, chunk: Dict[str, np.ndarray]):
+        mask = (chunk['kind'] == DEVICE) & ~np.isnan(chunk['rssi'])
+        if not mask.any():
+            return
+        timestamp = chunk['timestamp'][mask]
+        if self.origin is None:
+            self.origin = float(timestamp[0])
+        # Bins count from the first sighting, so any bin width fits in 32 bits
+        bins = ((timestamp - self.origin) // self.bin_seconds).astype(np.int64)
+        keys = (chunk['identifier'][mask].astype(np.int64) << 32) | bins
+        rssi = chunk['rssi'][mask].astype(np.float64)
+        self._merge(keys, np.ones(len(keys), np.int64), rssi, rssi)
+
+    def _merge(self, keys, counts, sums, maxima):
+        keys = np.concatenate([self.keys, keys])
+        unique, index = np.unique(keys, return_inverse=True)
+        self.counts = np.bincount(index, weights=np.concatenate([self.counts, counts]),
+                                  minlength=len(unique)).astype(np.int64)
+        self.sums = np.bincount(index, weights=np.concatenate([self.sums, sums]), minlength=len(unique))
+        merged = np.full(len(unique), -np.inf)
+        np.maximum.at(merged, index, np.concatenate([self.maxima, maxima]))
+        self.keys, self.maxima = unique, merged
+
+    def table(self) -> List[Dict[str, Any]]:
+        devices = (self.keys >> 32).tolist()
+        starts = ((self.keys & 0xFFFFFFFF) * self.bin_seconds + (self.origin or 0.0)).tolist()
+        means = (self.sums / np.maximum(self.counts, 1)).tolist()
+        return [{"device": self.identifiers[device], "bin_start": start, "sightings": count, "mean_rssi": mean,
+                 "max_rssi": maximum}
+                for device, start, count, mean, maximum in zip(devices, starts, self.counts.tolist(), means,
+                                                                self.maxima.tolist())]
+
+
+class HopStats:
+    """Per device: sightings, frequency changes between consecutive sightings, and time spent between them."""
+
+    def __init__(self, identifiers: List[str]):
+        self.identifiers = identifiers
+        count = len(identifiers)
+        self.sightings = np.zeros(count, np.int64)
+        self.hops = np.zeros(count, np.int64)
+        self.first_seen = np.full(count, np.nan)
+        self.last_seen = np.full(count, np.nan)
+        self.last_frequency = np.full(count, np.nan)
+        self.last_hop = np.full(count, np.nan)
+        self.dwell_sum = np.zeros(count)
+        self.dwell_count = np.zeros(count, np.int64)
+        self.min_dwell = np.full(count, np.inf)
+        self.channels: Dict[int, set] = {}
+
+    def update(self, chunk: Dict[str, np.ndarray]):
+        mask = (chunk['kind'] == DEVICE) & ~np.isnan(chunk['frequency'])
+        if not mask.any():
+            return
+        device = chunk['identifier'][mask]
+        order = np.argsort(device, kind='stable')
+        device, timestamp, frequency = device[order], chunk['timestamp'][mask][order], chunk['frequency'][mask][order]
+        first = np.ones(len(device), dtype=bool)
+        first[1:] = device[1:] != device[:-1]
+        last = np.ones(len(device), dtype=bool)
+        last[:-1] = first[1:]
+
+        previous = np.empty(len(device))
+        previous[1:] = frequency[:-1]
+        previous[first] = self.last_frequency[device[first]]
+        hop = ~np.isnan(previous) & (frequency != previous)
+        self.sightings += np.bincount(device, minlength=len(self.sightings))
+        self.hops += np.bincount(device[hop], minlength=len(self.hops))
+        self.first_seen[device[first]] = np.fmin(self.first_seen[device[first]], timestamp[first])
+        self.last_seen[device[last]] = timestamp[last]
+        self.last_frequency[device[last]] = frequency[last]
+
+        hop_device, hop_time = device[hop], timestamp[hop]
+        if len(hop_device):
+            hop_first = np.ones(len(hop_device), dtype=bool)
+            hop_first[1:] = hop_device[1:] != hop_device[:-1]
+            previous_hop = np.empty(len(hop_device))
+            previous_hop[1:] = hop_time[:-1]
+            previous_hop[hop_first] = self.last_hop[hop_device[hop_first]]
+            dwell = hop_time - previous_hop
+            valid = ~np.isnan(dwell)
+            self.dwell_sum += np.bincount(hop_device[valid], weights=dwell[valid], minlength=len(self.dwell_sum))
+            self.dwell_count += np.bincount(hop_device[valid], minlength=len(self.dwell_count))
+            np.minimum.at(self.min_dwell, hop_device[valid], dwell[valid])
+            hop_last = np.ones(len(hop_device), dtype=bool)
+            hop_last[:-1] = hop_first[1:]
+            self.last_hop[hop_device[hop_last]] = hop_time[hop_last]
+
+        pairs = np.unique(np.stack([device.astype(np.float64), frequency]), axis=1)
+        for device_, frequency_ in pairs.T.tolist():
+            self.channels.setdefault(int(device_), set()).add(frequency_)
+
+    def table(self) -> List[Dict[str, Any]]:
+        rows = []
+        for device in np.flatnonzero(self.sightings).tolist():
+            span = self.last_seen[device] - self.first_seen[device]
+            dwells = self.dwell_count[device]
+            rows.append({"device": self.identifiers[device], "sightings": int(self.sightings[device]),
+                         "channels": len(self.channels.get(device, ())), "hops": int(self.hops[device]),
+                         "span_s": span, "hop_rate": self.hops[device] / span if span > 0 else 0.0,
+                         "mean_dwell_s": self.dwell_sum[device] / dwells if dwells else np.nan,
+                         "min_dwell_s": self.min_dwell[device] if dwells else np.nan})
+        return rows
+
+
+class PacketBursts:
+    """Bursts in a capture: packets no more than gap seconds apart."""
+
+    def __init__(self, name: str, gap: float = DEFAULT_BURST_GAP):
+        self.name = name
+        self.gap = gap
+        self.packets = 0
+        self.bytes = 0
+        self.first: Optional[float] = None
+        self.last: Optional[float] = None
+        self.burst_start: Optional[float] = None
+        self.burst_packets = 0
+        self.durations: List[np.ndarray] = []
+        self.sizes: List[np.ndarray] = []
+
+    def update(self, chunk: Dict[str, np.ndarray]):
+        timestamp = chunk['timestamp']
+        if not len(timestamp):
+            return
+        self.packets += len(timestamp)
+        self.bytes += int(chunk['length'].sum(dtype=np.int64))
+        if self.first is None:
+            self.first = self.burst_start = float(timestamp[0])
+        # Boundaries between bursts, counting the gap from the previous chunk's last packet
+        previous = np.empty(len(timestamp))
+        previous[0] = self.last if self.last is not None else timestamp[0]
+        previous[1:] = timestamp[:-1]
+        breaks = np.flatnonzero(timestamp - previous > self.gap)
+        if len(breaks):
+            starts = np.concatenate([[self.burst_start], timestamp[breaks]])
+            ends = previous[breaks]
+            counts = np.diff(np.concatenate([[0], breaks]))
+            counts[0] += self.burst_packets
+            self.durations.append((ends - starts[:-1]).astype(np.float32))
+            self.sizes.append(counts.astype(np.int32))
+            self.burst_start = float(starts[-1])
+            self.burst_packets = len(timestamp) - breaks[-1]
+        else:
+            self.burst_packets += len(timestamp)
+        self.last = float(timestamp[-1])
+
+    def table(self) -> List[Dict[str, Any]]:
+        durations = np.concatenate(self.durations + [np.empty(0, np.float32)])
+        sizes = np.concatenate(self.sizes + [np.empty(0, np.int32)])
+        if self.burst_start is not None:
+            durations = np.append(durations, self.last - self.burst_start)
+            sizes = np.append(sizes, self.burst_packets)
+        span = (self.last - self.first) if self.packets else 0.0
+        return [{"capture": self.name, "packets": self.packets, "bytes": self.bytes, "span_s": span,
+                 "packets_per_s": self.packets / span if span > 0 else np.nan, "bursts": len(durations),
+                 "packets_per_burst": float(sizes.mean()) if len(sizes) else np.nan,
+                 **_percentiles(durations, "burst_s")}]
+
+
+class FuzzStats:
+    """Cases kept in a corpus by response size, with latency percentiles from a fixed histogram."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.histogram = np.zeros(len(LATENCY_BINS) + 1, np.int64)
+        self.by_size: Dict[int, np.ndarray] = {}  # response length bucket -> [cases, latency sum]
+
+    def update(self, chunk: Dict[str, np.ndarray]):
+        latency = chunk['latency'].astype(np.float64)
+        self.histogram += np.bincount(np.searchsorted(LATENCY_BINS, latency), minlength=len(self.histogram))
+        # Power-of-two buckets, as corpus fingerprints use
+        buckets = np.where(chunk['response_len'] > 0, np.floor(np.log2(np.maximum(chunk['response_len'], 1))) + 1,
+                           0).astype(np.int64)
+        cases = np.bincount(buckets)
+        sums = np.bincount(buckets, weights=latency)
+        for bucket in np.flatnonzero(cases).tolist():
+            self.by_size.setdefault(bucket, np.zeros(2))[:] += (cases[bucket], sums[bucket])
+
+    def _latency_percentile(self, q: float) -> float:
+        total = self.histogram.sum()
+        if not total:
+            return np.nan
+        index = int(np.searchsorted(np.cumsum(self.histogram), q * total))
+        return float(LATENCY_BINS[min(index, len(LATENCY_BINS) - 1)])
+
+    def table(self) -> List[Dict[str, Any]]:
+        return [{"corpus": self.name, "response_bytes_up_to": (1 << bucket) - 1, "cases": int(cases),
+                 "mean_latency_s": total / cases}
+                for bucket, (cases, total) in sorted(self.by_size.items())]
+
+    def summary(self) -> Dict[str, Any]:
+        return {"cases": int(self.histogram.sum()), "latency_p50_s": self._latency_percentile(0.5),
+                "latency_p95_s": self._latency_percentile(0.95), "latency_p99_s": self._latency_percentile(0.99)}
+
+
+def _conversion_rows(memory_budget: int) -> int:
+    # Rows on their way out of SQLite or a record walk are Python objects, some hundreds of bytes each
+    return max(1024, memory_budget // PYTHON_ROW_BYTES)
+
+
+def _chunk_rows(memory_budget: int, columns: Dict[str, Any]) -> int:
+    # Sorting and masking make a handful of temporaries per column
+    row_bytes = sum(np.dtype(dtype).itemsize for dtype in columns.values()) * 8
+    return max(1024, memory_budget // row_bytes)
+
+
+def analyze(output_dir: str, observations: Optional[str] = None, captures: Tuple[str, ...] = (),
+            corpus: Optional[str] = None, memory_budget: int = DEFAULT_MEMORY_BUDGET,
+            threshold: float = OCCUPIED_DBM, track_bin: float = DEFAULT_TRACK_BIN,
+            burst_gap: float = DEFAULT_BURST_GAP) -> Dict[str, Any]:
+    """Summary tables for a session, written to output_dir as CSV plus summary.json.
+
+    Sources are converted to memory-mapped columns under output_dir/columns
+    and then read in chunks sized to memory_budget, so sessions larger than
+    memory take as much RAM as small ones.
+    """
+    cache_root = os.path.join(output_dir, 'columns')
+    tables: Dict[str, List[Dict[str, Any]]] = {}
+    summary: Dict[str, Any] = {}
+    if observations:
+        chunk_rows = _chunk_rows(memory_budget, OBSERVATION_COLUMNS)
+        store = convert_observations(observations, cache_root, _conversion_rows(memory_budget))
+        identifiers = store.meta['identifiers']
+        passes = [Occupancy(threshold), RssiTracks(identifiers, track_bin), HopStats(identifiers)]
+        for chunk in store.chunks(chunk_rows):
+            for analysis in passes:
+                analysis.update(chunk)
+        tables['occupancy'], tables['rssi_tracks'], tables['hops'] = (analysis.table() for analysis in passes)
+        summary['observations'] = {"rows": store.rows, "devices": len(identifiers),
+                                   "channels": len(tables['occupancy'])}
+    if captures:
+        chunk_rows = _chunk_rows(memory_budget, PCAP_COLUMNS)
+        tables['capture_bursts'] = []
+        for path in captures:
+            bursts = PacketBursts(os.path.basename(path), burst_gap)
+            for chunk in convert_pcap(path, cache_root, _conversion_rows(memory_budget)).chunks(chunk_rows):
+                bursts.update(chunk)
+            tables['capture_bursts'] += bursts.table()
+    if corpus:
+        chunk_rows = _chunk_rows(memory_budget, CORPUS_COLUMNS)
+        log_path = os.path.join(corpus, 'corpus.log') if os.path.isdir(corpus) else corpus
+        stats = FuzzStats(log_path)
+        for chunk in convert_corpus(log_path, cache_root, _conversion_rows(memory_budget)).chunks(chunk_rows):
+            stats.update(chunk)
+        tables['fuzz_responses'] = stats.table()
+        summary['fuzz'] = stats.summary()
+    for name, rows in tables.items():
+        export_table(os.path.join(output_dir, f"{name}.csv"), rows)
+    summary['tables'] = {name: len(rows) for name, rows in tables.items()}
+    with open(os.path.join(output_dir, 'summary.json'), 'w') as file:
+        json.dump(summary, file, indent=2)
+    return summary
+
+
+def export_table(path: str, rows: List[Dict[str, Any]]):
+    with open(path, 'w', newline='') as file:
+        if not rows:
+            return
+        writer = csv.DictWriter(file, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
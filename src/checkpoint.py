@@ -0,0 +1,93 @@
+import json
+import logging
+import os
+import time
+from threading import Event, Thread
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHECKPOINT_PATH = os.path.join(os.path.expanduser('~'), '.wardriver', 'checkpoint.json')
+DEFAULT_CHECKPOINT_INTERVAL = 5.0
+CHECKPOINT_VERSION = 1
+
+
+def json_safe(values: Dict[str, Any]) -> Dict[str, Any]:
+    """The entries of values that survive a JSON round trip, e.g. config without open handles."""
+    safe = {}
+    for key, value in values.items():
+        try:
+            json.dumps(value)
+        except (TypeError, ValueError):
+            continue
+        safe[key] = value
+    return safe
+
+
+def load_checkpoint(path: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(path, 'r') as file:
+            state = json.load(file)
+    except FileNotFoundError:
+        return None
+    if state.get('version') != CHECKPOINT_VERSION:
+        raise ValueError(f"Unsupported checkpoint version {state.get('version')} in {path}")
+    return state
+
+
+class Checkpointer:
+    """Writes snapshot() to path every interval seconds, atomically, and only when it changed.
+
+    The state is progress counters rather than data (payloads are derived
+    from the seed and case index, corpus cases are already on disk), so a
+    snapshot is a few hundred bytes and cheap to take from a running session.
+    """
+
+    def __init__(self, path: str, snapshot: Callable[[], Dict[str, Any]],
+                 interval: float = DEFAULT_CHECKPOINT_INTERVAL, finished: Optional[Callable[[], bool]] = None):
+        self.path = path
+        self.snapshot = snapshot
+        self.interval = interval
+        self.finished = finished
+        self.saves = 0
+        self._last: Optional[str] = None
+        self._stop = Event()
+        self._thread: Optional[Thread] = None
+
+    def start(self):
+        self._stop.clear()
+        self._thread = Thread(target=self._run, name='checkpoint', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread and self._thread.is_alive():
+            self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.save()
+            if self.finished and self.finished():
+                return
+        self.save()
+
+    def save(self) -> bool:
+        state = self.snapshot()
+        state['version'] = CHECKPOINT_VERSION
+        # saved_at changes every time, so compare without it
+        data = json.dumps(state, sort_keys=True)
+        if data == self._last:
+            return False
+        state['saved_at'] = time.time()
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w') as file:
+            json.dump(state, file)
+            file.flush()
+            # Survive power loss, not just a crash: the rename must not land before the data
+            os.fsync(file.fileno())
+        os.replace(tmp_path, self.path)
+        self._last = data
+        self.saves += 1
+        logger.debug(f"Checkpoint written to {self.path}")
+        return True
@@ -1,16 +1,71 @@
 #!/usr/bin/env python
 import json
 import logging
+import os
+import time
 import click
-from blessed import Terminal
 from wardriver import WardriverManager
+from inventory import DEFAULT_INVENTORY_PATH
+from corpus import DEFAULT_CORPUS_PATH
+from checkpoint import DEFAULT_CHECKPOINT_PATH
+from observations import DEFAULT_OBSERVATIONS_PATH
+import tracing
+import profiling
+from daemon import DaemonClient, DaemonError, WardriverDaemon, execute
+from coordinator import (DEFAULT_COORDINATOR_PORT, DEFAULT_LEASE_TIMEOUT, Coordinator, CoordinatorClient,
+                         CoordinatorError, Worker)
 
 logger = logging.getLogger(__name__)
-term = Terminal()
 
 @click.group(help="Wardriver CLI")
-def cli():
-    pass
+@click.option("--profile", "profile_dir", type=click.Path(file_okay=False),
+              help="Profile this process while the command runs; stage timings and flamegraph stacks go here")
+@click.pass_context
+def cli(ctx, profile_dir):
+    if profile_dir:
+        profiling.enable()
+        ctx.call_on_close(lambda: _save_profile(profile_dir))
+
+def _save_profile(profile_dir):
+    profiling.disable()
+    profiling.save(profile_dir)
+    click.echo(profiling.format_table(profiling.report()["stages"]), err=True)
+
+def dispatch(command, wait=False, report=None, **params):
+    """Run a command in the wardriver daemon if one is running, otherwise in this process.
+
+    Radio modules run on daemon threads, so with wait an in-process command that
+    starts them stays until they finish (Ctrl-C stops them); report(result) is
+    called first, before the wait.
+    """
+    client = DaemonClient()
+    try:
+        if client.available():
+            result = client.call(command, **params)
+            if report:
+                report(result)
+            return result
+        manager = WardriverManager()
+        result = execute(manager, command, params)
+        if wait and not manager.radio_modules:
+            raise click.ClickException("No radio modules in this process: modules loaded with `load` live in the "
+                                       "daemon, so start it with `daemon` first")
+        if report:
+            report(result)
+        if wait:
+            _wait_for_modules(manager)
+        return result
+    except DaemonError as e:
+        raise click.ClickException(str(e))
+
+def _wait_for_modules(manager):
+    try:
+        while any(module.running for module in manager.radio_modules):
+            time.sleep(0.5)
+    except KeyboardInterrupt:
+        click.echo("Stopping radio modules...", err=True)
+    finally:
+        manager.stop_modules()
 
 @cli.command(name="load")
 @click.option("--config-file", type=click.Path(exists=True), help="Path to the configuration file", required=True)
@@ -18,84 +73,369 @@ def load(config_file):
     """Load radio modules from a configuration file."""
     with open(config_file, 'r') as file:
         configs = json.load(file)
-    
-    manager = WardriverManager()
-    manager.load_radio_modules(configs)
-    click.echo(f"Loaded {len(manager.radio_modules)} radio modules.")
+
+    result = dispatch('load', configs=configs)
+    click.echo(f"Loaded {result['loaded']} radio modules.")
 
 @cli.command(name="configure")
 @click.option("--identifier", required=True, help="Identifier of the radio module to configure")
 @click.option("--mode", required=True, type=click.Choice(['fuzzing', 'jamming']), help="Mode to set")
 @click.option("--attack-type", required=True, type=click.Choice(['targeted', 'selected', 'indiscriminate']), help="Type of attack")
-@click.option("--target", required=False, help="Target for the attack (optional)")
+@click.option("--target", required=False, help="Name of the target for the attack, as found by a scan (optional)")
 def configure(identifier, mode, attack_type, target):
     """Configure a radio module."""
-    manager = WardriverManager()
-    manager.configure_module(identifier, mode, attack_type, target)
+    dispatch('configure', identifier=identifier, mode=mode, attack_type=attack_type, target=target)
     click.echo(f"Configured module {identifier} with mode {mode} and attack type {attack_type}.")
 
 @cli.command(name="run")
-def run():
+@click.option("--checkpoint", type=click.Path(), default=DEFAULT_CHECKPOINT_PATH, show_default=True,
+              help="Where to save progress for `resume`")
+@click.option("--no-checkpoint", is_flag=True, help="Do not save progress")
+def run(checkpoint, no_checkpoint):
     """Run all configured radio modules."""
-    manager = WardriverManager()
-    manager.run_modules()
-    click.echo("Running all radio modules.")
+    dispatch('run', wait=True, report=lambda result: click.echo("Running all radio modules."),
+             checkpoint=None if no_checkpoint else checkpoint)
+
+@cli.command(name="resume")
+@click.option("--checkpoint", type=click.Path(exists=True), default=DEFAULT_CHECKPOINT_PATH, show_default=True,
+              help="Checkpoint written by `run`")
+def resume(checkpoint):
+    """Reopen the radios from a checkpoint and continue from the last case."""
+    def report(result):
+        for module in result['modules']:
+            click.echo(f"Module: {module['identifier']} resumed at case {module['case_index']}")
+
+    try:
+        dispatch('resume', wait=True, report=report, checkpoint=checkpoint)
+    except (FileNotFoundError, ValueError) as e:
+        raise click.ClickException(str(e))
 
 @cli.command(name="scan")
-def scan():
+@click.option("--probe-unknown", is_flag=True, help="Also probe serial ports with unrecognised VID/PID")
+@click.option("--inventory", "inventory_path", type=click.Path(), default=DEFAULT_INVENTORY_PATH, show_default=True,
+              help="Hardware inventory cache")
+@click.option("--no-cache", is_flag=True, help="Ignore the inventory and fully identify every radio")
+def scan(probe_unknown, inventory_path, no_cache):
     """Scan for radio modules."""
-    manager = WardriverManager()
-    modules = manager.scan_drivers()
+    result = dispatch('scan', probe_unknown=probe_unknown, inventory_path=inventory_path, no_cache=no_cache)
+    modules = result['modules']
     click.echo(f"Found {len(modules)} radio modules.")
-    for module in modules:
-        click.echo(f"Module: {module.identifier}")
+    for identifier in modules:
+        click.echo(f"Module: {identifier}")
 
-@cli.command(name="interactive")
-def interactive():
-    """Start interactive CLI."""
+def _format_rate(stats):
+    requested = " ".join(f"{stats[key]:g}{unit}" for key, unit in (('requested_pps', 'pps'), ('requested_bps', 'Bps'))
+                         if stats[key] is not None) or "unlimited"
+    return f"requested={requested} achieved={stats['achieved_pps']:.1f}pps {stats['achieved_bps']:.0f}Bps"
+
+@cli.command(name="rate")
+@click.option("--identifier", required=True, help="Identifier of the radio module")
+@click.option("--target", help="Limit one target (by name) instead of the whole module")
+@click.option("--pps", type=float, help="Packets per second")
+@click.option("--bps", type=float, help="Bytes per second")
+@click.option("--burst-packets", type=float, help="Packets allowed back to back (default 1)")
+@click.option("--burst-bytes", type=float, help="Bytes allowed back to back (default a tenth of a second)")
+@click.option("--unlimited", is_flag=True, help="Remove the limit")
+def rate(identifier, target, pps, bps, burst_packets, burst_bytes, unlimited):
+    """Set or show a module's transmit rate limit and the rate it achieves."""
+    update = unlimited or pps is not None or bps is not None
+    stats = dispatch('rate', identifier=identifier, update=update, pps=pps, bps=bps,
+                     burst_packets=burst_packets, burst_bytes=burst_bytes, target=target)
+    click.echo(f"Module: {identifier} {_format_rate(stats['module'])}")
+    for name, target_stats in stats['targets'].items():
+        click.echo(f"  Target: {name} {_format_rate(target_stats)}")
+
+@cli.command(name="allocate")
+@click.option("--objective", type=click.Choice(['coverage', 'duty']), default='coverage', show_default=True,
+              help="Spread radios over every channel, or maximise time on the target channels")
+@click.option("--target", "targets", type=float, multiple=True, help="Target channel in MHz (duty objective)")
+@click.option("--channel", "channels", type=float, multiple=True, help="Channel plan in MHz (default: all supported)")
+def allocate(objective, targets, channels):
+    """Split channels between the loaded radio modules."""
+    result = dispatch('allocate', objective=objective, targets=list(targets), channels=list(channels) or None)
+    for assignment in result['assignments']:
+        channels = assignment['channels']
+        span = f"{channels[0]:.3f}-{channels[-1]:.3f} MHz" if channels else "idle"
+        click.echo(f"Module: {assignment['identifier']} {len(channels)} channel(s) {span}")
+    if result['uncovered']:
+        click.echo(f"{len(result['uncovered'])} channel(s) not covered by any module.")
+
+@cli.command(name="corpus")
+@click.option("--path", type=click.Path(), default=DEFAULT_CORPUS_PATH, show_default=True, help="Corpus directory")
+@click.option("--minimize", is_flag=True, help="Drop cases made redundant by smaller ones with the same response")
+def corpus(path, minimize):
+    """Show or minimize the fuzz corpus."""
+    from corpus import CorpusStore
+    store = CorpusStore(path)
+    try:
+        if minimize:
+            click.echo(f"Dropped {store.minimize()} redundant cases.")
+        stats = store.stats()
+        click.echo(f"{stats['fingerprints']} distinct responses from {stats['seen']} cases tried "
+                   f"({stats['records']} records).")
+    finally:
+        store.close()
+
+@cli.command(name="status")
+def status():
+    """Show loaded radio modules."""
+    for module in dispatch('status')['modules']:
+        click.echo(f"Module: {module['identifier']} mode={module['mode']} attack={module['attack_type']} "
+                   f"packets_sent={module['packets_sent']} {_format_rate(module['rate'])}")
+
+@cli.command(name="survey")
+def survey():
+    """Scan once with every loaded module."""
+    result = dispatch('survey')
+    if result['gps']:
+        click.echo(f"GPS: {result['gps']['lat']}, {result['gps']['lon']}")
+    for identifier, targets in result['modules'].items():
+        click.echo(f"Module: {identifier} found {len(targets)} devices.")
+        for target in targets:
+            click.echo(f"  {target['name']} rssi={target['rssi']} frequency={target['frequency']}")
+
+@cli.command(name="channels")
+def channels():
+    """Channel activity over the recent window and the time share each channel gets."""
+    result = dispatch('channels')
+    if not result['channels']:
+        click.echo("No RSSI samples yet; run `survey` with a scanning module.")
+    for channel in result['channels']:
+        period = f" period={channel['burst_period']:.2f}s" if channel['burst_period'] else ""
+        click.echo(f"{channel['frequency']:.3f} MHz share={channel['share']:.0%} busy={channel['hit_rate']:.0%} "
+                   f"mean={channel['mean_rssi']:.1f} peak={channel['peak_rssi']:.1f} dBm "
+                   f"bursts={channel['bursts']}{period}")
+
+@cli.command(name="memory")
+def memory():
+    """Memory in use, against the daemon's ceiling, and what each subsystem holds."""
+    report = dispatch('memory')
+    ceiling = f" of {report['ceiling'] / 2 ** 20:.0f} MB" if report['ceiling'] else ""
+    click.echo(f"RSS {report['rss'] / 2 ** 20:.1f} MB{ceiling}, trimmed {report['trims']} time(s)")
+    for name, usage in report['subsystems'].items():
+        click.echo(f"  {name}: {usage['entries']} entries, {usage['evicted']} evicted")
+
+@cli.command(name="trace-dump")
+@click.option("--output", type=click.Path(), required=True, help="Binary trace file to write")
+def trace_dump(output):
+    """Write the running daemon's trace buffers to a file."""
+    result = dispatch('trace', path=os.path.abspath(output))
+    click.echo(f"{result['events']} event(s) written to {result['path']}")
+
+@cli.command(name="trace-text")
+@click.argument("trace_file", type=click.Path(exists=True))
+@click.option("--output", type=click.File('w'), default='-', help="Text output (default stdout)")
+def trace_text(trace_file, output):
+    """Convert a trace dump to one readable line per event, in time order."""
+    try:
+        tracing.to_text(trace_file, output)
+    except ValueError as e:
+        raise click.ClickException(str(e))
+
+@cli.command(name="profile")
+@click.option("--duration", type=float, default=30.0, show_default=True, help="Seconds to profile for")
+@click.option("--output", type=click.Path(file_okay=False), required=True,
+              help="Directory for stages.txt/.json and the stacks.folded and spans.folded flamegraph inputs")
+@click.option("--interval", type=float, default=profiling.DEFAULT_SAMPLE_INTERVAL * 1e3, show_default=True,
+              help="Milliseconds between stack samples")
+def profile(duration, output, interval):
+    """Profile the running session for a while: per-stage timing percentiles and sampled stacks."""
+    if not DaemonClient().available():
+        raise click.ClickException("No daemon running; profile a single command with `cli.py --profile DIR ...`")
+    dispatch('profile', action='start', sample_interval=interval / 1e3)
+    try:
+        time.sleep(duration)
+    finally:
+        dispatch('profile', action='stop')
+    result = dispatch('profile', action='save', path=os.path.abspath(output))
+    click.echo(profiling.format_table(result["stages"]))
+    click.echo(f"{result['samples']} stack sample(s); flamegraph input in {os.path.join(output, 'stacks.folded')}")
+
+@cli.command(name="near")
+@click.option("--lat", type=float, required=True)
+@click.option("--lon", type=float, required=True)
+@click.option("--radius", type=float, default=100.0, show_default=True, help="Metres")
+@click.option("--db", type=click.Path(exists=True), default=DEFAULT_OBSERVATIONS_PATH, show_default=True)
+def near(lat, lon, radius, db):
+    """List devices seen within a radius of a position."""
+    from observations import ObservationStore
+    store = ObservationStore(db)
+    try:
+        for device in store.near(lat, lon, radius):
+            click.echo(f"{device['identifier']} {device['distance']:.0f} m max_rssi={device['max_rssi']} "
+                       f"sightings={device['sightings']}")
+    finally:
+        store.close()
+
+@cli.command(name="heatmap")
+@click.option("--cell", type=float, default=50.0, show_default=True, help="Cell size in metres")
+@click.option("--db", type=click.Path(exists=True), default=DEFAULT_OBSERVATIONS_PATH, show_default=True)
+@click.option("--output", type=click.File('w'), default='-', help="CSV output (default stdout)")
+def heatmap(cell, db, output):
+    """Export observation density and RSSI per grid cell as CSV."""
+    import csv
+    from observations import ObservationStore
+    store = ObservationStore(db)
+    try:
+        cells = store.heatmap(cell)
+    finally:
+        store.close()
+    writer = csv.DictWriter(output, fieldnames=['lat', 'lon', 'count', 'devices', 'mean_rssi', 'max_rssi'])
+    writer.writeheader()
+    writer.writerows(cells)
+
+@cli.command(name="analyze")
+@click.option("--observations", type=click.Path(exists=True), help="observations.db recorded by the daemon")
+@click.option("--capture", "captures", type=click.Path(exists=True), multiple=True, help="pcap capture (repeatable)")
+@click.option("--corpus", type=click.Path(exists=True), help="Corpus directory or corpus.log")
+@click.option("--output", type=click.Path(), required=True, help="Directory for the CSV tables and summary.json")
+@click.option("--memory", type=int, default=256, show_default=True, help="Working memory budget in MB")
+@click.option("--threshold", type=float, default=-90.0, show_default=True, help="RSSI (dBm) counted as occupied")
+@click.option("--track-bin", type=float, default=10.0, show_default=True, help="Seconds per RSSI track point")
+@click.option("--burst-gap", type=float, default=0.05, show_default=True,
+              help="Largest gap (s) between packets of one capture burst")
+def analyze(observations, captures, corpus, output, memory, threshold, track_bin, burst_gap):
+    """Channel occupancy, RSSI tracks, bursts and hop rates for a recorded session."""
+    if not (observations or captures or corpus):
+        raise click.UsageError("Give at least one of --observations, --capture or --corpus")
+    from analysis import analyze as analyze_session
+    os.makedirs(output, exist_ok=True)
+    summary = analyze_session(output, observations, captures, corpus, memory * 1024 * 1024, threshold, track_bin,
+                              burst_gap)
+    for name, rows in summary['tables'].items():
+        click.echo(f"{name}: {rows} rows -> {os.path.join(output, name + '.csv')}")
+    if 'fuzz' in summary:
+        fuzz = summary['fuzz']
+        click.echo(f"Fuzz cases: {fuzz['cases']}, latency p50 {fuzz['latency_p50_s'] * 1000:.1f} ms, "
+                   f"p99 {fuzz['latency_p99_s'] * 1000:.1f} ms")
+
+@cli.command(name="daemon")
+@click.option("--socket", "socket_path", type=click.Path(), help="Control socket path")
+@click.option("--config-file", type=click.Path(exists=True), help="Radio modules to load at startup")
+@click.option("--observations", type=click.Path(), help=f"Store scan results, e.g. {DEFAULT_OBSERVATIONS_PATH}")
+@click.option("--gps", help="NMEA GPS serial port, or a file of recorded sentences, to geotag observations")
+@click.option("--memory-limit", type=float, help="RSS in MB above which scan results and per-target state are "
+                                                 "evicted (default: $WARDRIVER_MEMORY_LIMIT, else none)")
+@click.option("--trace", "trace_path", type=click.Path(),
+              help="Record packet-level trace events; dumped here on a crash, SIGUSR1 or `trace-dump`")
+@click.option("--trace-sample", type=int, default=1, show_default=True, help="Record every Nth event per thread")
+def daemon(socket_path, config_file, observations, gps, memory_limit, trace_path, trace_sample):
+    """Keep radio modules resident and serve CLI commands over a local socket."""
+    logging.basicConfig(level=logging.INFO)
+    wardriver_daemon = WardriverDaemon(socket_path=socket_path)
+    if trace_path:
+        tracing.enable(sample=trace_sample)
+        tracing.install_crash_handler(os.path.abspath(trace_path))
+    if observations:
+        wardriver_daemon.manager.enable_observations(observations, gps)
+    wardriver_daemon.manager.enable_memory_budget(int(memory_limit * 1024 * 1024) if memory_limit else None)
+    if config_file:
+        with open(config_file, 'r') as file:
+            wardriver_daemon.manager.load_radio_modules(json.load(file))
+    try:
+        wardriver_daemon.serve_forever()
+    except DaemonError as e:
+        raise click.ClickException(str(e))
+    except KeyboardInterrupt:
+        pass
+
+@cli.command(name="coordinator")
+@click.option("--campaign", "campaign_file", type=click.Path(exists=True), required=True,
+              help="Campaign file: mode, attack_type, seed, shard_by, cases, shard_size, targets, channels")
+@click.option("--host", default="0.0.0.0", show_default=True)
+@click.option("--port", type=int, default=DEFAULT_COORDINATOR_PORT, show_default=True)
+@click.option("--lease-timeout", type=float, default=DEFAULT_LEASE_TIMEOUT, show_default=True,
+              help="Seconds without a heartbeat before a worker's shard is handed to another")
+@click.option("--token", envvar="WARDRIVER_CAMPAIGN_TOKEN",
+              help="Token workers must present (or WARDRIVER_CAMPAIGN_TOKEN); generated if not given")
+def coordinator(campaign_file, host, port, lease_timeout, token):
+    """Shard a campaign across `worker` processes on this or other hosts."""
+    logging.basicConfig(level=logging.INFO)
+    with open(campaign_file, 'r') as file:
+        spec = json.load(file)
+    try:
+        campaign = Coordinator.from_spec(spec, host=host, port=port, lease_timeout=lease_timeout, token=token)
+    except (KeyError, ValueError) as e:
+        raise click.ClickException(f"Invalid campaign file: {e}")
+    if not token:
+        click.echo(f"Campaign token: {campaign.token}")
+    try:
+        campaign.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    _echo_campaign(campaign.status())
+
+@cli.command(name="worker")
+@click.option("--config-file", type=click.Path(exists=True), required=True, help="Radio modules to run shards on")
+@click.option("--host", required=True, help="Coordinator host")
+@click.option("--port", type=int, default=DEFAULT_COORDINATOR_PORT, show_default=True)
+@click.option("--token", envvar="WARDRIVER_CAMPAIGN_TOKEN", help="Campaign token (or WARDRIVER_CAMPAIGN_TOKEN)")
+def worker(config_file, host, port, token):
+    """Run shards from a coordinator on every radio module in the configuration file."""
+    from threading import Thread
+    logging.basicConfig(level=logging.INFO)
+    with open(config_file, 'r') as file:
+        configs = json.load(file)
     manager = WardriverManager()
+    manager.load_radio_modules(configs)
+    workers = [Worker(module, host, port, token) for module in manager.radio_modules]
+    threads = [Thread(target=worker.run, name=f"worker-{worker.module.identifier}") for worker in workers]
+    for thread in threads:
+        thread.start()
+    try:
+        for thread in threads:
+            while thread.is_alive():
+                thread.join(0.5)
+    except KeyboardInterrupt:
+        for worker in workers:
+            worker.stop()
+    click.echo(f"Ran {sum(worker.shards_run for worker in workers)} shard(s).")
 
-    def draw_menu():
-        print(term.clear)
-        print(term.bold("Wardriver Interactive CLI"))
-        print(term.bold("-" * 30))
-        print("1. Load radio modules")
-        print("2. Configure a module")
-        print("3. Run all modules")
-        print("4. Scan for modules")
-        print("5. Exit")
-        print(term.bold("-" * 30))
-
-    while True:
-        draw_menu()
-        choice = input(term.bold("Enter choice: "))
-
-        if choice == '1':
-            config_file = input("Enter the path to the configuration file: ")
-            with open(config_file, 'r') as file:
-                configs = json.load(file)
-            manager.load_radio_modules(configs)
-            print(f"Loaded {len(manager.radio_modules)} radio modules.")
-        elif choice == '2':
-            identifier = input("Enter the identifier of the radio module: ")
-            mode = input("Enter mode (fuzzing/jamming): ")
-            attack_type = input("Enter attack type (targeted/selected/indiscriminate): ")
-            target = input("Enter target (optional): ") or None
-            manager.configure_module(identifier, mode, attack_type, target)
-            print(f"Configured module {identifier} with mode {mode} and attack type {attack_type}.")
-        elif choice == '3':
-            manager.run_modules()
-            print("Running all radio modules.")
-        elif choice == '4':
-            modules = manager.scan_drivers()
-            print(f"Found {len(modules)} radio modules.")
-            for module in modules:
-                print(f"Module: {module.identifier}")
-        elif choice == '5':
-            print("Exiting...")
-            break
-        else:
-            print("Invalid choice, please try again.")
+def _echo_campaign(status):
+    shards = status['shards']
+    click.echo(f"Cases: {status['cases_done']}/{status['cases_total']}  Shards: {shards['done']} done, "
+               f"{shards['leased']} leased, {shards['pending']} pending, {shards['failed']} failed")
+    click.echo(f"Packets sent: {status['packets_sent']} ({status['achieved_pps']:.1f}/s) in {status['elapsed']:.0f} s")
+    for name, info in status['workers'].items():
+        click.echo(f"  {name}: {info['state']} shard={info['shard']} packets={info['packets_sent']} "
+                   f"rate={info['achieved_pps']:.1f}/s leases={info['leases']} lost={info['lost_leases']}")
+
+@cli.command(name="campaign")
+@click.option("--host", default="127.0.0.1", show_default=True, help="Coordinator host")
+@click.option("--port", type=int, default=DEFAULT_COORDINATOR_PORT, show_default=True)
+@click.option("--events", is_flag=True, help="Also show recent campaign events")
+@click.option("--token", envvar="WARDRIVER_CAMPAIGN_TOKEN", help="Campaign token (or WARDRIVER_CAMPAIGN_TOKEN)")
+def campaign(host, port, events, token):
+    """Show the aggregate progress of a running coordinator."""
+    client = CoordinatorClient(host, port, token)
+    try:
+        client.open()
+        status = client.call('status')
+    except (OSError, CoordinatorError) as e:
+        raise click.ClickException(f"Coordinator {host}:{port}: {e}")
+    finally:
+        client.close()
+    _echo_campaign(status)
+    if events:
+        for event in status['events']:
+            click.echo(f"  {event}")
+
+@cli.command(name="shutdown")
+def shutdown():
+    """Stop a running daemon."""
+    client = DaemonClient()
+    if not client.available():
+        raise click.ClickException("No daemon is running.")
+    client.call('shutdown')
+    click.echo("Daemon stopped.")
+
+@cli.command(name="interactive")
+@click.option("--fps", type=float, default=4.0, show_default=True, help="Most frames drawn per second")
+def interactive(fps):
+    """Start the live dashboard, with a prompt for commands."""
+    from blessed import Terminal
+    from dashboard import Dashboard
+    Dashboard(WardriverManager(), Terminal(), fps).run()
 
 def main():
     cli()
@@ -1,23 +1,31 @@
-import serial
 import socket
 import logging
-from typing import Union
-from message import Message
+import time
+from typing import Optional, Tuple, Union
+from messages import Message
+from rtt import RttEstimator
+import tracing
+from profiling import span
 
 logger = logging.getLogger(__name__)
 
 class Connection:
-    def __init__(self, host: str = None, port: int = None, comport: str = None, baudrate: int = 9600):
+    def __init__(self, host: str = None, port: int = None, comport: str = None, baudrate: int = 9600,
+                 rtt: Optional[RttEstimator] = None):
         self.host = host
         self.port = port
         self.comport = comport
         self.baudrate = baudrate
         self.serial_conn = None
         self.socket_conn = None
+        # Round trips to whatever answers on this connection set the receive timeout
+        self.rtt = rtt or RttEstimator()
+        self.trace_name = comport or f"{host}:{port}"
 
     def open(self):
         if self.comport:
-            self.serial_conn = serial.Serial(self.comport, self.baudrate, timeout=1)
+            import serial
+            self.serial_conn = serial.Serial(self.comport, self.baudrate, timeout=self.rtt.timeout())
             logger.info(f"Opened serial connection on {self.comport}")
         elif self.host and self.port:
             self.socket_conn = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
@@ -33,21 +41,94 @@ class Connection:
             logger.info(f"Closed socket connection to {self.host}:{self.port}")
 
     def send(self, message: Message):
-        data = message.to_raw()
-        if self.serial_conn and self.serial_conn.is_open:
-            self.serial_conn.write(data)
-            logger.info(f"Sent data over serial: {data}")
-        elif self.socket_conn:
-            self.socket_conn.sendall(data)
-            logger.info(f"Sent data over socket: {data}")
+        with span('serialize'):
+            data = message.to_raw()
+        with span('transmit'):
+            if self.serial_conn and self.serial_conn.is_open:
+                self.serial_conn.write(data)
+                self.rtt.sent()
+            elif self.socket_conn:
+                self.socket_conn.sendall(data)
+                self.rtt.sent()
+            else:
+                return
+        if tracing.enabled:
+            tracing.trace(tracing.CONN_SEND, self.trace_name, data)
 
-    def recv(self, buffer_size: int = 1024) -> bytes:
-        if self.serial_conn and self.serial_conn.is_open:
-            data = self.serial_conn.read(buffer_size)
-            logger.info(f"Received data over serial: {data}")
-            return data
-        elif self.socket_conn:
-            data = self.socket_conn.recv(buffer_size)
-            logger.info(f"Received data over socket: {data}")
-            return data
-        return b''
+    def recv(self, buffer_size: int = 1024, expected_length: Optional[int] = None,
+             terminator: Optional[bytes] = None, timeout: Optional[float] = None) -> bytes:
+        """Receive a response, waiting at most timeout seconds (default: the learned RTO).
+
+        Returns as soon as expected_length bytes or the terminator have been
+        seen; with neither, as soon as the first data has arrived and the
+        rest already buffered has been read.
+        """
+        deadline = time.monotonic() + (timeout if timeout is not None else self.rtt.timeout())
+        with span('receive'):
+            if self.serial_conn and self.serial_conn.is_open:
+                data, complete = self._recv_serial(buffer_size, expected_length, terminator, deadline)
+            elif self.socket_conn:
+                data, complete = self._recv_socket(buffer_size, expected_length, terminator, deadline)
+            else:
+                return b''
+        if complete:
+            self.rtt.answered()
+        else:
+            self.rtt.timed_out()
+        if tracing.enabled:
+            tracing.trace(tracing.CONN_RECV, self.trace_name, data)
+        return data
+
+    @staticmethod
+    def _complete(data: bytes, expected_length: Optional[int], terminator: Optional[bytes]) -> bool:
+        if expected_length is not None:
+            return len(data) >= expected_length
+        if terminator is not None:
+            return terminator in data
+        return bool(data)
+
+    def _recv_serial(self, buffer_size: int, expected_length: Optional[int], terminator: Optional[bytes],
+                     deadline: float) -> Tuple[bytes, bool]:
+        data = b''
+        limit = min(buffer_size, expected_length) if expected_length is not None else buffer_size
+        while len(data) < limit:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            self.serial_conn.timeout = remaining
+            if expected_length is not None:
+                chunk = self.serial_conn.read(limit - len(data))
+            elif terminator is not None:
+                chunk = self.serial_conn.read_until(terminator, limit - len(data))
+            else:
+                chunk = self.serial_conn.read(1)
+                if chunk:
+                    chunk += self.serial_conn.read(min(self.serial_conn.in_waiting, limit - 1))
+            data += chunk
+            if self._complete(data, expected_length, terminator):
+                return data, True
+        return data, self._complete(data, expected_length, terminator)
+
+    def _recv_socket(self, buffer_size: int, expected_length: Optional[int], terminator: Optional[bytes],
+                     deadline: float) -> Tuple[bytes, bool]:
+        data = b''
+        limit = min(buffer_size, expected_length) if expected_length is not None else buffer_size
+        try:
+            while len(data) < limit:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self.socket_conn.settimeout(remaining)
+                try:
+                    chunk = self.socket_conn.recv(limit - len(data))
+                except socket.timeout:
+                    break
+                if not chunk:
+                    break  # peer closed
+                data += chunk
+                if self._complete(data, expected_length, terminator):
+                    return data, True
+        finally:
+            # send() relies on a blocking socket
+            self.socket_conn.settimeout(None)
+        return data, self._complete(data, expected_length, terminator)
@@ -0,0 +1,474 @@
+import collections
+import hmac
+import json
+import logging
+import os
+import random
+import secrets
+import socket
+import socketserver
+import time
+from threading import Event, Lock, Thread
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+from connection import Connection
+from messages import JsonMessage
+from radio import RadioModule
+from target import Target
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_COORDINATOR_PORT = 7420
+DEFAULT_LEASE_TIMEOUT = 15.0
+DEFAULT_SHARD_SIZE = 1000
+DEFAULT_MAX_ATTEMPTS = 5
+SHARD_BY = ('cases', 'target', 'channel')
+
+PENDING = 'pending'
+LEASED = 'leased'
+DONE = 'done'
+FAILED = 'failed'
+
+
+class CoordinatorError(Exception):
+    pass
+
+
+class Shard:
+    """A range of case indices, with the targets and channels to run it against.
+
+    Payloads are derived from (seed, case index), so a shard is fully
+    described by its range; one taken over from a lost worker continues
+    from the last case that worker reported.
+    """
+
+    def __init__(self, shard_id: int, case_start: int, case_end: int, targets: Optional[List[Dict[str, Any]]] = None,
+                 channels: Optional[List[float]] = None):
+        self.shard_id = shard_id
+        self.case_start = case_start
+        self.case_end = case_end
+        self.targets = targets or []
+        self.channels = channels or []
+        self.next_case = case_start
+        self.state = PENDING
+        self.worker: Optional[str] = None
+        self.lease_id: Optional[int] = None
+        self.lease_expires = 0.0
+        self.attempts = 0
+
+    def __repr__(self):
+        return f"Shard({self.shard_id}, cases={self.case_start}-{self.case_end}, state={self.state})"
+
+    @property
+    def cases_done(self) -> int:
+        return self.next_case - self.case_start
+
+    def frequencies(self) -> List[float]:
+        return self.channels + [target["frequency"] for target in self.targets if target.get("frequency") is not None]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"shard_id": self.shard_id, "case_start": self.case_start, "case_end": self.case_end,
+                "next_case": self.next_case, "targets": self.targets, "channels": self.channels,
+                "lease_id": self.lease_id}
+
+
+def plan_shards(shard_by: str, cases: int, shard_size: int = DEFAULT_SHARD_SIZE,
+                targets: Optional[List[Dict[str, Any]]] = None, channels: Optional[List[float]] = None) -> List[Shard]:
+    """Split a campaign into shards.
+
+    'cases' cuts cases (the campaign total) into ranges of shard_size, each
+    run against every target; 'target' gives each target its own range of
+    cases; 'channel' does the same per channel, with the targets seen on it.
+    Ranges never overlap, so no two shards send the same payload.
+    """
+    targets = targets or []
+    channels = channels or []
+    if shard_by == 'cases':
+        return [Shard(shard_id, start, min(start + shard_size, cases), targets, channels)
+                for shard_id, start in enumerate(range(0, cases, shard_size))]
+    if shard_by == 'target':
+        return [Shard(shard_id, shard_id * cases, (shard_id + 1) * cases, [target])
+                for shard_id, target in enumerate(targets)]
+    if shard_by == 'channel':
+        groups: Dict[float, List[Dict[str, Any]]] = {channel: [] for channel in channels}
+        for target in targets:
+            if target.get("frequency") is None:
+                raise ValueError(f"Target {target['name']} has no frequency to shard by")
+            groups.setdefault(target["frequency"], []).append(target)
+        return [Shard(shard_id, shard_id * cases, (shard_id + 1) * cases, group, [frequency])
+                for shard_id, (frequency, group) in enumerate(sorted(groups.items()))]
+    raise ValueError(f"Cannot shard by {shard_by}; expected one of {', '.join(SHARD_BY)}")
+
+
+def _covers(bands: Optional[List[Tuple[float, float]]], frequencies: List[float]) -> bool:
+    if bands is None:
+        return True
+    return all(any(low <= frequency <= high for low, high in bands) for frequency in frequencies)
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    # One connection per worker for its whole life: when it drops, so do the worker's leases
+    def handle(self):
+        worker = None
+        try:
+            for line in self.rfile:
+                try:
+                    request = json.loads(line)
+                    # Before anything else, so an outsider can't even drop a worker's leases by name
+                    self.server.coordinator.authenticate(request.get('token'))
+                    params = request.get('params', {})
+                    worker = params.get('worker', worker)
+                    response = {"ok": True, "result": self.server.coordinator.handle(request['command'], params)}
+                except Exception as e:
+                    logger.error(f"Coordinator command failed: {e}")
+                    response = {"ok": False, "error": str(e)}
+                self.wfile.write(json.dumps(response).encode() + b'\n')
+                self.wfile.flush()
+        except OSError:
+            pass
+        finally:
+            if worker:
+                self.server.coordinator.worker_lost(worker, "disconnected")
+
+
+class _Server(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class Coordinator:
+    """Hands out shards of a campaign to workers on leases and collects their progress.
+
+    A lease lasts lease_timeout seconds and is renewed by every heartbeat.
+    When it runs out, or the worker's connection drops, the shard goes back
+    to pending from its last reported case, so up to one heartbeat's worth
+    of cases may be sent twice but none are skipped. A shard that is lost
+    max_attempts times is marked failed instead of being handed out again.
+
+    Every request must carry the campaign token; without one, a token is
+    generated for the workers to be given.
+    """
+
+    def __init__(self, shards: List[Shard], mode: str = 'fuzzing', attack_type: str = 'targeted',
+                 seed: Optional[int] = None, host: str = '0.0.0.0', port: int = DEFAULT_COORDINATOR_PORT,
+                 lease_timeout: float = DEFAULT_LEASE_TIMEOUT, max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+                 token: Optional[str] = None, clock: Callable[[], float] = time.monotonic):
+        self.shards = {shard.shard_id: shard for shard in shards}
+        self.mode = mode
+        self.attack_type = attack_type
+        self.seed = seed if seed is not None else random.getrandbits(63)
+        self.host = host
+        self.port = port
+        self.lease_timeout = lease_timeout
+        self.max_attempts = max_attempts
+        self.token = token or secrets.token_urlsafe(16)
+        self.clock = clock
+        self.workers: Dict[str, Dict[str, Any]] = {}
+        self.events: Deque[Dict[str, Any]] = collections.deque(maxlen=200)
+        self.started_at = clock()
+        self.server: Optional[_Server] = None
+        self._lock = Lock()
+        self._stop = Event()
+        self.commands: Dict[str, Callable[..., Dict[str, Any]]] = {
+            'hello': self.hello,
+            'lease': self.lease,
+            'heartbeat': self.heartbeat,
+            'complete': self.complete,
+            'status': self.status,
+        }
+
+    @classmethod
+    def from_spec(cls, spec: Dict[str, Any], **kwargs) -> 'Coordinator':
+        """A coordinator for a campaign file: mode, attack_type, seed, shard_by, cases, shard_size, targets, channels."""
+        shards = plan_shards(spec.get('shard_by', 'cases'), spec['cases'], spec.get('shard_size', DEFAULT_SHARD_SIZE),
+                             spec.get('targets'), spec.get('channels'))
+        return cls(shards, spec.get('mode', 'fuzzing'), spec.get('attack_type', 'targeted'), spec.get('seed'),
+                   **kwargs)
+
+    def authenticate(self, token: Optional[str]):
+        if not isinstance(token, str) or not hmac.compare_digest(token.encode(), self.token.encode()):
+            raise CoordinatorError("Bad campaign token")
+
+    def handle(self, command: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        handler = self.commands.get(command)
+        if handler is None:
+            raise CoordinatorError(f"Unknown command: {command}")
+        with self._lock:
+            return handler(**params)
+
+    def _event(self, kind: str, **fields):
+        event = {"kind": kind, "time": time.time(), **fields}
+        self.events.append(event)
+        logger.info(f"Campaign event: {event}")
+
+    def hello(self, worker: str, bands: Optional[List[Tuple[float, float]]] = None) -> Dict[str, Any]:
+        self.workers[worker] = {"state": "active", "bands": bands, "shard": None, "last_seen": self.clock(),
+                                "packets_sent": 0, "achieved_pps": 0.0, "leases": 0, "lost_leases": 0}
+        self._event('worker_joined', worker=worker)
+        return {"mode": self.mode, "attack_type": self.attack_type, "seed": self.seed,
+                "lease_timeout": self.lease_timeout}
+
+    def _worker(self, worker: str) -> Dict[str, Any]:
+        info = self.workers.get(worker)
+        if info is None:
+            raise CoordinatorError(f"Unknown worker {worker}; send hello first")
+        info["last_seen"] = self.clock()
+        info["state"] = "active"
+        return info
+
+    def lease(self, worker: str) -> Dict[str, Any]:
+        info = self._worker(worker)
+        self._expire_leases()
+        if self.finished():
+            return {"done": True}
+        for shard in sorted(self.shards.values(), key=lambda shard: shard.shard_id):
+            if shard.state == PENDING and _covers(info["bands"], shard.frequencies()):
+                shard.state = LEASED
+                shard.worker = worker
+                # Unguessable, so only the worker it was handed to can report on the shard
+                shard.lease_id = secrets.randbits(63)
+                shard.lease_expires = self.clock() + self.lease_timeout
+                info["shard"] = shard.shard_id
+                info["leases"] += 1
+                logger.info(f"Leased shard {shard.shard_id} (cases {shard.next_case}-{shard.case_end}) to {worker}")
+                return {"shard": shard.to_dict()}
+        # Everything left is leased to others (or out of this worker's bands): ask again in a while
+        return {"shard": None, "wait": min(1.0, self.lease_timeout / 4)}
+
+    def _leased(self, worker: str, shard_id: int, lease_id: int) -> Optional[Shard]:
+        shard = self.shards.get(shard_id)
+        if shard is None or shard.state != LEASED or shard.lease_id != lease_id or shard.worker != worker:
+            return None
+        return shard
+
+    def _report(self, info: Dict[str, Any], shard: Shard, case_index: int, packets_sent: int,
+                achieved_pps: float, events: Optional[List[Dict[str, Any]]]):
+        shard.next_case = max(shard.next_case, min(case_index, shard.case_end))
+        info["packets_sent"] = packets_sent
+        info["achieved_pps"] = achieved_pps
+        for event in events or []:
+            self._event(event.pop("kind", "worker_event"), worker=shard.worker, shard=shard.shard_id, **event)
+
+    def heartbeat(self, worker: str, shard_id: int, lease_id: int, case_index: int, packets_sent: int = 0,
+                  achieved_pps: float = 0.0, events: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+        """Progress on a leased shard; renews the lease. lease is False if the shard went to someone else."""
+        info = self._worker(worker)
+        shard = self._leased(worker, shard_id, lease_id)
+        if shard is None:
+            return {"lease": False}
+        self._report(info, shard, case_index, packets_sent, achieved_pps, events)
+        shard.lease_expires = self.clock() + self.lease_timeout
+        return {"lease": True}
+
+    def complete(self, worker: str, shard_id: int, lease_id: int, case_index: int, packets_sent: int = 0,
+                 achieved_pps: float = 0.0, events: Optional[List[Dict[str, Any]]] = None,
+                 failed: bool = False) -> Dict[str, Any]:
+        """End of a lease: the shard is done if every case was sent, otherwise it is handed out again."""
+        info = self._worker(worker)
+        info["shard"] = None
+        shard = self._leased(worker, shard_id, lease_id)
+        if shard is None:
+            return {"accepted": False}
+        self._report(info, shard, case_index, packets_sent, achieved_pps, events)
+        if shard.next_case >= shard.case_end:
+            shard.state = DONE
+            self._event('shard_done', worker=worker, shard=shard.shard_id)
+        else:
+            self._release(shard, "failed" if failed else "stopped early", count_attempt=failed)
+        return {"accepted": True}
+
+    def _release(self, shard: Shard, reason: str, count_attempt: bool = True):
+        worker = shard.worker
+        shard.worker = None
+        shard.lease_id = None
+        if count_attempt:
+            shard.attempts += 1
+        if shard.attempts >= self.max_attempts:
+            shard.state = FAILED
+        else:
+            shard.state = PENDING
+        self._event('shard_released', worker=worker, shard=shard.shard_id, reason=reason, next_case=shard.next_case,
+                    state=shard.state)
+
+    def _expire_leases(self):
+        now = self.clock()
+        for shard in self.shards.values():
+            if shard.state == LEASED and shard.lease_expires < now:
+                info = self.workers.get(shard.worker)
+                if info:
+                    info["state"] = "lost"
+                    info["shard"] = None
+                    info["lost_leases"] += 1
+                self._release(shard, "lease expired")
+
+    def worker_lost(self, worker: str, reason: str):
+        with self._lock:
+            info = self.workers.get(worker)
+            if info is None:
+                return
+            info["state"] = reason
+            info["shard"] = None
+            for shard in self.shards.values():
+                if shard.state == LEASED and shard.worker == worker:
+                    info["lost_leases"] += 1
+                    self._release(shard, f"worker {reason}")
+
+    def finished(self) -> bool:
+        return all(shard.state in (DONE, FAILED) for shard in self.shards.values())
+
+    def status(self) -> Dict[str, Any]:
+        """The aggregate view: shard states, cases done, and each worker's progress and rate."""
+        now = self.clock()
+        states = collections.Counter(shard.state for shard in self.shards.values())
+        cases_total = sum(shard.case_end - shard.case_start for shard in self.shards.values())
+        cases_done = sum(shard.cases_done for shard in self.shards.values())
+        active = [info for info in self.workers.values() if info["state"] == "active"]
+        return {"seed": self.seed,
+                "elapsed": now - self.started_at,
+                "shards": {state: states.get(state, 0) for state in (PENDING, LEASED, DONE, FAILED)},
+                "cases_done": cases_done,
+                "cases_total": cases_total,
+                "packets_sent": sum(info["packets_sent"] for info in self.workers.values()),
+                "achieved_pps": sum(info["achieved_pps"] for info in active),
+                "workers": {worker: {"state": info["state"], "shard": info["shard"],
+                                     "packets_sent": info["packets_sent"], "achieved_pps": info["achieved_pps"],
+                                     "leases": info["leases"], "lost_leases": info["lost_leases"],
+                                     "idle": now - info["last_seen"]}
+                            for worker, info in self.workers.items()},
+                "events": list(self.events)[-20:]}
+
+    def serve_forever(self):
+        """Serve workers until every shard is done or failed and the workers have been told so."""
+        self.server = _Server((self.host, self.port), _RequestHandler)
+        self.server.coordinator = self
+        self.port = self.server.server_address[1]
+        reaper = Thread(target=self._reap, name='coordinator-leases', daemon=True)
+        reaper.start()
+        logger.info(f"Coordinator for {len(self.shards)} shard(s) listening on {self.host}:{self.port}")
+        try:
+            self.server.serve_forever()
+        finally:
+            self._stop.set()
+            self.server.server_close()
+
+    def _reap(self):
+        # Leases expire here too, so a lost shard is freed even when no worker is asking for work
+        finished_at = None
+        while not self._stop.wait(min(1.0, self.lease_timeout / 4)):
+            with self._lock:
+                self._expire_leases()
+                connected = any(info["state"] == "active" for info in self.workers.values())
+                finished = self.finished()
+            if finished and not connected:
+                finished_at = finished_at or self.clock()
+                # Give late status queries a moment before going away
+                if self.clock() - finished_at >= 1.0:
+                    self.server.shutdown()
+                    return
+
+    def shutdown(self):
+        if self.server:
+            self.server.shutdown()
+
+
+class CoordinatorClient:
+    """Requests to a coordinator, one JSON line each way over a socket Connection."""
+
+    def __init__(self, host: str, port: int = DEFAULT_COORDINATOR_PORT, token: Optional[str] = None,
+                 timeout: float = 10.0):
+        self.connection = Connection(host, port)
+        self.token = token
+        self.timeout = timeout
+
+    def open(self):
+        self.connection.open()
+
+    def close(self):
+        self.connection.close()
+
+    def call(self, command: str, **params) -> Dict[str, Any]:
+        self.connection.send(JsonMessage({"command": command, "params": params, "token": self.token}))
+        data = self.connection.recv(1 << 20, terminator=b'\n', timeout=self.timeout)
+        if not data.endswith(b'\n'):
+            raise CoordinatorError(f"No answer from coordinator {self.connection.host}:{self.connection.port}")
+        response = JsonMessage(None).from_raw(data)
+        if not response['ok']:
+            raise CoordinatorError(response['error'])
+        return response['result']
+
+
+class Worker:
+    """Runs shards leased from a coordinator on one radio module until the campaign is done."""
+
+    def __init__(self, module: RadioModule, host: str, port: int = DEFAULT_COORDINATOR_PORT,
+                 token: Optional[str] = None, worker_id: Optional[str] = None,
+                 heartbeat_interval: Optional[float] = None):
+        self.module = module
+        self.client = CoordinatorClient(host, port, token)
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}/{module.identifier}"
+        self.heartbeat_interval = heartbeat_interval
+        self.shards_run = 0
+        self._events: List[Dict[str, Any]] = []
+        self._failed = False
+        self._stop = Event()
+        module.failure_listeners.append(self._module_failed)
+
+    def stop(self):
+        """Stop after reporting progress on the current shard, which goes back to the coordinator."""
+        self._stop.set()
+        self.module.stop()
+
+    def run(self):
+        self.client.open()
+        try:
+            campaign = self.client.call('hello', worker=self.worker_id, bands=self.module.capabilities.bands)
+            if self.heartbeat_interval is None:
+                self.heartbeat_interval = campaign['lease_timeout'] / 3
+            while not self._stop.is_set():
+                lease = self.client.call('lease', worker=self.worker_id)
+                if lease.get('done'):
+                    logger.info(f"Worker {self.worker_id} finished after {self.shards_run} shard(s)")
+                    break
+                if lease['shard'] is None:
+                    self._stop.wait(lease['wait'])
+                    continue
+                self._run_shard(campaign, lease['shard'])
+        finally:
+            self.client.close()
+
+    def _run_shard(self, campaign: Dict[str, Any], shard: Dict[str, Any]):
+        module = self.module
+        module.seed = campaign['seed']
+        module.case_index = shard['next_case']
+        module.case_limit = shard['case_end']
+        # The case range, not a per-target count, ends the shard
+        module.packet_count = shard['case_end'] - shard['next_case']
+        targets = [Target.from_dict(data) for data in shard['targets']]
+        for target in targets:
+            target.monitor_listeners.append(self._monitor_event)
+        module.set_mode(campaign['mode'], campaign['attack_type'], targets)
+        if shard['channels']:
+            module.assign_channels(shard['channels'], {})
+        self._failed = False
+        module.start()
+        while module.thread.is_alive():
+            module.thread.join(self.heartbeat_interval)
+            if not self.client.call('heartbeat', **self._progress(shard))['lease']:
+                logger.warning(f"Worker {self.worker_id} lost its lease on shard {shard['shard_id']}")
+                module.stop()
+                return
+        self.client.call('complete', failed=self._failed, **self._progress(shard))
+        self.shards_run += 1
+
+    def _progress(self, shard: Dict[str, Any]) -> Dict[str, Any]:
+        events, self._events = self._events, []
+        return {"worker": self.worker_id, "shard_id": shard['shard_id'], "lease_id": shard['lease_id'],
+                "case_index": self.module.resume_index, "packets_sent": self.module.packets_sent,
+                "achieved_pps": self.module.rate_limiter.stats()["achieved_pps"], "events": events}
+
+    def _module_failed(self, module: RadioModule):
+        self._failed = True
+        self._events.append({"kind": "module_failed", "case_index": module.case_index})
+
+    def _monitor_event(self, target: Target, event):
+        self._events.append({"kind": "monitor", "target": target.name, "monitor": event.name, "state": event.state,
+                             "case_index": self.module.case_index})
@@ -0,0 +1,266 @@
+import hashlib
+import logging
+import os
+import re
+import struct
+from array import array
+from threading import Lock
+from typing import Dict, Iterator, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CORPUS_PATH = os.path.join(os.path.expanduser('~'), '.wardriver', 'corpus')
+
+# Log record: payload hash, fingerprint, payload length, response length, latency (s)
+RECORD = struct.Struct('<QQIIf')
+
+# Seen payload hashes are buffered and appended to seen.bin in batches
+SEEN_FLUSH = 4096
+
+# Fingerprint index values pack the log offset with the payload length (capped), so comparing
+# a new case against the kept one needs no disk access
+LENGTH_BITS = 20
+LENGTH_MASK = (1 << LENGTH_BITS) - 1
+
+_DIGITS = re.compile(rb'[0-9]+')
+
+
+def digest64(data: bytes) -> int:
+    # 64-bit hashes: a 1-in-10^6 chance of any collision at ~6 million cases, fine for dedupe
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), 'little') or 1
+
+
+def _bucket(value: float) -> int:
+    # Powers of two, so small jitter in length or latency lands in the same bucket
+    return max(0, int(value).bit_length())
+
+
+def normalize(response: bytes) -> bytes:
+    """Strip what changes between identical replies: trailing padding and decimal counters."""
+    return _DIGITS.sub(b'0', response.rstrip(b'\x00\r\n \xff'))
+
+
+def fingerprint(response: bytes, latency: float) -> int:
+    """Length bucket, hash of the normalized bytes and latency bucket, packed into 64 bits."""
+    length_bucket = _bucket(len(response))
+    latency_bucket = _bucket(latency * 1000)
+    return (length_bucket << 56) | (latency_bucket << 48) | (digest64(normalize(response)) & ((1 << 48) - 1))
+
+
+_stores: Dict[str, 'CorpusStore'] = {}
+_stores_lock = Lock()
+
+
+def open_store(path: str) -> 'CorpusStore':
+    """The CorpusStore for path, shared by every target that uses it."""
+    path = os.path.abspath(path)
+    with _stores_lock:
+        if path not in _stores:
+            _stores[path] = CorpusStore(path)
+        return _stores[path]
+
+
+class HashIndex:
+    """Open-addressing set of 64-bit hashes, with an optional 64-bit value each.
+
+    Two flat arrays at no more than half full come to 32 bytes an entry, a
+    fraction of a Python set or dict, and lookups stay O(1).
+    """
+
+    def __init__(self, capacity: int = 1024):
+        size = 1
+        while size < capacity * 2:
+            size <<= 1
+        self.keys = array('Q', [0]) * size
+        self.values = array('Q', [0]) * size
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def _slot(self, key: int) -> int:
+        mask = len(self.keys) - 1
+        slot = key & mask
+        while self.keys[slot] and self.keys[slot] != key:
+            slot = (slot + 1) & mask
+        return slot
+
+    def __contains__(self, key: int) -> bool:
+        return self.keys[self._slot(key)] == key
+
+    def get(self, key: int) -> Optional[int]:
+        slot = self._slot(key)
+        return self.values[slot] if self.keys[slot] == key else None
+
+    def put(self, key: int, value: int = 0) -> bool:
+        """Insert or update key; True if it was not present."""
+        slot = self._slot(key)
+        new = self.keys[slot] != key
+        self.keys[slot] = key
+        self.values[slot] = value
+        if new:
+            self.count += 1
+            if self.count * 2 > len(self.keys):
+                self._grow()
+        return new
+
+    def _grow(self):
+        keys, values = self.keys, self.values
+        self.keys = array('Q', [0]) * (2 * len(keys))
+        self.values = array('Q', [0]) * (2 * len(values))
+        self.count = 0
+        for key, value in zip(keys, values):
+            if key:
+                self.put(key, value)
+
+
+class CorpusStore:
+    """On-disk fuzz corpus: cases kept only when their response has a new fingerprint.
+
+    corpus.log holds the kept cases as appended records; seen.bin holds the
+    hash of every payload ever tried, so repeats are skipped across runs.
+    A case whose fingerprint is already known is kept only if its payload is
+    shorter, which leaves the longer one redundant until minimize() rewrites
+    the log.
+    """
+
+    def __init__(self, path: str = DEFAULT_CORPUS_PATH):
+        self.path = path
+        self.log_path = os.path.join(path, 'corpus.log')
+        self.seen_path = os.path.join(path, 'seen.bin')
+        self.seen_hashes = HashIndex()
+        # fingerprint -> (log offset, payload length) of the smallest case producing it
+        self.fingerprints = HashIndex()
+        self.records = 0
+        self._unsaved_seen = array('Q')
+        self._lock = Lock()
+        os.makedirs(path, exist_ok=True)
+        self._load()
+        self._log = open(self.log_path, 'ab')
+
+    def _load(self):
+        if os.path.exists(self.seen_path):
+            seen = array('Q')
+            with open(self.seen_path, 'rb') as file:
+                data = file.read()
+            seen.frombytes(data[:len(data) - len(data) % 8])
+            for key in seen:
+                self.seen_hashes.put(key)
+        for offset, payload_hash, print_, payload, _, _ in self._scan():
+            self.seen_hashes.put(payload_hash)
+            self._index(print_, offset, len(payload))
+            self.records += 1
+        logger.info(f"Loaded corpus {self.path}: {len(self.fingerprints)} fingerprints, "
+                    f"{len(self.seen_hashes)} cases seen")
+
+    def _scan(self) -> Iterator[Tuple[int, int, int, bytes, bytes, float]]:
+        if not os.path.exists(self.log_path):
+            return
+        with open(self.log_path, 'rb') as file:
+            while True:
+                offset = file.tell()
+                header = file.read(RECORD.size)
+                if len(header) < RECORD.size:
+                    break
+                payload_hash, print_, payload_len, response_len, latency = RECORD.unpack(header)
+                body = file.read(payload_len + response_len)
+                if len(body) < payload_len + response_len:
+                    logger.warning(f"Ignoring truncated corpus record at offset {offset}")
+                    break
+                yield offset, payload_hash, print_, body[:payload_len], body[payload_len:], latency
+
+    def _improves(self, print_: int, payload_len: int) -> bool:
+        current = self.fingerprints.get(print_)
+        return current is None or min(payload_len, LENGTH_MASK) < current & LENGTH_MASK
+
+    def _index(self, print_: int, offset: int, payload_len: int):
+        if self._improves(print_, payload_len):
+            self.fingerprints.put(print_, offset << LENGTH_BITS | min(payload_len, LENGTH_MASK))
+
+    def _is_kept(self, print_: int, offset: int) -> bool:
+        value = self.fingerprints.get(print_)
+        return value is not None and value >> LENGTH_BITS == offset
+
+    def seen(self, payload: bytes) -> bool:
+        return digest64(payload) in self.seen_hashes
+
+    def _mark_seen(self, payload_hash: int):
+        if self.seen_hashes.put(payload_hash):
+            self._unsaved_seen.append(payload_hash)
+            if len(self._unsaved_seen) >= SEEN_FLUSH:
+                self._save_seen()
+
+    def mark_seen(self, payload: bytes):
+        """Record a case tried without a response to judge it by, e.g. one sent over the air."""
+        with self._lock:
+            self._mark_seen(digest64(payload))
+
+    def add(self, payload: bytes, response: bytes, latency: float) -> bool:
+        """Record a tried case; True if it was kept for a new (or more cheaply reached) fingerprint."""
+        payload_hash = digest64(payload)
+        print_ = fingerprint(response, latency)
+        with self._lock:
+            self._mark_seen(payload_hash)
+            if not self._improves(print_, len(payload)):
+                return False
+            offset = self._log.tell()
+            self._log.write(RECORD.pack(payload_hash, print_, len(payload), len(response), latency))
+            self._log.write(payload)
+            self._log.write(response)
+            self._log.flush()
+            self._index(print_, offset, len(payload))
+            self.records += 1
+            return True
+
+    def _save_seen(self):
+        with open(self.seen_path, 'ab') as file:
+            self._unsaved_seen.tofile(file)
+        self._unsaved_seen = array('Q')
+
+    def entries(self) -> Iterator[Tuple[bytes, bytes, float]]:
+        """The kept cases, one per fingerprint: (payload, response, latency)."""
+        with self._lock:
+            self._log.flush()
+        for offset, _, print_, payload, response, latency in self._scan():
+            if self._is_kept(print_, offset):
+                yield payload, response, latency
+
+    def minimize(self) -> int:
+        """Rewrite the log with only the smallest case per fingerprint; returns records dropped."""
+        with self._lock:
+            self._log.flush()
+            tmp_path = f"{self.log_path}.tmp"
+            kept = HashIndex(len(self.fingerprints))
+            with open(tmp_path, 'wb') as out:
+                for offset, payload_hash, print_, payload, response, latency in self._scan():
+                    if not self._is_kept(print_, offset):
+                        continue
+                    kept.put(print_, out.tell() << LENGTH_BITS | min(len(payload), LENGTH_MASK))
+                    out.write(RECORD.pack(payload_hash, print_, len(payload), len(response), latency))
+                    out.write(payload)
+                    out.write(response)
+            self._log.close()
+            os.replace(tmp_path, self.log_path)
+            self._log = open(self.log_path, 'ab')
+            dropped = self.records - len(kept)
+            self.fingerprints = kept
+            self.records = len(kept)
+        logger.info(f"Minimized corpus {self.path}: dropped {dropped} redundant case(s)")
+        return dropped
+
+    def flush(self) -> int:
+        """Persist everything recorded so far; returns the log position, a pointer checkpoints keep."""
+        with self._lock:
+            if self._unsaved_seen:
+                self._save_seen()
+            self._log.flush()
+            return self._log.tell()
+
+    def stats(self) -> Dict[str, int]:
+        return {"fingerprints": len(self.fingerprints), "records": self.records, "seen": len(self.seen_hashes)}
+
+    def close(self):
+        with self._lock:
+            if self._unsaved_seen:
+                self._save_seen()
+            self._log.close()
@@ -0,0 +1,230 @@
+import json
+import logging
+import os
+import socket
+import socketserver
+import tempfile
+from threading import Lock, Thread
+from typing import Any, Callable, Dict, Optional
+from wardriver import WardriverManager
+from inventory import Inventory
+from memory import MemoryBudget
+import tracing
+import profiling
+
+logger = logging.getLogger(__name__)
+
+
+def default_socket_path() -> str:
+    if os.environ.get('WARDRIVER_SOCKET'):
+        return os.environ['WARDRIVER_SOCKET']
+    runtime_dir = os.environ.get('XDG_RUNTIME_DIR') or tempfile.gettempdir()
+    return os.path.join(runtime_dir, f"wardriver-{os.getuid()}.sock")
+
+
+class DaemonError(Exception):
+    pass
+
+
+def _load(manager: WardriverManager, configs):
+    manager.load_radio_modules(configs)
+    return {"loaded": len(manager.radio_modules)}
+
+
+def _configure(manager: WardriverManager, identifier, mode, attack_type, target=None):
+    manager.configure_module(identifier, mode, attack_type, target)
+    return {}
+
+
+def _run(manager: WardriverManager, checkpoint=None):
+    manager.run_modules(checkpoint)
+    return {}
+
+
+def _resume(manager: WardriverManager, checkpoint):
+    modules = manager.resume(checkpoint)
+    return {"modules": [{"identifier": module.identifier, "case_index": module.case_index} for module in modules]}
+
+
+def _scan(manager: WardriverManager, probe_unknown=False, inventory_path=None, no_cache=False):
+    inventory = Inventory(inventory_path) if inventory_path else None
+    modules = manager.scan_drivers(probe_unknown=probe_unknown, inventory=inventory, use_cache=not no_cache)
+    return {"modules": [module.identifier for module in modules]}
+
+
+def _rate(manager: WardriverManager, identifier, update=False, **rate):
+    stats = manager.set_rate(identifier, **rate) if update else manager.rate_stats(identifier)
+    if stats is None:
+        raise DaemonError(f"Radio module with identifier {identifier} not found")
+    return stats
+
+
+def _allocate(manager: WardriverManager, objective='coverage', targets=None, channels=None):
+    assignments = manager.allocate(objective, targets, channels)
+    return {"assignments": [assignment.to_dict() for assignment in assignments.values()],
+            "uncovered": manager.allocator.uncovered}
+
+
+def _survey(manager: WardriverManager):
+    found = manager.survey()
+    return {"modules": {identifier: [target.to_dict() for target in targets] for identifier, targets in found.items()},
+            "gps": manager.gps.status() if manager.gps else None}
+
+
+def _channels(manager: WardriverManager):
+    weights = manager.selector.weights()
+    return {"channels": [{"frequency": frequency, "share": weights.get(frequency, 0.0), **stats}
+                         for frequency, stats in manager.selector.stats().items()]}
+
+
+def _memory(manager: WardriverManager):
+    # Without a budget, still show the process as a whole
+    return manager.memory.check() if manager.memory else MemoryBudget().report()
+
+
+def _trace(manager: WardriverManager, path):
+    if not tracing.enabled:
+        raise DaemonError("Tracing is off; start the daemon with --trace")
+    return {"path": path, "events": tracing.dump(path)}
+
+
+def _profile(manager: WardriverManager, action='report', path=None,
+             sample_interval=profiling.DEFAULT_SAMPLE_INTERVAL):
+    if action == 'start':
+        profiling.reset()
+        profiling.enable(sample_interval)
+    elif action == 'stop':
+        profiling.disable()
+    elif action == 'save':
+        profiling.save(path)
+    elif action != 'report':
+        raise DaemonError(f"Unknown profile action: {action}")
+    return profiling.report()
+
+
+def _status(manager: WardriverManager):
+    return {"modules": [{"identifier": module.identifier,
+                         "mode": module.mode,
+                         "attack_type": module.attack_type,
+                         "packets_sent": module.packets_sent,
+                         "rate": module.rate_limiter.stats()}
+                        for module in manager.radio_modules]}
+
+
+# command -> handler(manager, **params); shared by the daemon and in-process execution
+COMMANDS: Dict[str, Callable[..., Dict[str, Any]]] = {
+    'load': _load,
+    'configure': _configure,
+    'run': _run,
+    'resume': _resume,
+    'scan': _scan,
+    'allocate': _allocate,
+    'rate': _rate,
+    'status': _status,
+    'survey': _survey,
+    'channels': _channels,
+    'memory': _memory,
+    'trace': _trace,
+    'profile': _profile,
+}
+
+
+def execute(manager: WardriverManager, command: str, params: Dict[str, Any]) -> Dict[str, Any]:
+    handler = COMMANDS.get(command)
+    if handler is None:
+        raise DaemonError(f"Unknown command: {command}")
+    return handler(manager, **params)
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        for line in self.rfile:
+            request = {}
+            try:
+                request = json.loads(line)
+                result = self.server.daemon.handle(request['command'], request.get('params', {}))
+                response = {"ok": True, "result": result}
+            except Exception as e:
+                logger.error(f"Daemon command failed: {e}")
+                response = {"ok": False, "error": str(e)}
+            self.wfile.write(json.dumps(response).encode() + b'\n')
+            self.wfile.flush()
+            if request.get('command') == 'shutdown':
+                # Only once the reply is out: the process exits as soon as serve_forever returns.
+                # shutdown() waits for serve_forever, so it cannot run on a request thread
+                Thread(target=self.server.shutdown, daemon=True).start()
+                return
+
+
+class _Server(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+
+class WardriverDaemon:
+    """Keeps a WardriverManager, its modules and their open radios resident between CLI commands."""
+
+    def __init__(self, manager: Optional[WardriverManager] = None, socket_path: Optional[str] = None):
+        self.manager = manager or WardriverManager()
+        self.socket_path = socket_path or default_socket_path()
+        self.server: Optional[_Server] = None
+        self._lock = Lock()
+
+    def handle(self, command: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        if command == 'shutdown':
+            return {}
+        with self._lock:
+            return execute(self.manager, command, params)
+
+    def serve_forever(self):
+        if os.path.exists(self.socket_path):
+            if DaemonClient(self.socket_path).available():
+                raise DaemonError(f"A daemon is already listening on {self.socket_path}")
+            os.unlink(self.socket_path)  # stale socket from a previous run
+        self.server = _Server(self.socket_path, _RequestHandler)
+        self.server.daemon = self
+        os.chmod(self.socket_path, 0o600)
+        logger.info(f"Wardriver daemon listening on {self.socket_path}")
+        try:
+            self.server.serve_forever()
+        finally:
+            self.server.server_close()
+            if os.path.exists(self.socket_path):
+                os.unlink(self.socket_path)
+            for module in self.manager.radio_modules:
+                module.stop()
+                module.close()
+            self.manager.close_observations()
+            self.manager.close_memory_budget()
+            logger.info("Wardriver daemon stopped")
+
+
+class DaemonClient:
+    def __init__(self, socket_path: Optional[str] = None, timeout: float = 30.0):
+        self.socket_path = socket_path or default_socket_path()
+        self.timeout = timeout
+
+    def _connect(self) -> socket.socket:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        sock.connect(self.socket_path)
+        return sock
+
+    def available(self) -> bool:
+        if not os.path.exists(self.socket_path):
+            return False
+        try:
+            self._connect().close()
+            return True
+        except OSError:
+            return False
+
+    def call(self, command: str, **params) -> Dict[str, Any]:
+        with self._connect() as sock:
+            sock.sendall(json.dumps({"command": command, "params": params}).encode() + b'\n')
+            response = sock.makefile('rb').readline()
+        if not response:
+            raise DaemonError("Daemon closed the connection")
+        response = json.loads(response)
+        if not response['ok']:
+            raise DaemonError(response['error'])
+        return response['result']
@@ -0,0 +1,248 @@
+import json
+import logging
+import shlex
+import time
+from collections import deque
+from threading import Lock, Thread
+from typing import Any, Deque, Dict, List, Optional, Tuple
+import metrics
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_FPS = 4.0
+SPARK_WIDTH = 20
+SPARK_BLOCKS = ' ▁▂▃▄▅▆▇█'
+RSSI_RANGE = (-100.0, -30.0)  # dBm mapped onto the sparkline's blocks
+PPS_SMOOTHING = 0.5
+# A module with no update for this long is shown as idle rather than at its last rate
+STALE_AFTER = 2.0
+PROMPT = '> '
+MERGE_GAP = 8  # cells; about the length of a cursor move sequence
+HELP = ("commands: load FILE | configure ID fuzzing|jamming targeted|selected|indiscriminate [TARGET] | "
+        "run | stop | scan | quit")
+
+
+def sparkline(values, low: float = RSSI_RANGE[0], high: float = RSSI_RANGE[1]) -> str:
+    top = len(SPARK_BLOCKS) - 1
+    return ''.join(SPARK_BLOCKS[max(0, min(top, round((value - low) / (high - low) * top)))] for value in values)
+
+
+def changed_spans(old: str, new: str) -> List[Tuple[int, str]]:
+    """(column, text) runs covering every cell that differs between two rows.
+
+    Runs closer than MERGE_GAP cells are joined: rewriting the few unchanged
+    cells between them is cheaper than a cursor move.
+    """
+    width = max(len(old), len(new))
+    old, new = old.ljust(width), new.ljust(width)
+    spans: List[List[int]] = []
+    for column in range(width):
+        if old[column] != new[column]:
+            if spans and column - spans[-1][1] < MERGE_GAP:
+                spans[-1][1] = column + 1
+            else:
+                spans.append([column, column + 1])
+    return [(start, new[start:end]) for start, end in spans]
+
+
+class ModuleView:
+    """One module as the dashboard shows it, built up from its metrics updates."""
+
+    def __init__(self):
+        self.packets_sent = 0
+        self.pps = 0.0
+        self.frequency: Optional[float] = None
+        self.rssi: Deque[float] = deque(maxlen=SPARK_WIDTH)
+        self.errors = 0
+        self.running = False
+        self.top_targets: List[Tuple[str, int]] = []
+        self.updated: Optional[float] = None
+
+    def update(self, values: Dict[str, Any], now: float):
+        packets = values.get("packets_sent", self.packets_sent)
+        if self.updated is not None and now > self.updated:
+            rate = max(0, packets - self.packets_sent) / (now - self.updated)
+            self.pps = PPS_SMOOTHING * rate + (1 - PPS_SMOOTHING) * self.pps
+        self.packets_sent = packets
+        self.updated = now
+        if values.get("rssi") is not None:
+            self.rssi.append(values["rssi"])
+        self.frequency = values.get("frequency", self.frequency)
+        self.errors = values.get("errors", self.errors)
+        self.running = values.get("running", self.running)
+        self.top_targets = values.get("top_targets", self.top_targets)
+
+    def current_pps(self, now: float) -> float:
+        return self.pps if self.updated is not None and now - self.updated < STALE_AFTER else 0.0
+
+
+class _StatusHandler(logging.Handler):
+    # Warnings go to the status line; written to stderr they would scribble over the frame
+    def __init__(self, dashboard: 'Dashboard'):
+        super().__init__(logging.WARNING)
+        self.dashboard = dashboard
+
+    def emit(self, record: logging.LogRecord):
+        self.dashboard.status = f"{record.levelname}: {record.getMessage()}"
+
+
+class Dashboard:
+    """Full-screen live view of the metrics feed, with a command prompt that never blocks it.
+
+    Metrics arrive through metrics.subscribe(), so nothing is polled. Frames
+    are drawn at most fps times a second and only the cells that changed
+    since the last frame are written, which keeps an SSH session on a slow
+    link responsive. Keystrokes are echoed straight away; commands run on a
+    worker thread while the display keeps updating.
+    """
+
+    def __init__(self, manager, term, fps: float = DEFAULT_FPS):
+        self.manager = manager
+        self.term = term
+        self.interval = 1.0 / fps
+        self.views: Dict[str, ModuleView] = {}
+        self.totals: Dict[str, Any] = {}
+        self.command = ''
+        self.status = HELP
+        self.done = False
+        self._lock = Lock()
+        self._frame: List[str] = []
+        self._size: Optional[Tuple[int, int]] = None
+        self._worker: Optional[Thread] = None
+
+    def _on_metrics(self, values: Dict[str, Any]):
+        now = time.monotonic()
+        with self._lock:
+            for identifier, module_values in values.get("modules", {}).items():
+                self.views.setdefault(identifier, ModuleView()).update(module_values, now)
+            self.totals.update({key: value for key, value in values.items() if key != "modules"})
+
+    def render(self, width: int, height: int) -> List[str]:
+        """The frame as height rows of exactly width cells."""
+        now = time.monotonic()
+        with self._lock:
+            totals = dict(self.totals)
+            views = sorted(self.views.items())
+            packets = sum(view.packets_sent for _, view in views)
+            rows = [f"Wardriver  {totals.get('time', '00:00:00')}  modules {len(views)}  packets {packets}  "
+                    f"{sum(view.current_pps(now) for _, view in views):.1f} pkt/s",
+                    '',
+                    f"{'module':<16}{'pkt/s':>9}{'MHz':>10}  {'rssi':<{SPARK_WIDTH}}{'dBm':>5}{'err':>5}  top targets"]
+            for identifier, view in views:
+                frequency = f"{view.frequency:.3f}" if view.frequency is not None else '-'
+                rssi = f"{view.rssi[-1]:.0f}" if view.rssi else '-'
+                targets = ', '.join(f"{name}:{count}" for name, count in view.top_targets)
+                rows.append(f"{identifier[:15]:<16}{view.current_pps(now):>9.1f}{frequency:>10}  "
+                            f"{sparkline(view.rssi):<{SPARK_WIDTH}}{rssi:>5}{view.errors:>5}  {targets}")
+        body = rows[:max(0, height - 2)]
+        body += [''] * (height - 2 - len(body))
+        rows = body + [self.status, PROMPT + self.command]
+        return [row[:width].ljust(width) for row in rows[-height:]]
+
+    def paint(self) -> str:
+        """Terminal output turning the last frame into the current one."""
+        term = self.term
+        size = (term.width, term.height)
+        rows = self.render(*size)
+        if size != self._size:
+            self._size, self._frame = size, [''] * len(rows)
+            output = [term.home + term.clear]
+        else:
+            output = []
+        bold = {0, 2}
+        for y, (old, new) in enumerate(zip(self._frame, rows)):
+            for x, text in changed_spans(old, new):
+                output.append(term.move_yx(y, x) + (term.bold(text) if y in bold else text))
+        self._frame = rows
+        if output:
+            output.append(term.move_yx(len(rows) - 1, min(len(PROMPT) + len(self.command), size[0] - 1)))
+        return ''.join(output)
+
+    def _flush(self):
+        output = self.paint()
+        if output:
+            self.term.stream.write(output)
+            self.term.stream.flush()
+
+    def _on_key(self, key):
+        if key.code == self.term.KEY_ENTER or key == '\n':
+            line, self.command = self.command.strip(), ''
+            if line:
+                self._execute(line)
+        elif key.code in (self.term.KEY_BACKSPACE, self.term.KEY_DELETE):
+            self.command = self.command[:-1]
+        elif key.code == self.term.KEY_ESCAPE:
+            self.command = ''
+        elif key and not key.is_sequence and key.isprintable():
+            self.command += key
+
+    def _execute(self, line: str):
+        try:
+            words = shlex.split(line)
+        except ValueError as e:
+            self.status = f"Cannot parse {line!r}: {e}"
+            return
+        if words[0] in ('quit', 'exit', 'q'):
+            self.done = True
+            return
+        if words[0] == 'help':
+            self.status = HELP
+            return
+        if self._worker and self._worker.is_alive():
+            self.status = f"Busy, {line!r} ignored"
+            return
+        self.status = f"Running {line}..."
+        self._worker = Thread(target=self._run_command, args=(words,), name='dashboard-command', daemon=True)
+        self._worker.start()
+
+    def _run_command(self, words: List[str]):
+        manager = self.manager
+        try:
+            command, args = words[0], words[1:]
+            if command == 'load':
+                with open(args[0], 'r') as file:
+                    manager.load_radio_modules(json.load(file))
+                result = f"Loaded {len(manager.radio_modules)} radio modules"
+            elif command == 'configure':
+                manager.configure_module(args[0], args[1], args[2], args[3] if len(args) > 3 else None)
+                result = f"Configured {args[0]} for {args[1]} ({args[2]})"
+            elif command == 'run':
+                manager.run_modules()
+                result = f"Running {len(manager.radio_modules)} radio modules"
+            elif command == 'stop':
+                for module in manager.radio_modules:
+                    module.stop()
+                result = "Stopped all radio modules"
+            elif command == 'scan':
+                modules = manager.scan_drivers()
+                result = f"Found {len(modules)} radio modules: {', '.join(module.identifier for module in modules)}"
+            else:
+                result = f"Unknown command {command!r}; {HELP}"
+        except IndexError:
+            result = f"Missing arguments; {HELP}"
+        except Exception as e:
+            result = f"{words[0]} failed: {e}"
+        self.status = result
+
+    def run(self):
+        term = self.term
+        handler = _StatusHandler(self)
+        logging.getLogger().addHandler(handler)
+        metrics.subscribe(self._on_metrics)
+        try:
+            # Start from the current state; every later change comes through the feed
+            self._on_metrics(metrics.get_metrics())
+            with term.fullscreen(), term.cbreak():
+                next_frame = time.monotonic()
+                while not self.done:
+                    key = term.inkey(timeout=max(0.0, next_frame - time.monotonic()))
+                    if key:
+                        self._on_key(key)
+                        # Echo typing at once; drawing only the prompt's changed cells costs a few bytes
+                        self._flush()
+                        continue
+                    self._flush()
+                    next_frame = max(next_frame + self.interval, time.monotonic())
+        finally:
+            metrics.unsubscribe(self._on_metrics)
+            logging.getLogger().removeHandler(handler)
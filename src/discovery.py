@@ -0,0 +1,278 @@
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Any
+from inventory import Inventory
+
+logger = logging.getLogger(__name__)
+
+# Same values as VID_SILABS/PID_CP210x in radios/cc1101/registers.py
+VID_SILABS = 0x10C4
+PID_CP210x = 0xEA60
+VID_TI = 0x0451
+PID_CC2500 = 0x16AE
+PID_CC2540 = 0x16B3
+
+# (vid, pid) -> module_type
+KNOWN_SERIAL_IDS = {
+    (VID_SILABS, PID_CP210x): 'cc1101',
+}
+KNOWN_USB_IDS = {
+    (VID_TI, PID_CC2500): 'cc2500',
+    (VID_TI, PID_CC2540): 'cc2540',
+}
+
+DEFAULT_BAUD = {
+    'cc1101': 115200,
+}
+
+# Rates tried, after the default, when identifying a bridge for the first time
+BAUD_RATES = [115200, 57600, 38400, 19200, 9600]
+
+PROBE_TIMEOUT = 0.05
+
+# CC1101 commands, as in radios/cc1101/jammer.py check_cc1101
+CC1101_SRES = 0x30
+CC1101_PARTNUM_READ = 0x30 | 0x80
+CC1101_VERSION_READ = 0x31 | 0x80
+
+# CC2540 sniffer firmware, as in radios/cc2540/cc2540.c get_ident
+CC2540_GET_IDENT = 0xC0
+
+
+class Candidate:
+    def __init__(self, module_type: Optional[str], vid: Optional[int], pid: Optional[int],
+                 serial_number: Optional[str] = None, port: Optional[str] = None,
+                 bus: Optional[int] = None, address: Optional[int] = None):
+        self.module_type = module_type
+        self.vid = vid
+        self.pid = pid
+        self.serial_number = serial_number
+        self.port = port
+        self.bus = bus
+        self.address = address
+        self.baud = DEFAULT_BAUD.get(module_type)
+        # Physical location: the serial device path, or bus and hub port chain for USB
+        self.location = port
+        self.part: Optional[int] = None
+        self.version: Optional[int] = None
+        self.ident: Optional[str] = None
+
+    def __repr__(self):
+        return f"Candidate(module_type={self.module_type}, port={self.port}, vid={self.vid}, pid={self.pid})"
+
+    @property
+    def identifier(self) -> str:
+        if self.serial_number:
+            suffix = self.serial_number
+        elif self.port:
+            suffix = os.path.basename(self.port)
+        else:
+            suffix = f"{self.bus}-{self.address}"
+        return f"{self.module_type}-{suffix}"
+
+    def to_config(self) -> Dict[str, Any]:
+        return {
+            'module_type': self.module_type,
+            'identifier': self.identifier,
+            'com': self.port,
+            'baud': self.baud,
+            'vid': self.vid,
+            'pid': self.pid,
+            'serial_number': self.serial_number,
+            'usb_bus': self.bus,
+            'usb_address': self.address,
+            'part': self.part,
+            'version': self.version,
+            'ident': self.ident,
+        }
+
+    def apply_record(self, record: Dict[str, Any]):
+        for field in ('part', 'version', 'ident', 'baud'):
+            if record.get(field) is not None:
+                setattr(self, field, record[field])
+
+
+def _cc1101_read(ser, command: int) -> Optional[int]:
+    ser.write(bytes([command]))
+    response = ser.read(1)
+    return response[0] if response else None
+
+
+def probe_cc1101(candidate: Candidate, timeout: float) -> Optional[Dict[str, Any]]:
+    """Cheap check: one VERSION read at the expected baud rate."""
+    import serial
+    with serial.Serial(candidate.port, candidate.baud, timeout=timeout, write_timeout=timeout) as ser:
+        ser.reset_input_buffer()
+        version = _cc1101_read(ser, CC1101_VERSION_READ)
+    if not version:
+        return None
+    return {'version': version}
+
+
+def identify_cc1101(candidate: Candidate, timeout: float) -> Optional[Dict[str, Any]]:
+    """Full identification: find the working baud rate, reset, read part and version."""
+    import serial
+    rates = [candidate.baud] + [rate for rate in BAUD_RATES if rate != candidate.baud]
+    for baud in rates:
+        with serial.Serial(candidate.port, baud, timeout=timeout, write_timeout=timeout) as ser:
+            ser.reset_input_buffer()
+            ser.write(bytes([CC1101_SRES]))
+            time.sleep(0.01)
+            ser.reset_input_buffer()
+            part = _cc1101_read(ser, CC1101_PARTNUM_READ)
+            version = _cc1101_read(ser, CC1101_VERSION_READ)
+        if version:
+            return {'part': part, 'version': version, 'baud': baud}
+    return None
+
+
+def identify_cc2540(candidate: Candidate, timeout: float) -> Optional[Dict[str, Any]]:
+    import usb.core
+    dev = usb.core.find(bus=candidate.bus, address=candidate.address)
+    if dev is None:
+        return None
+    ident = dev.ctrl_transfer(0xC0, CC2540_GET_IDENT, 0x00, 0x00, 32, int(timeout * 1000))
+    return {'ident': bytes(ident).hex()}
+
+
+# module_type -> probe(candidate, timeout) for serial devices
+SERIAL_PROBES: Dict[str, Callable[[Candidate, float], Optional[Dict[str, Any]]]] = {
+    'cc1101': probe_cc1101,
+}
+
+# module_type -> identify(candidate, timeout), run only for hardware not in the inventory
+IDENTIFIERS: Dict[str, Callable[[Candidate, float], Optional[Dict[str, Any]]]] = {
+    'cc1101': identify_cc1101,
+    'cc2540': identify_cc2540,
+}
+
+
+def list_serial_candidates() -> List[Candidate]:
+    from serial.tools import list_ports
+    candidates = []
+    for port in list_ports.comports():
+        module_type = KNOWN_SERIAL_IDS.get((port.vid, port.pid))
+        candidates.append(Candidate(module_type, port.vid, port.pid, port.serial_number, port=port.device))
+    return candidates
+
+
+def list_usb_candidates() -> List[Candidate]:
+    try:
+        import usb.core
+    except ImportError:
+        logger.warning("pyusb not available, skipping USB radio discovery")
+        return []
+    # One bus enumeration, filtered to the parts we have drivers for
+    try:
+        devices = list(usb.core.find(find_all=True,
+                                     custom_match=lambda dev: (dev.idVendor, dev.idProduct) in KNOWN_USB_IDS))
+    except usb.core.USBError as e:
+        logger.warning(f"USB enumeration failed: {e}")
+        return []
+    except usb.core.NoBackendError:
+        logger.warning("No libusb backend available, skipping USB radio discovery")
+        return []
+    candidates = []
+    for dev in devices:
+        candidate = Candidate(KNOWN_USB_IDS[(dev.idVendor, dev.idProduct)], dev.idVendor, dev.idProduct,
+                              bus=dev.bus, address=dev.address)
+        # Addresses change on every replug, the hub port chain does not
+        ports = '.'.join(str(port) for port in (dev.port_numbers or ()))
+        candidate.location = f"usb{dev.bus}-{ports or dev.address}"
+        candidates.append(candidate)
+    return candidates
+
+
+class DiscoveryService:
+    """Finds attached radios, probing all candidate devices concurrently.
+
+    Serial ports whose VID/PID identify a known bridge are probed with that
+    radio's probe only. Ports with unknown IDs are skipped unless
+    probe_unknown is set, in which case every serial probe is tried on them.
+    USB parts are identified by VID/PID alone.
+
+    With an inventory, hardware seen before is confirmed with one cheap probe
+    at its last working baud rate; only new or changed hardware goes through
+    full identification. Without use_cache every radio is fully identified,
+    and the inventory is refreshed for them; records of absent radios stay.
+    """
+
+    def __init__(self, probe_timeout: float = PROBE_TIMEOUT, probe_unknown: bool = False, max_workers: int = 16,
+                 inventory: Optional[Inventory] = None, use_cache: bool = True):
+        self.probe_timeout = probe_timeout
+        self.probe_unknown = probe_unknown
+        self.max_workers = max_workers
+        self.inventory = inventory
+        self.use_cache = use_cache
+
+    def discover(self) -> List[Candidate]:
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="discovery") as executor:
+            serial_future = executor.submit(list_serial_candidates)
+            usb_future = executor.submit(list_usb_candidates)
+            try:
+                serial_candidates = serial_future.result()
+            except ImportError:
+                logger.warning("pyserial not available, skipping serial radio discovery")
+                serial_candidates = []
+
+            resolving = [executor.submit(self._resolve, candidate, [candidate.module_type])
+                         for candidate in usb_future.result()]
+            for candidate in serial_candidates:
+                if candidate.module_type:
+                    resolving.append(executor.submit(self._resolve, candidate, [candidate.module_type]))
+                elif self.probe_unknown:
+                    resolving.append(executor.submit(self._resolve, candidate, list(SERIAL_PROBES)))
+            found = [candidate for candidate in (future.result() for future in resolving) if candidate]
+
+        if self.inventory:
+            self.inventory.save()
+        logger.info(f"Discovered {len(found)} radio(s): {found}")
+        return found
+
+    def discover_configs(self) -> List[Dict[str, Any]]:
+        return [candidate.to_config() for candidate in self.discover()]
+
+    def _resolve(self, candidate: Candidate, module_types: List[str]) -> Optional[Candidate]:
+        for module_type in module_types:
+            if candidate.module_type != module_type:
+                candidate.module_type = module_type
+                candidate.baud = DEFAULT_BAUD.get(module_type)
+            try:
+                if self._confirm_cached(candidate) or self._identify(candidate):
+                    return candidate
+            except Exception as e:
+                logger.debug(f"Probe {module_type} on {candidate.location} failed: {e}")
+        return None
+
+    def _confirm_cached(self, candidate: Candidate) -> bool:
+        record = self.inventory.get(candidate) if self.inventory and self.use_cache else None
+        if not record or record.get('module_type') != candidate.module_type:
+            return False
+        candidate.apply_record(record)
+        probe = SERIAL_PROBES.get(candidate.module_type) if candidate.port else None
+        if probe:
+            result = probe(candidate, self.probe_timeout)
+            if not result or result.get('version') != record.get('version'):
+                logger.info(f"{candidate.identifier} changed since last seen, re-identifying")
+                return False
+        # USB parts were just enumerated at the same VID/PID and location
+        return True
+
+    def _identify(self, candidate: Candidate) -> bool:
+        if self.inventory:
+            identify = IDENTIFIERS.get(candidate.module_type)
+        else:
+            identify = SERIAL_PROBES.get(candidate.module_type) if candidate.port else None
+        if identify:
+            result = identify(candidate, self.probe_timeout)
+            if result is None:
+                return False
+            candidate.apply_record(result)
+        elif candidate.port:
+            # A serial port with no way to check what is behind it
+            return False
+        if self.inventory:
+            self.inventory.update(candidate)
+        return True
@@ -0,0 +1,32 @@
+import importlib.util
+import os
+import sys
+from threading import Lock
+
+RADIOS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'radios')
+
+_scripts = {}
+_lock = Lock()
+
+
+def load_radio_script(relpath: str):
+    """Import a script from radios/ (e.g. 'cc1101/jammer.py') once, under a unique module name.
+
+    The scripts import their siblings by bare name (`from registers import *`),
+    so their directory goes on sys.path, and share file names across radios,
+    so they are not imported by name.
+    """
+    with _lock:
+        module = _scripts.get(relpath)
+        if module is not None:
+            return module
+        path = os.path.join(RADIOS_DIR, relpath)
+        script_dir = os.path.dirname(path)
+        if script_dir not in sys.path:
+            sys.path.append(script_dir)
+        name = 'radios_' + os.path.splitext(relpath)[0].replace('/', '_')
+        spec = importlib.util.spec_from_file_location(name, path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        _scripts[relpath] = module
+        return module
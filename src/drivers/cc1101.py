@@ -0,0 +1,77 @@
+import logging
+from threading import Lock
+from typing import List, Dict, Any, Optional
+from radio import RadioModule, Capabilities
+from target import Target
+from drivers import load_radio_script
+
+logger = logging.getLogger(__name__)
+
+# 433.05-434.775 MHz ISM band in 25 kHz steps, as in radios/cc1101/jammer.py
+DEFAULT_SCAN_RANGE = [433.05 + 0.025 * i for i in range(int((434.775 - 433.05) / 0.025) + 1)]
+
+
+class CC1101Module(RadioModule):
+    """CC1101 behind a CP210x USB-UART bridge (radios/cc1101/jammer.py)."""
+
+    capabilities = Capabilities(
+        bands=[(300.0, 348.0), (387.0, 464.0), (779.0, 928.0)],
+        max_hop_rate=30.0,  # three register writes per retune over the UART bridge
+        burst=True,
+    )
+
+    def __init__(self, identifier: str, config: Dict[str, Any]):
+        super().__init__(identifier, config)
+        self.baud = self.baud or 115200
+        self.scan_range: List[float] = config.get('scan_range', DEFAULT_SCAN_RANGE)
+        self.settle = config.get('settle', 0.1)
+        self.ser = None
+        self.frequency: Optional[float] = None
+        self._lock = Lock()
+        self._jammer = load_radio_script('cc1101/jammer.py')
+
+    def open(self):
+        with self._lock:
+            if self.ser is not None and self.ser.is_open:
+                return
+            if not self.comport:
+                raise RuntimeError(f"No serial port configured for {self.identifier}")
+            ser = self._jammer.init_serial(self.comport, self.baud)
+            if ser is None:
+                raise ConnectionError(f"Could not open {self.comport} for {self.identifier}")
+            self._jammer.reset_cc1101(ser)
+            self._jammer.configure_cc1101(ser)
+            self.ser = ser
+            self.frequency = None
+
+    def close(self):
+        with self._lock:
+            if self.ser is not None:
+                self.ser.close()
+                self.ser = None
+
+    def tune(self, frequency: float):
+        if frequency == self.frequency:
+            return
+        self.open()
+        self._jammer.set_frequency(self.ser, *self._jammer.convert_frequency_to_registers(frequency))
+        self.frequency = frequency
+
+    def transmit(self, payload: bytes, target: Optional[Target] = None):
+        self.open()
+        self._jammer.send_packet(self.ser, payload)
+
+    def default_channels(self) -> List[float]:
+        return list(self.scan_range)
+
+    def scan_for_devices(self) -> List[Target]:
+        self.open()
+        self.frequency = None
+        targets = []
+        channels = self.scan_range if self.channels is None else self.channels
+        for frequency, rssi, carrier_sense in self._jammer.scan_channels(self.ser, channels, self.settle):
+            self._observe('rssi', f"{frequency:.3f}MHz", frequency=frequency, rssi=rssi,
+                          extra={"carrier_sense": bool(carrier_sense)})
+            if carrier_sense:
+                targets.append(Target(f"{frequency:.3f}MHz", rssi, self.baud, self.comport, frequency=frequency))
+        return targets
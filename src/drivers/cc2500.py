@@ -0,0 +1,111 @@
+import logging
+from threading import Lock
+from typing import List, Dict, Any, Optional
+from radio import RadioModule, Capabilities
+from target import Target
+from drivers import load_radio_script
+from priors import DEFAULT_PRIORS_PATH, location_key, open_priors
+
+logger = logging.getLogger(__name__)
+
+VID_TI = 0x0451
+PID_CC2500 = 0x16AE
+
+# configure_cc2500 programs FREQ to 0x5C4EC4 (channel 0 at 2400 MHz) and leaves CHANSPC at its reset value
+BASE_FREQUENCY = 2399.999  # MHz
+CHANNEL_SPACING = 0.199951  # MHz
+
+
+def channel_to_frequency(channel: int) -> float:
+    return BASE_FREQUENCY + channel * CHANNEL_SPACING
+
+
+def frequency_to_channel(frequency: float) -> int:
+    return max(0, min(254, round((frequency - BASE_FREQUENCY) / CHANNEL_SPACING)))
+
+
+class CC2500Module(RadioModule):
+    """CC2500 on a TI USB dongle driven by vendor control transfers (radios/cc2500/cc2500.py)."""
+
+    capabilities = Capabilities(
+        bands=[(BASE_FREQUENCY, 2483.5)],  # channel 0 sits a hair under 2400 MHz
+        max_hop_rate=200.0,  # one CHANNR write per retune
+        burst=True,
+    )
+
+    def __init__(self, identifier: str, config: Dict[str, Any]):
+        super().__init__(identifier, config)
+        self.band = config.get('band', 'ISM')
+        self.dev = None
+        self.channel: Optional[int] = None
+        self._lock = Lock()
+        self._cc2500 = load_radio_script('cc2500/cc2500.py')
+        # Channel history per site, so repeat visits check the channels that had devices first
+        self.priors = open_priors(config.get('priors_path', DEFAULT_PRIORS_PATH)) if config.get('priors', True) else None
+        self.location = location_key(name=config.get('location'))
+
+    def open(self):
+        with self._lock:
+            if self.dev is not None:
+                return
+            import usb.core
+            import usb.util
+            match = {'idVendor': self.config.get('vid', VID_TI), 'idProduct': self.config.get('pid', PID_CC2500)}
+            if self.config.get('usb_bus') is not None:
+                match.update(bus=self.config['usb_bus'], address=self.config['usb_address'])
+            dev = usb.core.find(**match)
+            if dev is None:
+                raise ConnectionError(f"CC2500 dongle for {self.identifier} not found")
+            dev.set_configuration()
+            usb.util.claim_interface(dev, 0)
+            self._cc2500.reset_cc2500(dev)
+            self._cc2500.configure_cc2500(dev, self.band)
+            self.dev = dev
+            self.channel = None
+
+    def close(self):
+        with self._lock:
+            if self.dev is None:
+                return
+            import usb.util
+            try:
+                self._cc2500.close_queue(self.dev)
+            finally:
+                # A transfer that failed before the close is raised above, but the interface is released regardless
+                usb.util.release_interface(self.dev, 0)
+                usb.util.dispose_resources(self.dev)
+                self.dev = None
+
+    def tune(self, frequency: float):
+        channel = frequency_to_channel(frequency)
+        if channel == self.channel:
+            return
+        self.open()
+        self._cc2500.set_channel(self.dev, channel)
+        self.channel = channel
+
+    def transmit(self, payload: bytes, target: Optional[Target] = None):
+        self.open()
+        self._cc2500.send_packet(self.dev, payload)
+
+    def default_channels(self) -> List[float]:
+        return [channel_to_frequency(channel) for channel in range(255)]
+
+    def scan_for_devices(self) -> List[Target]:
+        self.open()
+        self.channel = None
+        # The allocator's channels once it has assigned any, else the whole band
+        if self.channels is None:
+            channels = range(255)
+        else:
+            channels = sorted({frequency_to_channel(frequency) for frequency in self.channels})
+        if not channels:
+            return []
+        if self.priors:
+            channel = self._cc2500.scan_with_priors(self.dev, self.priors, self.location, self.band, channels)
+        else:
+            channel = self._cc2500.scan_for_devices(self.dev, channels)
+        if channel is None:
+            return []
+        frequency = channel_to_frequency(channel)
+        return [Target(f"cc2500-ch{channel}", 0, self.baud, self.comport, frequency=frequency)]
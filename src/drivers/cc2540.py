@@ -0,0 +1,112 @@
+import logging
+from threading import Lock
+from typing import List, Dict, Any, Optional
+from radio import RadioModule, Capabilities
+from target import Target
+from drivers import load_radio_script
+
+logger = logging.getLogger(__name__)
+
+VID_TI = 0x0451
+PID_CC2540 = 0x16B3
+
+ADVERTISING_CHANNELS = [37, 38, 39]
+
+
+def ble_channel_to_frequency(channel: int) -> float:
+    if channel == 37:
+        return 2402.0
+    if channel == 38:
+        return 2426.0
+    if channel == 39:
+        return 2480.0
+    if channel <= 10:
+        return 2404.0 + 2 * channel
+    return 2428.0 + 2 * (channel - 11)
+
+
+def frequency_to_ble_channel(frequency: float) -> int:
+    return min(range(40), key=lambda channel: abs(ble_channel_to_frequency(channel) - frequency))
+
+
+class CC2540Module(RadioModule):
+    """CC2540 BLE sniffer dongle (radios/cc2540), driven over pyusb."""
+
+    capabilities = Capabilities(
+        bands=[(2402.0, 2480.0)],
+        max_hop_rate=50.0,  # SET_CHAN is two control transfers
+        burst=False,
+        max_packet_len=32,  # FUZZ_PACKET_SIZE in cc2540.c
+        channels=sorted(ble_channel_to_frequency(channel) for channel in range(40)),
+    )
+
+    def __init__(self, identifier: str, config: Dict[str, Any]):
+        super().__init__(identifier, config)
+        self.dwell = config.get('scan_dwell', 1.0)
+        self.dev = None
+        self.channel: Optional[int] = None
+        self._lock = Lock()
+        self._cc2540 = load_radio_script('cc2540/cc2540.py')
+
+    def open(self):
+        with self._lock:
+            if self.dev is not None:
+                return
+            import usb.core
+            match = {'idVendor': self.config.get('vid', VID_TI), 'idProduct': self.config.get('pid', PID_CC2540)}
+            if self.config.get('usb_bus') is not None:
+                match.update(bus=self.config['usb_bus'], address=self.config['usb_address'])
+            dev = usb.core.find(**match)
+            if dev is None:
+                raise ConnectionError(f"CC2540 sniffer for {self.identifier} not found")
+            dev.set_configuration()
+            channel = ADVERTISING_CHANNELS[0]
+            self._cc2540.setup(dev, channel)
+            self.dev = dev
+            self.channel = channel
+
+    def close(self):
+        with self._lock:
+            if self.dev is None:
+                return
+            import usb.util
+            self._cc2540.stop_capture(self.dev)
+            usb.util.dispose_resources(self.dev)
+            self.dev = None
+
+    def _set_channel(self, channel: int):
+        if channel != self.channel:
+            self._cc2540.set_channel(self.dev, channel)
+            self.channel = channel
+
+    def tune(self, frequency: float):
+        self.open()
+        self._set_channel(frequency_to_ble_channel(frequency))
+
+    def transmit(self, payload: bytes, target: Optional[Target] = None):
+        self.open()
+        self._cc2540.send_data(self.dev, payload)
+
+    def default_channels(self) -> List[float]:
+        return [ble_channel_to_frequency(channel) for channel in ADVERTISING_CHANNELS]
+
+    def scan_for_devices(self) -> List[Target]:
+        self.open()
+        seen: Dict[str, Target] = {}
+        # Frequencies from an explicit plan may still snap to the same BLE channel
+        if self.channels is None:
+            channels = ADVERTISING_CHANNELS
+        else:
+            channels = list(dict.fromkeys(frequency_to_ble_channel(frequency) for frequency in self.channels))
+        for channel in channels:
+            self._set_channel(channel)
+            for frame in self._cc2540.read_frames(self.dev, self.dwell):
+                parsed = self._cc2540.parse_frame(frame)
+                if parsed is None:
+                    continue
+                mac_address, rssi = parsed
+                target = seen.get(mac_address)
+                if target is None or rssi > target.rssi:
+                    seen[mac_address] = Target(mac_address, rssi, self.baud, self.comport,
+                                               frequency=ble_channel_to_frequency(channel))
+        return list(seen.values())
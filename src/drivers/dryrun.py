@@ -0,0 +1,34 @@
+import logging
+from typing import List, Dict, Any
+from radio import RadioModule, Capabilities
+from target import Target
+
+logger = logging.getLogger(__name__)
+
+
+class DryRunModule(RadioModule):
+    """A radio that transmits nowhere, for trying campaigns and workers without hardware.
+
+    scan_for_devices() reports the targets listed in config['targets']
+    (Target.to_dict() form); transmit() only counts bytes.
+    """
+
+    capabilities = Capabilities(
+        bands=[(300.0, 928.0), (2400.0, 2483.5)],
+        max_hop_rate=1000.0,
+        burst=True,
+    )
+
+    def __init__(self, identifier: str, config: Dict[str, Any]):
+        super().__init__(identifier, config)
+        self.bytes_sent = 0
+        self.frequency = None
+
+    def scan_for_devices(self) -> List[Target]:
+        return [Target.from_dict(data) for data in self.config.get('targets', [])]
+
+    def tune(self, frequency: float):
+        self.frequency = frequency
+
+    def transmit(self, payload: bytes, target: Target = None):
+        self.bytes_sent += len(payload)
@@ -0,0 +1,147 @@
+import logging
+import os
+import time
+from threading import Event, Lock, Thread
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_GPS_BAUD = 4800  # NMEA 0183
+
+
+class Fix:
+    """A position from the GPS; timestamp is local time.time() when the sentence arrived."""
+
+    def __init__(self, lat: float, lon: float, alt: Optional[float], timestamp: float, quality: int = 1,
+                 satellites: int = 0):
+        self.lat = lat
+        self.lon = lon
+        self.alt = alt
+        self.timestamp = timestamp
+        self.quality = quality
+        self.satellites = satellites
+
+    def __repr__(self):
+        return f"Fix(lat={self.lat:.6f}, lon={self.lon:.6f}, alt={self.alt}, satellites={self.satellites})"
+
+
+def nmea_checksum_ok(sentence: str) -> bool:
+    if '*' not in sentence:
+        return True  # some receivers omit it
+    body, _, checksum = sentence[1:].partition('*')
+    value = 0
+    for char in body:
+        value ^= ord(char)
+    try:
+        return value == int(checksum[:2], 16)
+    except ValueError:
+        return False
+
+
+def _coordinate(value: str, hemisphere: str) -> float:
+    # ddmm.mmmm / dddmm.mmmm
+    degrees_len = value.index('.') - 2
+    degrees = float(value[:degrees_len]) + float(value[degrees_len:]) / 60
+    return -degrees if hemisphere in ('S', 'W') else degrees
+
+
+def parse_nmea(sentence: str, timestamp: Optional[float] = None) -> Optional[Fix]:
+    """A Fix from a GGA or RMC sentence, or None for other sentences and sentences without a fix."""
+    sentence = sentence.strip()
+    if not sentence.startswith('$') or not nmea_checksum_ok(sentence):
+        return None
+    fields = sentence.split('*')[0].split(',')
+    kind = fields[0][3:]
+    timestamp = timestamp if timestamp is not None else time.time()
+    try:
+        if kind == 'GGA' and len(fields) > 9:
+            quality = int(fields[6] or 0)
+            if not quality or not fields[2] or not fields[4]:
+                return None
+            alt = float(fields[9]) if fields[9] else None
+            return Fix(_coordinate(fields[2], fields[3]), _coordinate(fields[4], fields[5]), alt, timestamp,
+                       quality, int(fields[7] or 0))
+        if kind == 'RMC' and len(fields) > 6:
+            if fields[2] != 'A' or not fields[3] or not fields[5]:
+                return None
+            return Fix(_coordinate(fields[3], fields[4]), _coordinate(fields[5], fields[6]), None, timestamp)
+    except ValueError:
+        logger.debug(f"Ignoring malformed NMEA sentence: {sentence}")
+    return None
+
+
+class GpsReader:
+    """Follows an NMEA GPS on a serial port and keeps the latest fix.
+
+    source may also be a file of recorded NMEA sentences, replayed at
+    replay_interval seconds per sentence, for bench runs without a receiver.
+    """
+
+    def __init__(self, source: str, baudrate: int = DEFAULT_GPS_BAUD, max_age: float = 5.0,
+                 replay_interval: float = 0.1):
+        self.source = source
+        self.baudrate = baudrate
+        self.max_age = max_age
+        self.replay_interval = replay_interval
+        self.fixes = 0
+        self._fix: Optional[Fix] = None
+        self._lock = Lock()
+        self._stop = Event()
+        self._thread: Optional[Thread] = None
+
+    @property
+    def fix(self) -> Optional[Fix]:
+        """The latest fix, or None if there is none newer than max_age seconds."""
+        with self._lock:
+            fix = self._fix
+        if fix is None or time.time() - fix.timestamp > self.max_age:
+            return None
+        return fix
+
+    def start(self):
+        self._stop.clear()
+        self._thread = Thread(target=self._run, name='gps', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread and self._thread.is_alive():
+            self._thread.join()
+
+    def feed(self, sentence: str):
+        fix = parse_nmea(sentence)
+        if fix is not None:
+            with self._lock:
+                self._fix = fix
+            self.fixes += 1
+
+    def _run(self):
+        try:
+            if os.path.isfile(self.source):
+                self._replay()
+            else:
+                self._follow_serial()
+        except Exception as e:
+            logger.error(f"GPS reader on {self.source} stopped: {e}")
+
+    def _replay(self):
+        while not self._stop.is_set():
+            with open(self.source, 'r', errors='replace') as file:
+                for line in file:
+                    if self._stop.wait(self.replay_interval):
+                        return
+                    self.feed(line)
+
+    def _follow_serial(self):
+        import serial
+        with serial.Serial(self.source, self.baudrate, timeout=1) as ser:
+            logger.info(f"Reading GPS on {self.source}")
+            while not self._stop.is_set():
+                line = ser.readline()
+                if line:
+                    self.feed(line.decode('ascii', errors='replace'))
+
+    def status(self) -> Dict[str, Optional[float]]:
+        fix = self.fix
+        return {"lat": fix.lat if fix else None, "lon": fix.lon if fix else None,
+                "satellites": fix.satellites if fix else None, "fixes": self.fixes}
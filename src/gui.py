@@ -1,20 +1,18 @@
-from flask import Flask, render_template, jsonify, request
+from flask import Flask, Response, render_template, jsonify, request
 from session import Session
+from memory import DEFAULT_DEVICE_TTL, DEFAULT_MAX_DEVICES, BoundedDict, MemoryBudget
+import metrics
+import profiling
 import logging
 
 logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
 
-# Fuzzer metrics
-metrics = {
-    "time": "00:00:00",
-    "packets_sent": 0,
-    "connected_to_target": False
-}
-
-# Store scanned devices temporarily
-scanned_devices = []
+# Scanned devices by name, until not seen for a while
+scanned_devices = BoundedDict(max_entries=DEFAULT_MAX_DEVICES, ttl=DEFAULT_DEVICE_TTL)
+memory_budget = MemoryBudget()
+memory_budget.register_mapping('scanned_devices', scanned_devices)
 
 # Initialize session
 session = Session()
@@ -25,31 +23,66 @@ def index():
 
 @app.route('/api/metrics', methods=['GET'])
 def get_metrics():
-    return jsonify(metrics)
+    return jsonify(metrics.get_metrics())
 
 @app.route('/api/metrics', methods=['POST'])
 def update_metrics():
-    global metrics
     data = request.json
-    metrics.update(data)
-    return jsonify(metrics)
+    metrics.update_metrics(data)
+    return jsonify(metrics.get_metrics())
+
+@app.route('/api/rate', methods=['GET'])
+def get_rate():
+    if not session.radio_module:
+        return jsonify({"error": "No radio module set"}), 404
+    return jsonify(session.radio_module.rate_stats())
+
+@app.route('/api/rate', methods=['POST'])
+def set_rate():
+    if not session.radio_module:
+        return jsonify({"error": "No radio module set"}), 404
+    data = request.json
+    try:
+        session.radio_module.set_rate(data.get('pps'), data.get('bps'), data.get('burst_packets'),
+                                      data.get('burst_bytes'), target=data.get('target'))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify(session.radio_module.rate_stats())
+
+@app.route('/api/profile', methods=['GET'])
+def get_profile():
+    return jsonify(profiling.report())
+
+@app.route('/api/profile', methods=['POST'])
+def set_profile():
+    data = request.json
+    if data.get('enabled'):
+        if not profiling.enabled:
+            profiling.reset()
+            profiling.enable(data.get('sample_interval', profiling.DEFAULT_SAMPLE_INTERVAL))
+    else:
+        profiling.disable()
+    return jsonify(profiling.report())
+
+@app.route('/api/profile/stacks', methods=['GET'])
+def get_profile_stacks():
+    return Response(''.join(line + '\n' for line in profiling.collapsed_stacks()), mimetype='text/plain')
 
 @app.route('/api/devices', methods=['GET'])
 def get_devices():
-    return jsonify([device.__dict__ for device in scanned_devices])
+    scanned_devices.expire()
+    return jsonify([device.to_dict() for device in scanned_devices.values()])
 
 @app.route('/api/select_target', methods=['POST'])
 def select_target():
-    global scanned_devices
     data = request.json
-    target_identifier = data.get('identifier')
-    selected_target = next((device for device in scanned_devices if device.identifier == target_identifier), None)
-    
+    selected_target = scanned_devices.get(data.get('identifier'))
+
     if not selected_target:
         return jsonify({"error": "Target not found"}), 404
 
     session.set_mode('example_module', 'fuzzing', 'selected', target=selected_target)
-    return jsonify({"message": "Target selected", "target": selected_target.__dict__})
+    return jsonify({"message": "Target selected", "target": selected_target.to_dict()})
 
 if __name__ == '__main__':
     logging.basicConfig(level=logging.INFO)
@@ -61,7 +94,9 @@ if __name__ == '__main__':
     
     # Simulate scanning devices
     for module in session.radio_modules:
-        scanned_devices.extend(module.scan_for_devices())
+        for device in module.scan_for_devices():
+            scanned_devices[device.name] = device
+    memory_budget.start()
 
     # Start the session
     session.start()
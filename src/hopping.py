@@ -0,0 +1,186 @@
+import logging
+import math
+import time
+from threading import Thread, Event, Lock
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+import tracing
+
+logger = logging.getLogger(__name__)
+
+# Event.wait() overshoots by up to a scheduler tick, so the last stretch before a deadline is spun
+DEFAULT_SPIN = 0.001
+
+
+class DwellStats:
+    """Achieved dwell and hop start jitter for one frequency."""
+
+    def __init__(self, requested: float):
+        self.requested = requested
+        self.hops = 0
+        self.overruns = 0
+        self.min_dwell = math.inf
+        self.max_dwell = 0.0
+        self._dwell_mean = 0.0
+        self._dwell_m2 = 0.0
+        self._late_mean = 0.0
+        self._late_m2 = 0.0
+        self.max_late = 0.0
+
+    def add(self, dwell: float, late: float, overrun: bool):
+        self.hops += 1
+        self.overruns += overrun
+        self.min_dwell = min(self.min_dwell, dwell)
+        self.max_dwell = max(self.max_dwell, dwell)
+        self.max_late = max(self.max_late, late)
+        # Welford's running mean/variance, so stats cost O(1) per hop
+        delta = dwell - self._dwell_mean
+        self._dwell_mean += delta / self.hops
+        self._dwell_m2 += delta * (dwell - self._dwell_mean)
+        delta = late - self._late_mean
+        self._late_mean += delta / self.hops
+        self._late_m2 += delta * (late - self._late_mean)
+
+    def as_dict(self) -> Dict[str, float]:
+        variance = self._dwell_m2 / (self.hops - 1) if self.hops > 1 else 0.0
+        late_variance = self._late_m2 / (self.hops - 1) if self.hops > 1 else 0.0
+        return {
+            "requested": self.requested,
+            "hops": self.hops,
+            "mean_dwell": self._dwell_mean,
+            "min_dwell": self.min_dwell if self.hops else 0.0,
+            "max_dwell": self.max_dwell,
+            "dwell_stdev": math.sqrt(variance),
+            "mean_late": self._late_mean,
+            "max_late": self.max_late,
+            "jitter": math.sqrt(late_variance),
+            "overruns": self.overruns,
+        }
+
+
+class HopScheduler(Thread):
+    """Runs a hop plan on its own thread against absolute monotonic deadlines.
+
+    Every hop is given a slot of its requested dwell. The slot boundaries are
+    fixed from the start of the plan, so time spent retuning and keying the
+    radio comes out of the slot rather than being added on top of it, and
+    errors never accumulate from one hop to the next.
+    """
+
+    def __init__(self, plan: Sequence[Tuple[Any, float]], retune: Callable[[Any], None],
+                 tx_on: Optional[Callable[[], None]] = None, tx_off: Optional[Callable[[], None]] = None,
+                 cycles: Optional[int] = None, spin: float = DEFAULT_SPIN,
+                 clock: Callable[[], float] = time.monotonic):
+        super().__init__(name="hop-scheduler", daemon=True)
+        if not plan:
+            raise ValueError("Hop plan must contain at least one frequency")
+        self.plan: List[Tuple[Any, float]] = list(plan)
+        self.retune = retune
+        self.tx_on = tx_on
+        self.tx_off = tx_off
+        self.cycles = cycles
+        self.spin = spin
+        self.clock = clock
+        self.error: Optional[BaseException] = None
+        self._stop_event = Event()
+        self._lock = Lock()
+        self._stats: Dict[Any, DwellStats] = {}
+        self._plan_version = 0
+
+    def stop(self, timeout: Optional[float] = None):
+        self._stop_event.set()
+        if self.is_alive():
+            self.join(timeout)
+
+    def stopped(self) -> bool:
+        return self._stop_event.is_set()
+
+    def set_plan(self, plan: Sequence[Tuple[Any, float]]):
+        """Replace the plan while running; the next hop starts it from the top, on the same slot timing."""
+        if not plan:
+            raise ValueError("Hop plan must contain at least one frequency")
+        with self._lock:
+            self.plan = list(plan)
+            self._plan_version += 1
+
+    def run(self):
+        try:
+            self._run_plan()
+        except Exception as e:
+            self.error = e
+            logger.error(f"Hop scheduler failed: {e}")
+
+    def _run_plan(self):
+        cycle = 0
+        deadline = self.clock()
+        with self._lock:
+            plan, version = self.plan, self._plan_version
+        index = 0
+        while not self._stop_event.is_set() and (self.cycles is None or cycle < self.cycles):
+            if self._plan_version != version:
+                with self._lock:
+                    plan, version = self.plan, self._plan_version
+                index = 0
+            frequency, dwell = plan[index]
+            started = self.clock()
+            late = started - deadline
+            if late > dwell:
+                # Stalled for more than a whole slot: resync instead of bursting to catch up
+                deadline = started
+            if tracing.enabled and isinstance(frequency, (int, float)):
+                tracing.trace_value(tracing.HOP, 'hop', frequency, int(max(late, 0.0) * 1e6))
+            self.retune(frequency)
+            if self.tx_on:
+                self.tx_on()
+            on_air = self.clock()
+            slot_end = deadline + dwell
+            overrun = on_air >= slot_end
+            self._wait_until(slot_end)
+            off_air = self.clock()
+            if self.tx_off:
+                self.tx_off()
+            self._record(frequency, dwell, off_air - on_air, late, overrun)
+            deadline = slot_end
+            index += 1
+            if index == len(plan):
+                index = 0
+                cycle += 1
+
+    def _wait_until(self, deadline: float):
+        while True:
+            remaining = deadline - self.clock()
+            if remaining <= 0:
+                return
+            if remaining > self.spin and self._stop_event.wait(remaining - self.spin):
+                return
+
+    def _record(self, frequency: Any, dwell: float, achieved: float, late: float, overrun: bool):
+        with self._lock:
+            stats = self._stats.get(frequency)
+            if stats is None:
+                stats = self._stats[frequency] = DwellStats(dwell)
+            stats.requested = dwell  # a new plan may have changed it
+            stats.add(achieved, max(late, 0.0), overrun)
+
+    def stats(self) -> Dict[Any, Dict[str, float]]:
+        """Snapshot of the per-frequency dwell statistics."""
+        with self._lock:
+            return {frequency: stats.as_dict() for frequency, stats in self._stats.items()}
+
+    def log_stats(self, level: int = logging.INFO):
+        for frequency, stats in self.stats().items():
+            logger.log(level, f"{frequency}: {stats['hops']} hops, dwell {stats['mean_dwell'] * 1e3:.3f} ms "
+                              f"(requested {stats['requested'] * 1e3:.3f} ms, stdev {stats['dwell_stdev'] * 1e3:.3f} ms), "
+                              f"jitter {stats['jitter'] * 1e3:.3f} ms, {stats['overruns']} overruns")
+
+
+def run_plan(scheduler: HopScheduler) -> Dict[Any, Dict[str, float]]:
+    """Start a scheduler and block until it finishes or the user interrupts it."""
+    scheduler.start()
+    try:
+        while scheduler.is_alive():
+            scheduler.join(0.5)  # short joins keep KeyboardInterrupt deliverable
+    finally:
+        scheduler.stop()
+    if scheduler.error:
+        raise scheduler.error
+    return scheduler.stats()
@@ -0,0 +1,72 @@
+import json
+import logging
+import os
+import time
+from threading import Lock
+from typing import Dict, Any, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_INVENTORY_PATH = os.path.join(os.path.expanduser('~'), '.wardriver', 'inventory.json')
+
+# Fields copied between a discovery candidate and its inventory record
+RECORD_FIELDS = ('module_type', 'vid', 'pid', 'serial_number', 'location', 'part', 'version', 'ident', 'baud')
+
+
+class Inventory:
+    """On-disk record of identified hardware, so known radios skip full identification.
+
+    Records are keyed by USB serial number when the device has one, otherwise
+    by VID/PID plus the port path it was found on.
+    """
+
+    def __init__(self, path: str = DEFAULT_INVENTORY_PATH):
+        self.path = path
+        self.records: Dict[str, Dict[str, Any]] = {}
+        self.dirty = False
+        self._lock = Lock()
+        self.load()
+
+    @staticmethod
+    def key(candidate) -> str:
+        ids = f"{candidate.vid or 0:04x}:{candidate.pid or 0:04x}"
+        if candidate.serial_number:
+            return f"{ids}#{candidate.serial_number}"
+        return f"{ids}@{candidate.location}"
+
+    def load(self):
+        try:
+            with open(self.path, 'r') as file:
+                self.records = json.load(file)
+        except FileNotFoundError:
+            self.records = {}
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable inventory {self.path}: {e}")
+            self.records = {}
+
+    def get(self, candidate) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            return self.records.get(self.key(candidate))
+
+    def update(self, candidate):
+        record = {field: getattr(candidate, field) for field in RECORD_FIELDS}
+        record['last_seen'] = time.time()
+        with self._lock:
+            self.records[self.key(candidate)] = record
+            self.dirty = True
+
+    def forget(self, candidate):
+        with self._lock:
+            if self.records.pop(self.key(candidate), None) is not None:
+                self.dirty = True
+
+    def save(self):
+        with self._lock:
+            if not self.dirty:
+                return
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, 'w') as file:
+                json.dump(self.records, file, indent=2)
+            os.replace(tmp_path, self.path)
+            self.dirty = False
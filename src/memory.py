@@ -0,0 +1,229 @@
+import gc
+import logging
+import os
+import time
+from collections import OrderedDict
+from collections.abc import MutableMapping
+from threading import Event, Lock, Thread
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+from metrics import update_metrics
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_REPORT_INTERVAL = 60.0
+DEFAULT_TRIM_FRACTION = 0.25
+# Enough for a busy BLE survey, where privacy addresses rotate every few minutes
+DEFAULT_MAX_DEVICES = 4096
+DEFAULT_DEVICE_TTL = 600.0
+DEFAULT_MAX_PROGRESS = 4096
+
+
+def default_ceiling() -> Optional[int]:
+    """Bytes of RSS to stay under, from WARDRIVER_MEMORY_LIMIT (MB); None for no ceiling."""
+    limit = os.environ.get('WARDRIVER_MEMORY_LIMIT')
+    return int(float(limit) * 1024 * 1024) if limit else None
+
+
+def process_rss() -> int:
+    """Resident set size of this process in bytes; 0 where it cannot be measured."""
+    try:
+        with open('/proc/self/statm') as file:
+            return int(file.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return 0  # Windows
+    # Peak rather than current, but all there is off Linux (kB on Linux, bytes on macOS)
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class BoundedDict(MutableMapping):
+    """A mapping that keeps its max_entries most recently used items, each until unused for ttl seconds.
+
+    Reads and writes both count as use. Expired items are dropped lazily on
+    writes and by expire(); trim() drops the least recently used share on
+    demand, e.g. when the process passes its memory ceiling.
+    """
+
+    def __init__(self, max_entries: Optional[int] = None, ttl: Optional[float] = None,
+                 on_evict: Optional[Callable[[Any, Any], None]] = None, clock: Callable[[], float] = time.monotonic):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.on_evict = on_evict
+        self.clock = clock
+        self.evictions = 0
+        # key -> (value, last used); least recently used first
+        self._items: 'OrderedDict[Any, Tuple[Any, float]]' = OrderedDict()
+        self._lock = Lock()
+
+    def __getitem__(self, key):
+        with self._lock:
+            value, _ = self._items[key]
+            self._items[key] = (value, self.clock())
+            self._items.move_to_end(key)
+            return value
+
+    def __setitem__(self, key, value):
+        with self._lock:
+            self._items[key] = (value, self.clock())
+            self._items.move_to_end(key)
+            evicted = self._expire_locked()
+            while self.max_entries is not None and len(self._items) > self.max_entries:
+                evicted.append(self._items.popitem(last=False))
+        self._evicted(evicted)
+
+    def __delitem__(self, key):
+        with self._lock:
+            del self._items[key]
+
+    def __iter__(self) -> Iterator:
+        with self._lock:
+            return iter(list(self._items))
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __contains__(self, key) -> bool:
+        return key in self._items
+
+    def __repr__(self):
+        return f"BoundedDict({dict(self.items())}, max_entries={self.max_entries}, ttl={self.ttl})"
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+    def values(self):
+        with self._lock:
+            return [value for value, _ in self._items.values()]
+
+    def items(self):
+        with self._lock:
+            return [(key, value) for key, (value, _) in self._items.items()]
+
+    def _expire_locked(self) -> list:
+        evicted = []
+        if self.ttl is not None:
+            cutoff = self.clock() - self.ttl
+            while self._items:
+                key, (value, used) = next(iter(self._items.items()))
+                if used >= cutoff:
+                    break
+                evicted.append(self._items.popitem(last=False))
+        return evicted
+
+    def _evicted(self, evicted: list):
+        self.evictions += len(evicted)
+        if self.on_evict:
+            for key, (value, _) in evicted:
+                self.on_evict(key, value)
+
+    def expire(self) -> int:
+        """Drop the items unused for ttl seconds; returns how many."""
+        with self._lock:
+            evicted = self._expire_locked()
+        self._evicted(evicted)
+        return len(evicted)
+
+    def trim(self, fraction: float = DEFAULT_TRIM_FRACTION) -> int:
+        """Drop the least recently used fraction of the items (at least one); returns how many."""
+        with self._lock:
+            evicted = self._expire_locked()
+            count = max(1, int(len(self._items) * fraction)) if self._items else 0
+            evicted.extend(self._items.popitem(last=False) for _ in range(count))
+        self._evicted(evicted)
+        return len(evicted)
+
+
+class _Subsystem:
+    def __init__(self, size: Callable[[], int], trim: Optional[Callable[[], int]],
+                 evictions: Optional[Callable[[], int]]):
+        self.size = size
+        self.trim = trim
+        self.evictions = evictions
+        self.trimmed = 0
+
+    def evicted(self) -> int:
+        return self.evictions() if self.evictions else self.trimmed
+
+
+class MemoryBudget:
+    """Reports what each subsystem holds, through the metrics API, and trims them above a ceiling.
+
+    Subsystems register a size (entries held) and, if they can shed entries,
+    a trim. Every interval the report goes to metrics["memory"]; when the
+    process RSS is over the ceiling every trim runs once. Python reuses the
+    freed memory rather than handing it back, so RSS stops growing instead
+    of falling, and trims keep running each interval while it stays over.
+    """
+
+    def __init__(self, ceiling: Optional[int] = None, interval: float = DEFAULT_REPORT_INTERVAL):
+        self.ceiling = ceiling if ceiling is not None else default_ceiling()
+        self.interval = interval
+        self.trims = 0
+        self._subsystems: Dict[str, _Subsystem] = {}
+        self._lock = Lock()
+        self._stop = Event()
+        self._thread: Optional[Thread] = None
+
+    def register(self, name: str, size: Callable[[], int], trim: Optional[Callable[[], int]] = None,
+                 evictions: Optional[Callable[[], int]] = None):
+        with self._lock:
+            self._subsystems[name] = _Subsystem(size, trim, evictions)
+
+    def register_mapping(self, name: str, mapping: BoundedDict):
+        self.register(name, mapping.__len__, mapping.trim, lambda: mapping.evictions)
+
+    def unregister(self, name: str):
+        with self._lock:
+            self._subsystems.pop(name, None)
+
+    def start(self):
+        self._stop.clear()
+        self._thread = Thread(target=self._run, name='memory-budget', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread and self._thread.is_alive():
+            self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.check()
+            except Exception as e:
+                logger.error(f"Memory report failed: {e}")
+
+    def report(self) -> Dict[str, Any]:
+        with self._lock:
+            subsystems = dict(self._subsystems)
+        return {"rss": process_rss(), "ceiling": self.ceiling, "trims": self.trims,
+                "subsystems": {name: {"entries": subsystem.size(), "evicted": subsystem.evicted()}
+                               for name, subsystem in sorted(subsystems.items())}}
+
+    def check(self) -> Dict[str, Any]:
+        """Publish the report, trimming first if the process is over its ceiling."""
+        rss = process_rss()
+        if self.ceiling and rss > self.ceiling:
+            self.trim()
+            logger.warning(f"Memory at {rss / 2 ** 20:.0f} MB, over the {self.ceiling / 2 ** 20:.0f} MB ceiling; "
+                           f"trimmed to {process_rss() / 2 ** 20:.0f} MB")
+        report = self.report()
+        update_metrics({"memory": report})
+        return report
+
+    def trim(self) -> int:
+        with self._lock:
+            subsystems = list(self._subsystems.values())
+        evicted = 0
+        for subsystem in subsystems:
+            if subsystem.trim:
+                count = subsystem.trim()
+                subsystem.trimmed += count
+                evicted += count
+        gc.collect()
+        self.trims += 1
+        return evicted
@@ -1,12 +1,15 @@
 from abc import ABC, abstractmethod
-from scapy.packet import Packet
-from scapy.all import raw
+from typing import TYPE_CHECKING, Any, Dict
+import json
 import logging
 
+if TYPE_CHECKING:
+    from scapy.packet import Packet
+
 logger = logging.getLogger(__name__)
 
 class Message(ABC):
-    def __init__(self, packet: Packet):
+    def __init__(self, packet: 'Packet'):
         self.packet = packet
 
     @abstractmethod
@@ -14,13 +17,25 @@ class Message(ABC):
         pass
 
     @abstractmethod
-    def from_raw(self, data: bytes) -> Packet:
+    def from_raw(self, data: bytes) -> 'Packet':
         pass
 
 class ScapyMessage(Message):
     def to_raw(self) -> bytes:
-        return raw(self.packet)
+        # Same as scapy's raw(), without importing scapy.all
+        return bytes(self.packet)
 
-    def from_raw(self, data: bytes) -> Packet:
+    def from_raw(self, data: bytes) -> 'Packet':
+        from scapy.packet import Packet
         self.packet = Packet(data)
         return self.packet
+
+class JsonMessage(Message):
+    """A dict sent as one line of JSON, e.g. coordinator requests over a socket Connection."""
+
+    def to_raw(self) -> bytes:
+        return json.dumps(self.packet).encode() + b'\n'
+
+    def from_raw(self, data: bytes) -> Dict[str, Any]:
+        self.packet = json.loads(data)
+        return self.packet
@@ -0,0 +1,57 @@
+import logging
+from threading import Lock
+from typing import Any, Callable, Dict, List
+
+logger = logging.getLogger(__name__)
+
+# Fuzzer metrics shared by the radio modules, the daemon and the GUI
+metrics: Dict[str, Any] = {
+    "time": "00:00:00",
+    "packets_sent": 0,
+    "connected_to_target": False,
+    "modules": {},
+}
+_lock = Lock()
+# Called with each update as it is made, e.g. by the dashboard, so nothing has to poll
+_listeners: List[Callable[[Dict[str, Any]], None]] = []
+
+
+def subscribe(listener: Callable[[Dict[str, Any]], None]):
+    """Have listener called with the values of every later update, on the updating thread; it must not block."""
+    with _lock:
+        _listeners.append(listener)
+
+
+def unsubscribe(listener: Callable[[Dict[str, Any]], None]):
+    with _lock:
+        if listener in _listeners:
+            _listeners.remove(listener)
+
+
+def _notify(values: Dict[str, Any]):
+    for listener in list(_listeners):
+        try:
+            listener(values)
+        except Exception as e:
+            logger.error(f"Metrics listener failed: {e}")
+
+
+def update_metrics(values: Dict[str, Any]):
+    with _lock:
+        metrics.update(values)
+    _notify(values)
+
+
+def update_module_metrics(identifier: str, values: Dict[str, Any]):
+    """Record one module's metrics and refresh the totals."""
+    with _lock:
+        metrics["modules"][identifier] = values
+        metrics["packets_sent"] = sum(module.get("packets_sent", 0) for module in metrics["modules"].values())
+    _notify({"modules": {identifier: values}})
+
+
+def get_metrics() -> Dict[str, Any]:
+    with _lock:
+        snapshot = dict(metrics)
+        snapshot["modules"] = {identifier: dict(values) for identifier, values in metrics["modules"].items()}
+        return snapshot
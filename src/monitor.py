@@ -0,0 +1,164 @@
+import logging
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor, wait, FIRST_COMPLETED
+from threading import Condition, Event, Thread
+from typing import Any, Callable, Deque, Dict, List, Optional
+from profiling import span
+
+logger = logging.getLogger(__name__)
+
+UNKNOWN = 'unknown'
+ALIVE = 'alive'
+FAILED = 'failed'
+TIMEOUT = 'timeout'
+
+DEFAULT_TIMEOUT = 5.0
+DEFAULT_INTERVAL = 1.0
+
+
+class Monitor(ABC):
+    """Health probe for a target. Subclasses implement alive().
+
+    Any object with an alive() method can be added to a Target; name and
+    timeout are picked up when present.
+    """
+
+    def __init__(self, name: Optional[str] = None, timeout: float = DEFAULT_TIMEOUT):
+        self.name = name or type(self).__name__
+        self.timeout = timeout
+
+    @abstractmethod
+    def alive(self) -> bool:
+        pass
+
+
+class MonitorEvent:
+    """A monitor changing state."""
+
+    def __init__(self, monitor: Any, name: str, state: str, previous: str, timestamp: float, detail: str = ''):
+        self.monitor = monitor
+        self.name = name
+        self.state = state
+        self.previous = previous
+        self.timestamp = timestamp
+        self.detail = detail
+
+    def __repr__(self):
+        return f"MonitorEvent(name={self.name}, state={self.state}, previous={self.previous}, timestamp={self.timestamp})"
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"name": self.name, "state": self.state, "previous": self.previous,
+                "timestamp": self.timestamp, "detail": self.detail}
+
+
+class HealthChecker:
+    """Probes a set of monitors concurrently on a background thread and publishes state changes.
+
+    Each probe runs on a thread pool and is given its monitor's timeout; a
+    probe that overruns is reported as TIMEOUT and is not started again
+    until the stuck call returns, so a hung monitor costs one pool thread
+    rather than stalling the others.
+    """
+
+    def __init__(self, monitors: List[Any], interval: float = DEFAULT_INTERVAL, history: int = 1000,
+                 clock: Callable[[], float] = time.time):
+        self.monitors = list(monitors)
+        self.interval = interval
+        self.clock = clock
+        self.states: Dict[int, str] = {id(monitor): UNKNOWN for monitor in self.monitors}
+        self.events: Deque[MonitorEvent] = deque(maxlen=history)
+        self.listeners: List[Callable[[MonitorEvent], None]] = []
+        self._pending: Dict[int, Future] = {}
+        self._changed = Condition()
+        self._stop = Event()
+        self._thread: Optional[Thread] = None
+        self._executor = ThreadPoolExecutor(max_workers=max(1, len(self.monitors)), thread_name_prefix='monitor')
+
+    @staticmethod
+    def _name(monitor: Any) -> str:
+        return getattr(monitor, 'name', None) or type(monitor).__name__
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = Thread(target=self._run, name='health-checker', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread and self._thread.is_alive():
+            self._thread.join()
+        # Probes still stuck in a monitor are abandoned rather than waited for
+        self._executor.shutdown(wait=False)
+
+    def _run(self):
+        while not self._stop.is_set():
+            started = time.monotonic()
+            with span('monitor'):
+                self.check()
+            self._stop.wait(max(0.0, self.interval - (time.monotonic() - started)))
+
+    def check(self) -> Dict[str, str]:
+        """Run one round of probes and wait for them, up to each monitor's timeout."""
+        now = time.monotonic()
+        deadlines: Dict[int, float] = {}
+        for monitor in self.monitors:
+            key = id(monitor)
+            if key not in self._pending:
+                self._pending[key] = self._executor.submit(monitor.alive)
+            deadlines[key] = now + getattr(monitor, 'timeout', DEFAULT_TIMEOUT)
+
+        waiting = list(self.monitors)
+        while waiting:
+            for monitor in list(waiting):
+                key = id(monitor)
+                future = self._pending[key]
+                if future.done():
+                    del self._pending[key]
+                    waiting.remove(monitor)
+                    self._record_result(monitor, future)
+                elif time.monotonic() >= deadlines[key]:
+                    waiting.remove(monitor)
+                    self._set_state(monitor, TIMEOUT, f"no answer within {getattr(monitor, 'timeout', DEFAULT_TIMEOUT)}s")
+            if waiting:
+                remaining = min(deadlines[id(monitor)] for monitor in waiting) - time.monotonic()
+                wait([self._pending[id(monitor)] for monitor in waiting], timeout=max(0.0, remaining),
+                     return_when=FIRST_COMPLETED)
+        return self.state_by_name()
+
+    def _record_result(self, monitor: Any, future: Future):
+        error = future.exception()
+        if error is not None:
+            self._set_state(monitor, FAILED, str(error))
+        else:
+            self._set_state(monitor, ALIVE if future.result() else FAILED)
+
+    def _set_state(self, monitor: Any, state: str, detail: str = ''):
+        with self._changed:
+            previous = self.states[id(monitor)]
+            if state == previous:
+                return
+            self.states[id(monitor)] = state
+            event = MonitorEvent(monitor, self._name(monitor), state, previous, self.clock(), detail)
+            self.events.append(event)
+            self._changed.notify_all()
+        if state == ALIVE:
+            logger.info(f"Monitor {event.name} is alive")
+        else:
+            logger.warning(f"Monitor {event.name} reported {state}{f': {detail}' if detail else ''}")
+        for listener in list(self.listeners):
+            listener(event)
+
+    def all_alive(self) -> bool:
+        return all(state == ALIVE for state in self.states.values())
+
+    def wait_alive(self, timeout: Optional[float] = None) -> bool:
+        """Block until every monitor is alive; False if timeout passes first."""
+        with self._changed:
+            return self._changed.wait_for(self.all_alive, timeout)
+
+    def state_by_name(self) -> Dict[str, str]:
+        return {self._name(monitor): self.states[id(monitor)] for monitor in self.monitors}
@@ -0,0 +1,224 @@
+import json
+import logging
+import math
+import os
+import queue
+import sqlite3
+import time
+from contextlib import closing
+from threading import Event, Thread
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_OBSERVATIONS_PATH = os.path.join(os.path.expanduser('~'), '.wardriver', 'observations.db')
+
+EARTH_RADIUS = 6371000.0  # m
+
+# Grid cells are floored in SQL as CAST(x + offset) - offset; not every SQLite build has FLOOR()
+CELL_OFFSET = 10 ** 8
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS observations (
+    id INTEGER PRIMARY KEY,
+    timestamp REAL NOT NULL,
+    kind TEXT NOT NULL,
+    identifier TEXT NOT NULL,
+    module TEXT,
+    frequency REAL,
+    rssi REAL,
+    lat REAL,
+    lon REAL,
+    alt REAL,
+    extra TEXT
+);
+CREATE INDEX IF NOT EXISTS observations_identifier ON observations (identifier, timestamp);
+CREATE VIRTUAL TABLE IF NOT EXISTS observations_rtree USING rtree (id, min_lat, max_lat, min_lon, max_lon);
+"""
+
+COLUMNS = ('timestamp', 'kind', 'identifier', 'module', 'frequency', 'rssi', 'lat', 'lon', 'alt', 'extra')
+
+
+def haversine(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS * math.asin(math.sqrt(a))
+
+
+def _bounding_box(lat: float, lon: float, radius: float) -> Tuple[float, float, float, float]:
+    dlat = math.degrees(radius / EARTH_RADIUS)
+    dlon = math.degrees(radius / (EARTH_RADIUS * max(math.cos(math.radians(lat)), 1e-6)))
+    return lat - dlat, lat + dlat, lon - dlon, lon + dlon
+
+
+class ObservationStore:
+    """Geotagged scan results in SQLite, written in batches by a background thread.
+
+    record() only queues, so radio threads never wait on the disk. The
+    writer commits a batch when batch_size rows are waiting or
+    flush_interval seconds have passed. WAL mode lets queries read while a
+    drive is being recorded. Positioned rows also go into an R-tree, so
+    radius and heatmap queries touch only the rows in their bounding box.
+    If the disk stalls, at most max_pending rows wait; later ones are dropped
+    and counted rather than growing the queue until the process is killed.
+    """
+
+    def __init__(self, path: str = DEFAULT_OBSERVATIONS_PATH, gps=None, batch_size: int = 500,
+                 flush_interval: float = 1.0, max_pending: int = 100000):
+        self.path = path
+        self.gps = gps
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.written = 0
+        self.dropped = 0
+        self._queue: queue.Queue = queue.Queue(max_pending)
+        self._stop = Event()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with closing(self._connect()) as conn:
+            conn.executescript(SCHEMA)
+        self._thread = Thread(target=self._writer, name='observations', daemon=True)
+        self._thread.start()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute('PRAGMA journal_mode=WAL')
+        # WAL keeps the database consistent on a crash; NORMAL only risks the last batches on power loss
+        conn.execute('PRAGMA synchronous=NORMAL')
+        return conn
+
+    def record(self, kind: str, identifier: str, module: Optional[str] = None, frequency: Optional[float] = None,
+               rssi: Optional[float] = None, extra: Optional[Dict[str, Any]] = None, fix=None):
+        """Queue an observation, tagged with fix or else the GPS's current position."""
+        fix = fix or (self.gps.fix if self.gps else None)
+        try:
+            self._queue.put_nowait((time.time(), kind, identifier, module, frequency, rssi,
+                                    fix.lat if fix else None, fix.lon if fix else None, fix.alt if fix else None,
+                                    json.dumps(extra) if extra else None))
+        except queue.Full:
+            if not self.dropped:
+                logger.warning(f"Observation queue for {self.path} is full, dropping observations")
+            self.dropped += 1
+
+    def pending(self) -> int:
+        return self._queue.qsize()
+
+    def _writer(self):
+        conn = self._connect()
+        try:
+            while not (self._stop.is_set() and self._queue.empty()):
+                batch = self._next_batch()
+                if batch:
+                    self._write(conn, batch)
+        finally:
+            conn.close()
+
+    def _next_batch(self) -> List[tuple]:
+        batch = []
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0 and batch:
+                break
+            try:
+                batch.append(self._queue.get(timeout=max(timeout, 0.05)))
+            except queue.Empty:
+                if batch or self._stop.is_set():
+                    break
+                deadline = time.monotonic() + self.flush_interval
+        return batch
+
+    def _write(self, conn: sqlite3.Connection, batch: List[tuple]):
+        try:
+            with conn:
+                cursor = conn.execute('SELECT COALESCE(MAX(id), 0) FROM observations')
+                first_id = cursor.fetchone()[0] + 1
+                rows = [(first_id + i,) + row for i, row in enumerate(batch)]
+                conn.executemany(f"INSERT INTO observations (id, {', '.join(COLUMNS)}) "
+                                 f"VALUES ({', '.join('?' * (len(COLUMNS) + 1))})", rows)
+                conn.executemany('INSERT INTO observations_rtree VALUES (?, ?, ?, ?, ?)',
+                                 [(row[0], row[7], row[7], row[8], row[8]) for row in rows if row[7] is not None])
+            self.written += len(batch)
+        except sqlite3.Error as e:
+            logger.error(f"Dropped {len(batch)} observations: {e}")
+        finally:
+            for _ in batch:
+                self._queue.task_done()
+
+    def flush(self, timeout: float = 10.0):
+        """Wait until everything recorded so far is on disk."""
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+    def close(self):
+        self._stop.set()
+        self._thread.join()
+
+    def near(self, lat: float, lon: float, radius: float, since: Optional[float] = None,
+             kind: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Devices seen within radius metres of (lat, lon): closest sighting, strongest RSSI, last seen."""
+        min_lat, max_lat, min_lon, max_lon = _bounding_box(lat, lon, radius)
+        query = ("SELECT o.identifier, o.kind, o.module, o.frequency, o.rssi, o.lat, o.lon, o.timestamp "
+                 "FROM observations_rtree r JOIN observations o ON o.id = r.id "
+                 "WHERE r.min_lat >= ? AND r.max_lat <= ? AND r.min_lon >= ? AND r.max_lon <= ?")
+        params: List[Any] = [min_lat, max_lat, min_lon, max_lon]
+        if since is not None:
+            query += " AND o.timestamp >= ?"
+            params.append(since)
+        if kind is not None:
+            query += " AND o.kind = ?"
+            params.append(kind)
+        devices: Dict[str, Dict[str, Any]] = {}
+        with closing(self._connect()) as conn:
+            for identifier, kind_, module, frequency, rssi, row_lat, row_lon, timestamp in conn.execute(query, params):
+                distance = haversine(lat, lon, row_lat, row_lon)
+                if distance > radius:
+                    continue
+                device = devices.setdefault(identifier, {
+                    "identifier": identifier, "kind": kind_, "module": module, "frequency": frequency,
+                    "distance": distance, "max_rssi": rssi, "last_seen": timestamp, "sightings": 0})
+                device["sightings"] += 1
+                device["distance"] = min(device["distance"], distance)
+                device["last_seen"] = max(device["last_seen"], timestamp)
+                if rssi is not None and (device["max_rssi"] is None or rssi > device["max_rssi"]):
+                    device["max_rssi"] = rssi
+        return sorted(devices.values(), key=lambda device: device["distance"])
+
+    def heatmap(self, cell: float = 50.0, bbox: Optional[Tuple[float, float, float, float]] = None,
+                kind: Optional[str] = None, frequency: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Observation count, distinct devices and RSSI per grid cell of about cell metres.
+
+        bbox is (min_lat, max_lat, min_lon, max_lon); cells are aligned to whole
+        multiples of the cell size in degrees, so maps from different drives line up.
+        Cell width in longitude is set at the middle latitude of bbox or, without
+        one, of the stored observations; pass the same bbox to compare drives.
+        """
+        cell_lat = math.degrees(cell / EARTH_RADIUS)
+        reference_lat = None
+        if bbox is None:
+            bbox = (-90.0, 90.0, -180.0, 180.0)
+            with closing(self._connect()) as conn:
+                low, high = conn.execute("SELECT MIN(min_lat), MAX(max_lat) FROM observations_rtree").fetchone()
+            if low is not None:
+                reference_lat = (low + high) / 2
+        if reference_lat is None:
+            reference_lat = (bbox[0] + bbox[1]) / 2
+        cell_lon = math.degrees(cell / (EARTH_RADIUS * max(math.cos(math.radians(reference_lat)), 1e-6)))
+        query = (f"SELECT CAST(o.lat / ? + {CELL_OFFSET} AS INTEGER) - {CELL_OFFSET} AS row_, "
+                 f"CAST(o.lon / ? + {CELL_OFFSET} AS INTEGER) - {CELL_OFFSET} AS col, "
+                 "COUNT(*), COUNT(DISTINCT o.identifier), AVG(o.rssi), MAX(o.rssi) "
+                 "FROM observations_rtree r JOIN observations o ON o.id = r.id "
+                 "WHERE r.min_lat >= ? AND r.max_lat <= ? AND r.min_lon >= ? AND r.max_lon <= ?")
+        params: List[Any] = [cell_lat, cell_lon, *bbox]
+        if kind is not None:
+            query += " AND o.kind = ?"
+            params.append(kind)
+        if frequency is not None:
+            query += " AND o.frequency = ?"
+            params.append(frequency)
+        query += " GROUP BY row_, col"
+        with closing(self._connect()) as conn:
+            rows = conn.execute(query, params).fetchall()
+        return [{"lat": (row + 0.5) * cell_lat, "lon": (col + 0.5) * cell_lon, "count": count,
+                 "devices": devices, "mean_rssi": mean_rssi, "max_rssi": max_rssi}
+                for row, col, count, devices, mean_rssi, max_rssi in rows]
@@ -0,0 +1,145 @@
+import json
+import logging
+import os
+import random
+from threading import Lock
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PRIORS_PATH = os.path.join(os.path.expanduser('~'), '.wardriver', 'channel_priors.json')
+DEFAULT_LOCATION = 'default'
+LOCATION_CELL = 0.005  # degrees; about 500 m, so one site keeps one history across GPS jitter
+DECAY = 0.9  # weight a hit keeps per later visit to its channel
+QUIET_AFTER = 5  # visits without a hit before a channel is skipped
+RECHECK_EVERY = 10  # every Nth scan still visits the quiet channels, so newcomers are found
+
+
+def location_key(lat: Optional[float] = None, lon: Optional[float] = None, name: Optional[str] = None) -> str:
+    """A named site, else the grid cell of a fix, else the default location."""
+    if name:
+        return name
+    if lat is None or lon is None:
+        return DEFAULT_LOCATION
+    return f"{round(lat / LOCATION_CELL)}:{round(lon / LOCATION_CELL)}"
+
+
+_priors: Dict[str, 'ChannelPriors'] = {}
+_priors_lock = Lock()
+
+
+def open_priors(path: str = DEFAULT_PRIORS_PATH) -> 'ChannelPriors':
+    """The ChannelPriors for path, shared by every module in the process that uses it."""
+    path = os.path.abspath(path)
+    with _priors_lock:
+        if path not in _priors:
+            _priors[path] = ChannelPriors(path)
+        return _priors[path]
+
+
+class ChannelPriors:
+    """Per location and radio mode: which channels have had hits, and where the last scan stopped.
+
+    Each channel keeps [visits, hits, score]; score is the hit count decayed
+    per visit, so a device that moves away stops leading the order. Other
+    processes may share the file: save() keeps their records for every
+    location and mode this one has not changed.
+    """
+
+    def __init__(self, path: str = DEFAULT_PRIORS_PATH):
+        self.path = path
+        self.records: Dict[str, Dict[str, Any]] = {}
+        self.dirty = False
+        # Keys of records changed since the last save
+        self._changed: Set[str] = set()
+        self._lock = Lock()
+        self.load()
+
+    def load(self):
+        self.records = self._read()
+
+    def _read(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            with open(self.path, 'r') as file:
+                return json.load(file)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable channel priors {self.path}: {e}")
+            return {}
+
+    def _record(self, location: str, mode: str, change: bool = False) -> Dict[str, Any]:
+        key = f"{location}/{mode}"
+        if change:
+            self._changed.add(key)
+            self.dirty = True
+        return self.records.setdefault(key, {"channels": {}, "cursor": 0, "scans": 0})
+
+    def order(self, location: str, mode: str, channels: Sequence[int]) -> Tuple[List[int], List[int]]:
+        """(channels with hits, best first; the others from the cursor on), leaving out quiet channels.
+
+        Quiet channels, visited QUIET_AFTER times without a hit, are only
+        visited on every RECHECK_EVERY-th scan, last.
+        """
+        with self._lock:
+            record = self._record(location, mode)
+            stats = record["channels"]
+            cursor, recheck = record["cursor"], record["scans"] % RECHECK_EVERY == RECHECK_EVERY - 1
+        hot = sorted((channel for channel in channels if stats.get(str(channel), (0, 0, 0.0))[2] > 0),
+                     key=lambda channel: -stats[str(channel)][2])
+        taken = set(hot)
+        # Resume the sweep where the last one stopped rather than at the lowest channel
+        ordered = sorted(channels, key=lambda channel: (channel < cursor, channel))
+        rest, quiet = [], []
+        for channel in ordered:
+            if channel in taken:
+                continue
+            visits, hits, _ = stats.get(str(channel), (0, 0, 0.0))
+            (quiet if visits >= QUIET_AFTER and not hits else rest).append(channel)
+        return hot, rest + quiet if recheck else rest
+
+    def record(self, location: str, mode: str, channel: int, hit: bool):
+        with self._lock:
+            stats = self._record(location, mode, change=True)["channels"]
+            visits, hits, score = stats.get(str(channel), (0, 0, 0.0))
+            stats[str(channel)] = [visits + 1, hits + hit, round(score * DECAY + hit, 4)]
+
+    def finish_scan(self, location: str, mode: str, resume_at: Optional[int] = None):
+        with self._lock:
+            record = self._record(location, mode, change=True)
+            record["scans"] += 1
+            if resume_at is not None:
+                record["cursor"] = resume_at
+
+    def pick_mode(self, location: str, modes: Iterable[str], rng: random.Random = random) -> str:
+        """A mode chosen in proportion to its hits here, each with a floor so none is starved."""
+        modes = list(modes)
+        with self._lock:
+            weights = [1.0 + sum(stats[2] for stats in
+                                 self.records.get(f"{location}/{mode}", {}).get("channels", {}).values())
+                       for mode in modes]
+        return rng.choices(modes, weights)[0]
+
+    def save(self):
+        with self._lock:
+            if not self.dirty:
+                return
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            with open(f"{self.path}.lock", 'w') as lock_file:
+                if fcntl:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX)
+                # Merge into what is on disk now, so another process's saves since our load survive
+                records = self._read()
+                records.update({key: self.records[key] for key in self._changed})
+                tmp_path = f"{self.path}.tmp"
+                with open(tmp_path, 'w') as file:
+                    json.dump(records, file)
+                os.replace(tmp_path, self.path)
+            self.records = records
+            self._changed = set()
+            self.dirty = False
@@ -0,0 +1,241 @@
+import json
+import logging
+import math
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SAMPLE_INTERVAL = 0.005  # s between stack samples
+STAGES = ('mutate', 'serialize', 'transmit', 'receive', 'monitor', 'log')
+PERCENTILES = (50, 90, 99)
+# Durations go into buckets 2^(1/8) apart, so percentiles are within 9% and memory is fixed
+BUCKETS_PER_OCTAVE = 8
+
+enabled = False
+_sampler: Optional['StackSampler'] = None
+_local = threading.local()
+_stages: Dict[str, 'StageTimes'] = {}
+_stages_lock = threading.Lock()
+# Span paths like "transmit;serialize" -> self time in µs, for a flamegraph of the stages
+_span_stacks: Counter = Counter()
+# Sampled stacks -> samples; kept when sampling stops, until reset()
+_stacks: Counter = Counter()
+_samples = 0
+
+
+class StageTimes:
+    """Durations of one stage as a log histogram."""
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0
+        self.max = 0
+        self.buckets: Counter = Counter()
+        self._lock = threading.Lock()
+
+    def add(self, duration_ns: int):
+        bucket = int(math.log2(duration_ns) * BUCKETS_PER_OCTAVE) if duration_ns > 0 else 0
+        with self._lock:
+            self.count += 1
+            self.total += duration_ns
+            self.max = max(self.max, duration_ns)
+            self.buckets[bucket] += 1
+
+    def percentile(self, percent: float) -> float:
+        """Upper edge of the bucket holding the percent-th duration, in seconds."""
+        with self._lock:
+            rank = math.ceil(self.count * percent / 100)
+            seen = 0
+            for bucket in sorted(self.buckets):
+                seen += self.buckets[bucket]
+                if seen >= rank:
+                    return min(2 ** ((bucket + 1) / BUCKETS_PER_OCTAVE), self.max) / 1e9
+        return 0.0
+
+    def as_dict(self) -> Dict[str, float]:
+        stats = {"count": self.count, "total": self.total / 1e9, "mean": self.total / self.count / 1e9 if self.count else 0.0,
+                 "max": self.max / 1e9}
+        stats.update({f"p{percent}": self.percentile(percent) for percent in PERCENTILES})
+        return stats
+
+
+class _Span:
+    __slots__ = ('name', 'started', 'children')
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        stack = getattr(_local, 'stack', None)
+        if stack is None:
+            stack = _local.stack = []
+        stack.append(self)
+        self.children = 0
+        self.started = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        duration = time.perf_counter_ns() - self.started
+        stack = _local.stack
+        path = ';'.join(span.name for span in stack)
+        stack.pop()
+        if stack:
+            stack[-1].children += duration
+        stage = _stages.get(self.name)
+        if stage is None:
+            with _stages_lock:
+                stage = _stages.setdefault(self.name, StageTimes())
+        stage.add(duration)
+        with _stages_lock:
+            _span_stacks[path] += max(0, duration - self.children) // 1000
+        return False
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def span(name: str):
+    """Time a stage (see STAGES): `with span('transmit'): ...`. Costs a function call while profiling is off."""
+    return _Span(name) if enabled else _NULL_SPAN
+
+
+def _record_stacks(stacks: List[str]):
+    global _samples
+    with _stages_lock:
+        _stacks.update(stacks)
+        _samples += 1
+
+
+class StackSampler(threading.Thread):
+    """Samples every other thread's Python stack every interval seconds, passing them on collapsed.
+
+    Sampling from Python rather than with a tracer keeps the overhead at a
+    few percent and independent of how hot the code being profiled is. Time
+    spent in C (a USB transfer, a serial read, scapy's build in C helpers)
+    shows up under the Python frame that called it.
+    """
+
+    def __init__(self, interval: float = DEFAULT_SAMPLE_INTERVAL,
+                 on_sample: Callable[[List[str]], None] = _record_stacks):
+        super().__init__(name='stack-sampler', daemon=True)
+        self.interval = interval
+        self.on_sample = on_sample
+        self._stop_event = threading.Event()
+
+    def stop(self):
+        self._stop_event.set()
+        if self.is_alive():
+            self.join()
+
+    def run(self):
+        names: Dict[int, str] = {}
+        while not self._stop_event.wait(self.interval):
+            own = threading.get_ident()
+            frames = sys._current_frames()
+            if len(names) != threading.active_count():
+                names = {thread.ident: thread.name for thread in threading.enumerate()}
+            sampled = []
+            for ident, frame in frames.items():
+                if ident == own:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                    frame = frame.f_back
+                stack.append(names.get(ident, str(ident)))
+                sampled.append(';'.join(reversed(stack)))
+            del frames, frame
+            self.on_sample(sampled)
+
+
+def enable(sample_interval: Optional[float] = DEFAULT_SAMPLE_INTERVAL):
+    """Start timing spans and, unless sample_interval is None, sampling stacks."""
+    global enabled, _sampler
+    enabled = True
+    if sample_interval and _sampler is None:
+        _sampler = StackSampler(sample_interval)
+        _sampler.start()
+    logger.info(f"Profiling on{f', sampling stacks every {sample_interval * 1e3:.1f} ms' if sample_interval else ''}")
+
+
+def disable():
+    global enabled, _sampler
+    enabled = False
+    if _sampler is not None:
+        _sampler.stop()
+        _sampler = None
+
+
+def reset():
+    global _samples
+    with _stages_lock:
+        _stages.clear()
+        _span_stacks.clear()
+        _stacks.clear()
+        _samples = 0
+
+
+def report() -> Dict[str, Any]:
+    """Per-stage timings in seconds, and how many stack samples were taken."""
+    with _stages_lock:
+        stages = dict(_stages)
+    return {"enabled": enabled, "samples": _samples,
+            "stages": {name: stages[name].as_dict() for name in sorted(stages)}}
+
+
+def collapsed_stacks() -> List[str]:
+    """Sampled stacks in the collapsed format flamegraph.pl and speedscope read."""
+    with _stages_lock:
+        stacks = dict(_stacks)
+    return [f"{stack} {count}" for stack, count in sorted(stacks.items())]
+
+
+def collapsed_spans() -> List[str]:
+    """Span self time in µs per span path, in the same collapsed format."""
+    with _stages_lock:
+        spans = dict(_span_stacks)
+    return [f"{path} {micros}" for path, micros in sorted(spans.items()) if micros]
+
+
+def format_table(stats: Dict[str, Dict[str, float]]) -> str:
+    lines = [f"{'stage':<12}{'count':>10}{'total s':>10}{'mean ms':>10}"
+             + ''.join(f"{f'p{percent} ms':>10}" for percent in PERCENTILES) + f"{'max ms':>10}"]
+    for name, stage in stats.items():
+        lines.append(f"{name:<12}{stage['count']:>10}{stage['total']:>10.3f}{stage['mean'] * 1e3:>10.3f}"
+                     + ''.join(f"{stage[f'p{percent}'] * 1e3:>10.3f}" for percent in PERCENTILES)
+                     + f"{stage['max'] * 1e3:>10.3f}")
+    return '\n'.join(lines)
+
+
+def save(directory: str) -> Dict[str, str]:
+    """Write stages.txt and stages.json (percentile tables), stacks.folded and spans.folded (flamegraphs)."""
+    os.makedirs(directory, exist_ok=True)
+    stats = report()
+    paths = {name: os.path.join(directory, name)
+             for name in ('stages.txt', 'stages.json', 'stacks.folded', 'spans.folded')}
+    with open(paths['stages.txt'], 'w') as file:
+        file.write(format_table(stats["stages"]) + '\n')
+    with open(paths['stages.json'], 'w') as file:
+        json.dump(stats, file, indent=2)
+    with open(paths['stacks.folded'], 'w') as file:
+        file.writelines(line + '\n' for line in collapsed_stacks())
+    with open(paths['spans.folded'], 'w') as file:
+        file.writelines(line + '\n' for line in collapsed_spans())
+    logger.info(f"Profile written to {directory}")
+    return paths
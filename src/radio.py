@@ -1,18 +1,51 @@
 from abc import ABC, abstractmethod
-from threading import Thread
+from threading import Event, Thread, current_thread
 import logging
+import random
+import time
 from target import Target
-from typing import List, Dict, Any, Optional
+from metrics import update_metrics, update_module_metrics
+from checkpoint import json_safe
+from memory import DEFAULT_MAX_PROGRESS, BoundedDict
+from corpus import CorpusStore, open_store
+import tracing
+from profiling import span
+from ratelimit import RateLimiter
+from monitor import ALIVE, DEFAULT_INTERVAL, UNKNOWN, MonitorEvent
+from typing import Callable, List, Dict, Any, Optional, Set, Tuple
 
 logger = logging.getLogger(__name__)
 
-def update_global_metrics(time: str, packets_sent: int, connected_to_target: bool):
-    global metrics
-    metrics['time'] = time
-    metrics['packets_sent'] = packets_sent
-    metrics['connected_to_target'] = connected_to_target
+# Live metrics go out at most this often (s) per module, however fast packets are sent
+METRICS_INTERVAL = 0.25
+TOP_TARGETS = 5
+# Cases already in the corpus skipped in a row at most, so a well-covered short range cannot stall a run
+MAX_SEEN_SKIPS = 64
+CHANNEL_TOLERANCE = 0.001  # MHz within which a frequency counts as one of a radio's fixed channels
+
+class Capabilities:
+    """What a radio driver can do, for schedulers deciding how to use it."""
+
+    def __init__(self, bands: List[Tuple[float, float]], max_hop_rate: float, burst: bool, max_packet_len: int = 64,
+                 channels: Optional[List[float]] = None):
+        self.bands = bands                # (low MHz, high MHz) ranges the radio can tune
+        self.channels = channels          # MHz; set when the radio only tunes to fixed channels within its bands
+        self.max_hop_rate = max_hop_rate  # retunes per second the host link sustains
+        self.burst = burst                # FIFO burst writes, i.e. a whole packet per transfer
+        self.max_packet_len = max_packet_len
+
+    def __repr__(self):
+        return f"Capabilities(bands={self.bands}, max_hop_rate={self.max_hop_rate}, burst={self.burst})"
+
+    def covers(self, frequency: float) -> bool:
+        if self.channels is not None:
+            return any(abs(frequency - channel) <= CHANNEL_TOLERANCE for channel in self.channels)
+        return any(low <= frequency <= high for low, high in self.bands)
+
 
 class RadioModule(ABC):
+    capabilities = Capabilities(bands=[], max_hop_rate=0, burst=False)
+
     def __init__(self, identifier: str, config: Dict[str, Any]):
         self.identifier = identifier
         self.config = config
@@ -23,11 +56,90 @@ class RadioModule(ABC):
         self.packet_count = config.get('packet_count', 10)
         self.baud = config.get('baud', None)
         self.comport = config.get('com', None)
+        self.thread: Optional[Thread] = None
+        self.running = False
+        # Payload n is derived from (seed, n) alone, so a resumed run continues the same sequence
+        self.seed = config.get('seed')
+        if self.seed is None:
+            self.seed = random.getrandbits(63)
+        self.case_index = 0
+        # Stop before this case, e.g. at the end of a shard handed out by a coordinator
+        self.case_limit: Optional[int] = None
+        # Case indices drawn but not transmitted yet
+        self._in_flight: Set[int] = set()
+        # Target name -> (case index, payload) drawn for it but held back by its rate limit; kept across visits
+        self._held: Dict[str, Tuple[int, bytes]] = {}
+        # Packets sent per target name, across resumes; indiscriminate runs meet new names for days
+        self.progress: BoundedDict = BoundedDict(max_entries=config.get('max_progress', DEFAULT_MAX_PROGRESS))
+        self.resuming = False
+        self.started_at: Optional[float] = None
+        # Module-wide limit from config (pps, bps, burst_packets, burst_bytes), plus optional per-target ones
+        self.rate_limiter = RateLimiter.from_config(config)
+        # Cases tried in earlier runs are skipped; targets keep the ones whose responses are new
+        self.corpus: Optional[CorpusStore] = open_store(config['corpus']) if config.get('corpus') else None
+        self.target_limiters: Dict[str, RateLimiter] = {}
+        # What to do with a target whose monitor fails: 'pause' until it recovers, or 'restart' it
+        self.monitor_policy = config.get('monitor_policy', 'pause')
+        self.monitor_interval = config.get('monitor_interval', DEFAULT_INTERVAL)
+        self._watched: List[Target] = []
+        self._health_changed = Event()
+        # Seconds each target gets per channel visit in targeted mode. The default keeps
+        # retunes (1 / max_hop_rate each) to about a tenth of the air time.
+        hop_rate = self.capabilities.max_hop_rate
+        self.target_budget = config.get('target_budget', 10.0 / hop_rate if hop_rate else 0.1)
+        # Channels (MHz) and time shares handed out by the band allocator
+        # Assigned by the allocator; None until then (scan the whole band), [] when it leaves the module idle
+        self.channels: Optional[List[float]] = None
+        self.channel_dwell: Dict[float, float] = {}
+        self.failure_listeners: List[Callable[['RadioModule'], None]] = []
+        # (module, kind, identifier, fields) for every scan result, e.g. to geotag and store them
+        self.observation_listeners: List[Callable[['RadioModule', str, str, Dict[str, Any]], None]] = []
+        # Last channel tuned or swept and RSSI heard, and monitor failures and crashes, for the live metrics
+        self.last_frequency: Optional[float] = None
+        self.last_rssi: Optional[float] = None
+        self.errors = 0
+        self._metrics_due = 0.0
 
     @abstractmethod
     def scan_for_devices(self) -> List[Target]:
         pass
 
+    @abstractmethod
+    def transmit(self, payload: bytes, target: Optional[Target] = None):
+        pass
+
+    def scan(self) -> List[Target]:
+        """scan_for_devices(), reporting each device found to the observation listeners."""
+        targets = self.scan_for_devices()
+        for target in targets:
+            self._observe('device', target.name, frequency=target.frequency, rssi=target.rssi)
+        return targets
+
+    def _observe(self, kind: str, identifier: str, **fields):
+        if kind == 'rssi':
+            self.last_frequency, self.last_rssi = fields.get('frequency'), fields.get('rssi')
+            self._publish_metrics()
+        for listener in self.observation_listeners:
+            listener(self, kind, identifier, fields)
+
+    def tune(self, frequency: float):
+        """Retune to frequency (MHz). Drivers without a synthesizer to steer may ignore it."""
+
+    def default_channels(self) -> List[float]:
+        """Channels (MHz) this module watches when the allocator has nothing else for it."""
+        return []
+
+    def assign_channels(self, channels: List[float], dwell: Dict[float, float]):
+        self.channels = channels
+        self.channel_dwell = dwell
+        logger.info(f"Radio module {self.identifier} assigned {len(channels)} channel(s)")
+
+    def open(self):
+        """Acquire the device handle. Called before every run; must be idempotent."""
+
+    def close(self):
+        """Release the device handle."""
+
     def set_mode(self, mode: str, attack_type: str, targets: Optional[List[Target]] = None):
         if mode not in ['fuzzing', 'jamming']:
             logger.error(f"Invalid mode: {mode}")
@@ -41,51 +153,311 @@ class RadioModule(ABC):
         self.targets = targets or []
         logger.info(f"Radio module {self.identifier} set to {self.mode} mode with {self.attack_type} attack")
 
+    def set_rate(self, pps: Optional[float] = None, bps: Optional[float] = None,
+                 burst_packets: Optional[float] = None, burst_bytes: Optional[float] = None,
+                 target: Optional[str] = None):
+        """Change the module's rate limit, or one target's; safe while the module is running."""
+        if target is None:
+            self.rate_limiter.set_rate(pps, bps, burst_packets, burst_bytes)
+        elif pps is None and bps is None:
+            self.target_limiters.pop(target, None)
+        elif target in self.target_limiters:
+            self.target_limiters[target].set_rate(pps, bps, burst_packets, burst_bytes)
+        else:
+            self.target_limiters[target] = RateLimiter(pps, bps, burst_packets, burst_bytes)
+        logger.info(f"Radio module {self.identifier} rate for {target or 'all targets'}: pps={pps} bps={bps}")
+
+    def rate_stats(self) -> Dict[str, Any]:
+        return {"module": self.rate_limiter.stats(),
+                "targets": {name: limiter.stats() for name, limiter in self.target_limiters.items()}}
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Progress to checkpoint; everything else is rebuilt from config."""
+        return {"identifier": self.identifier, "config": json_safe(self.config), "mode": self.mode,
+                "attack_type": self.attack_type, "seed": self.seed, "case_index": self.resume_index,
+                "case_limit": self.case_limit, "packets_sent": self.packets_sent, "progress": dict(self.progress),
+                "targets": [target.to_dict() for target in self.targets]}
+
+    def restore(self, state: Dict[str, Any]):
+        self.seed = state["seed"]
+        self.case_index = state["case_index"]
+        self.case_limit = state.get("case_limit")
+        self.packets_sent = state["packets_sent"]
+        if state["mode"]:
+            self.set_mode(state["mode"], state["attack_type"], [Target.from_dict(data) for data in state["targets"]])
+        self.progress.clear()
+        self.progress.update(state["progress"])
+        self.resuming = True
+        logger.info(f"Radio module {self.identifier} resuming at case {self.case_index}")
+
+    def start(self):
+        if self.thread and self.thread.is_alive():
+            logger.warning(f"Radio module {self.identifier} is already running")
+            return
+        self.running = True
+        self.open()
+        self.started_at = time.monotonic()
+        self.thread = Thread(target=self._run_thread, name=f"radio-{self.identifier}", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.running = False
+        if self.thread and self.thread.is_alive():
+            self.thread.join()
+
+    def _run_thread(self):
+        try:
+            self.run()
+        except Exception as e:
+            logger.error(f"Radio module {self.identifier} failed: {e}")
+            self.errors += 1
+            self._update_metrics()
+            tracing.crash_dump(f"radio module {self.identifier} failed")
+            for listener in self.failure_listeners:
+                listener(self)
+        finally:
+            self.running = False
+
     def run(self):
         if self.mode is None or self.attack_type is None:
             logger.error("Mode and attack type must be set before running")
             raise RuntimeError("Mode and attack type must be set before running")
         
         logger.info(f"Running {self.mode} mode with {self.attack_type} attack on module {self.identifier}")
-        if self.attack_type == 'targeted':
-            self._run_targeted_attack()
-        elif self.attack_type == 'selected':
-            self._run_selected_attack()
-        elif self.attack_type == 'indiscriminate':
-            self._run_indiscriminate_attack()
+        # Called directly rather than through start(): the loops check running, so run to completion here
+        direct = self.thread is None or self.thread is not current_thread()
+        if direct:
+            self.running = True
+        self._in_flight = set()
+        self._held = {}
+        if not self.resuming:
+            self.progress.clear()
+            if self.attack_type != 'targeted':
+                self.targets = []  # picked by scanning
+        self.resuming = False
+        try:
+            if self.attack_type == 'targeted':
+                self._run_targeted_attack()
+            elif self.attack_type == 'selected':
+                self._run_selected_attack()
+            elif self.attack_type == 'indiscriminate':
+                self._run_indiscriminate_attack()
+        finally:
+            self._unwatch_targets()
+            if direct:
+                self.running = False
 
         self._update_metrics()
+        if self.corpus is not None:
+            self.corpus.flush()
+        stats = self.rate_limiter.stats()
+        if stats["requested_pps"] and stats["achieved_pps"] < 0.9 * stats["requested_pps"]:
+            logger.warning(f"Radio module {self.identifier} reached {stats['achieved_pps']:.1f} of "
+                           f"{stats['requested_pps']:.1f} packets/s")
+
+    def _watch_targets(self, targets: List[Target]):
+        for target in targets:
+            if target.monitors and target not in self._watched:
+                target.monitor_listeners.append(self._on_monitor_event)
+                target.start_monitoring(self.monitor_interval)
+                self._watched.append(target)
+
+    def _unwatch_targets(self):
+        for target in self._watched:
+            target.monitor_listeners.remove(self._on_monitor_event)
+            target.stop_monitoring()
+        self._watched = []
+
+    def _on_monitor_event(self, target: Target, event: MonitorEvent):
+        # Runs on the health checker thread; transmit loops check target.healthy before every packet
+        if event.state == ALIVE:
+            if event.previous != UNKNOWN:
+                logger.info(f"Radio module {self.identifier} resuming {target.name}")
+        elif self.monitor_policy == 'restart':
+            logger.warning(f"Radio module {self.identifier} restarting {target.name}: monitor {event.name} {event.state}")
+            self.errors += 1
+            target.close()
+            target.open()
+        else:
+            logger.warning(f"Radio module {self.identifier} pausing {target.name}: monitor {event.name} {event.state}")
+            self.errors += 1
+        self._health_changed.set()
+
+    def _wait_for_healthy(self, targets: List[Target]) -> bool:
+        """Block until one of targets is healthy; False if the module is stopped first."""
+        while self.running:
+            self._health_changed.clear()
+            if any(target.healthy for target in targets):
+                return True
+            self._health_changed.wait(0.5)
+        return False
+
+    def _publish_metrics(self):
+        # Cheap enough to call per packet: a clock read until the next update is due
+        now = time.monotonic()
+        if now >= self._metrics_due:
+            self._metrics_due = now + METRICS_INTERVAL
+            self._update_metrics()
 
     def _update_metrics(self):
-        update_global_metrics("00:01:00", self.packets_sent, bool(self.targets))
+        elapsed = int(time.monotonic() - self.started_at) if self.started_at else 0
+        top = sorted(self.progress.items(), key=lambda item: -item[1])[:TOP_TARGETS]
+        update_module_metrics(self.identifier, {"packets_sent": self.packets_sent, "rate": self.rate_stats(),
+                                                "frequency": self.last_frequency, "rssi": self.last_rssi,
+                                                "errors": self.errors, "running": self.running, "top_targets": top})
+        update_metrics({"time": f"{elapsed // 3600:02}:{elapsed // 60 % 60:02}:{elapsed % 60:02}",
+                        "connected_to_target": bool(self.targets)})
 
     def _run_targeted_attack(self):
         if not self.targets:
             logger.error("Targets must be provided for targeted attack")
             raise ValueError("Targets must be provided for targeted attack")
+        visits = self._plan_channel_visits(self.targets)
+        logger.info(f"Executing targeted attack on {len(self.targets)} target(s) over {len(visits)} channel(s) "
+                    f"with module {self.identifier}")
+        remaining = {id(target): max(0, self.packet_count - self.progress.get(target.name, 0))
+                     for target in self.targets}
+        self._watch_targets(self.targets)
+        while self.running and any(remaining.values()) and (self._held or not self._cases_exhausted()):
+            if not self._wait_for_healthy([target for target in self.targets if remaining[id(target)]]):
+                break
+            for frequency, group in visits:
+                if not self.running:
+                    break
+                self._visit_channel(frequency, group, remaining)
+            # Sweep back the other way so the next round starts where this one ended
+            visits.reverse()
+            self._update_metrics()
         for target in self.targets:
-            logger.info(f"Executing targeted attack on {target} with module {self.identifier}")
-            self.packets_sent += self.packet_count
-            logger.info(f"Sent {self.packet_count} packets to {target}")
+            logger.info(f"Sent {self.progress.get(target.name, 0)} packets to {target}")
+
+    def _plan_channel_visits(self, targets: List[Target]) -> List[Tuple[Optional[float], List[Target]]]:
+        """Group targets sharing a channel and order the channels as one sweep across the band.
+
+        Neighbouring channels keep each retune a small synthesizer step; targets
+        without a known frequency are served first, on whatever channel is set.
+        """
+        groups: Dict[Optional[float], List[Target]] = {}
+        for target in targets:
+            groups.setdefault(target.frequency, []).append(target)
+        untuned = [(None, groups.pop(None))] if None in groups else []
+        return untuned + sorted(groups.items())
+
+    def _visit_channel(self, frequency: Optional[float], group: List[Target], remaining: Dict[int, int]):
+        # Round-robin the channel's targets until each has used its time budget or packet quota
+        active = [target for target in group if remaining[id(target)] and target.healthy]
+        if not active:
+            return
+        if frequency is not None:
+            self.tune(frequency)
+            self.last_frequency = frequency
+        deadline = time.monotonic() + self.target_budget * len(active)
+        held = self._held
+        # Payloads already drawn but held back by a rate limit still go out at the end of a case range
+        while (active and self.running and time.monotonic() < deadline
+               and (not self._cases_exhausted() or any(target.name in held for target in active))):
+            waits = []
+            sent = False
+            for target in list(active):
+                if not target.healthy:
+                    active.remove(target)
+                    continue
+                if target.name not in held and self._cases_exhausted():
+                    continue
+                case, payload = held.pop(target.name, None) or self._next_payload()
+                limiter = self.target_limiters.get(target.name)
+                wait = limiter.delay(len(payload)) if limiter else 0.0
+                if wait:
+                    # Rate limited: give its slot to the channel's other targets, and send it on a later visit
+                    held[target.name] = (case, payload)
+                    waits.append(wait)
+                    continue
+                self._transmit_limited(case, payload, target, limiter)
+                sent = True
+                remaining[id(target)] -= 1
+                if not remaining[id(target)]:
+                    active.remove(target)
+            if not sent and waits:
+                time.sleep(min(min(waits), max(0.0, deadline - time.monotonic())))
 
     def _run_selected_attack(self):
         logger.info(f"Scanning for devices with module {self.identifier} for selected attack")
-        devices = self.scan_for_devices()
-        selected_target = self._user_select_target(devices)
+        # A resumed run already knows its target
+        selected_target = self.targets[0] if self.targets else self._user_select_target(self.scan())
         if selected_target:
             self.targets = [selected_target]
             logger.info(f"Executing selected attack on {selected_target} with module {self.identifier}")
-            self.packets_sent += self.packet_count
-            logger.info(f"Sent {self.packet_count} packets to {selected_target}")
+            self._send_packets(selected_target)
+            logger.info(f"Sent {self.progress.get(selected_target.name, 0)} packets to {selected_target}")
 
     def _run_indiscriminate_attack(self):
         logger.info(f"Scanning for nearest/highest RSSI device with module {self.identifier} for indiscriminate attack")
-        best_target = self._scan_for_nearest_or_highest_rssi_device()
+        best_target = self.targets[0] if self.targets else self._scan_for_nearest_or_highest_rssi_device()
         if best_target:
             self.targets = [best_target]
             logger.info(f"Executing indiscriminate attack on {best_target} with module {self.identifier}")
-            self.packets_sent += self.packet_count
-            logger.info(f"Sent {self.packet_count} packets to {best_target}")
+            self._send_packets(best_target)
+            logger.info(f"Sent {self.progress.get(best_target.name, 0)} packets to {best_target}")
+
+    @property
+    def resume_index(self) -> int:
+        """The first case not known to be sent: where a resumed run must start to skip nothing."""
+        return min(self._in_flight) if self._in_flight else self.case_index
+
+    def _cases_exhausted(self) -> bool:
+        return self.case_limit is not None and self.case_index >= self.case_limit
+
+    def _draw_case(self) -> bytes:
+        rng = random.Random((self.seed << 32) + self.case_index)
+        length = rng.randint(1, self.capabilities.max_packet_len)
+        return rng.randbytes(length)
+
+    def _next_payload(self) -> Tuple[int, bytes]:
+        with span('mutate'):
+            payload = self._draw_case()
+            skips = 0
+            while (self.corpus is not None and skips < MAX_SEEN_SKIPS and self.corpus.seen(payload)
+                   and (self.case_limit is None or self.case_index + 1 < self.case_limit)):
+                self.case_index += 1
+                skips += 1
+                payload = self._draw_case()
+        case = self.case_index
+        self._in_flight.add(case)
+        self.case_index += 1
+        return case, payload
+
+    def _transmit_limited(self, case: int, payload: bytes, target: Target, limiter: Optional[RateLimiter] = None):
+        if limiter:
+            limiter.take(len(payload))
+        self.rate_limiter.acquire(len(payload))
+        with span('transmit'):
+            self.transmit(payload, target)
+        if tracing.enabled:
+            tracing.trace(tracing.RADIO_TX, self.identifier, payload)
+        self._in_flight.discard(case)
+        if self.corpus is not None:
+            self.corpus.mark_seen(payload)
+            if target.corpus is None:
+                target.set_corpus(self.corpus)
+        self.packets_sent += 1
+        self.progress[target.name] = self.progress.get(target.name, 0) + 1
+        self._publish_metrics()
+
+    def _send_packets(self, target: Target):
+        if target.frequency is not None:
+            self.tune(target.frequency)
+            self.last_frequency = target.frequency
+        limiter = self.target_limiters.get(target.name)
+        self._watch_targets([target])
+        for _ in range(max(0, self.packet_count - self.progress.get(target.name, 0))):
+            if not self.running or self._cases_exhausted():
+                break
+            if not (target.healthy or self._wait_for_healthy([target])):
+                break
+            case, payload = self._next_payload()
+            if limiter:
+                limiter.acquire(len(payload))
+            self._transmit_limited(case, payload, target)
 
     def _scan_for_devices(self) -> List[Target]:
         logger.info(f"Scanning for devices with module {self.identifier}")
@@ -97,5 +469,5 @@ class RadioModule(ABC):
 
     def _scan_for_nearest_or_highest_rssi_device(self) -> Target:
         logger.info(f"Scanning for nearest or highest RSSI device with module {self.identifier}")
-        devices = self.scan_for_devices()
+        devices = self.scan()
         return max(devices, key=lambda t: t.rssi) if devices else None
@@ -0,0 +1,132 @@
+import logging
+import time
+from threading import Lock
+from typing import Callable, Dict, Optional
+from hopping import DEFAULT_SPIN
+
+logger = logging.getLogger(__name__)
+
+# Achieved rates are measured over windows of this many seconds
+RATE_WINDOW = 1.0
+
+
+class TokenBucket:
+    """Token bucket refilled at rate tokens/s up to burst. rate=None never limits.
+
+    take() may drive the bucket negative, so an item larger than the burst
+    (a 64 byte packet against a 32 byte bucket) still goes out once the
+    bucket is full and is paid for afterwards.
+    """
+
+    def __init__(self, rate: Optional[float] = None, burst: Optional[float] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        self.clock = clock
+        self.set_rate(rate, burst)
+
+    def set_rate(self, rate: Optional[float], burst: Optional[float] = None):
+        if rate is not None and rate <= 0:
+            raise ValueError("Rate must be positive, or None for unlimited")
+        self.rate = rate
+        self.burst = burst if burst is not None else 1.0
+        self.tokens = self.burst
+        self.updated = self.clock()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay(self, amount: float = 1.0) -> float:
+        """Seconds until amount can be taken; 0 if it can be taken now."""
+        if self.rate is None:
+            return 0.0
+        self._refill(self.clock())
+        deficit = min(amount, self.burst) - self.tokens
+        return deficit / self.rate if deficit > 0 else 0.0
+
+    def take(self, amount: float = 1.0):
+        if self.rate is None:
+            return
+        self._refill(self.clock())
+        self.tokens -= amount
+
+
+class RateLimiter:
+    """Packets/s and bytes/s token buckets, with the achieved rate measured for feedback."""
+
+    def __init__(self, pps: Optional[float] = None, bps: Optional[float] = None,
+                 burst_packets: Optional[float] = None, burst_bytes: Optional[float] = None,
+                 clock: Callable[[], float] = time.monotonic, sleep: Callable[[float], None] = time.sleep,
+                 spin: float = DEFAULT_SPIN):
+        self.clock = clock
+        self.sleep = sleep
+        self.spin = spin
+        self.packets = TokenBucket(clock=clock)
+        self.bytes = TokenBucket(clock=clock)
+        self._lock = Lock()
+        self.set_rate(pps, bps, burst_packets, burst_bytes)
+
+    @classmethod
+    def from_config(cls, config: Dict) -> 'RateLimiter':
+        return cls(config.get('pps'), config.get('bps'), config.get('burst_packets'), config.get('burst_bytes'))
+
+    def set_rate(self, pps: Optional[float] = None, bps: Optional[float] = None,
+                 burst_packets: Optional[float] = None, burst_bytes: Optional[float] = None):
+        with self._lock:
+            self.packets.set_rate(pps, burst_packets)
+            # Without an explicit burst, a tenth of a second of bytes keeps pacing smooth
+            self.bytes.set_rate(bps, burst_bytes if burst_bytes is not None else (bps / 10 if bps else None))
+            self.window_start = self.clock()
+            self.window_packets = 0
+            self.window_bytes = 0
+            self.achieved_pps = 0.0
+            self.achieved_bps = 0.0
+
+    def delay(self, nbytes: int = 0) -> float:
+        with self._lock:
+            return max(self.packets.delay(1), self.bytes.delay(nbytes))
+
+    def take(self, nbytes: int = 0):
+        with self._lock:
+            self.packets.take(1)
+            self.bytes.take(nbytes)
+            self._record(nbytes)
+
+    def acquire(self, nbytes: int = 0):
+        """Block until one packet of nbytes is allowed, then account for it."""
+        while True:
+            wait = self.delay(nbytes)
+            if not wait:
+                break
+            # A small burst cannot absorb sleep overshoot, so spin the last stretch
+            if wait > self.spin:
+                self.sleep(wait - self.spin)
+        self.take(nbytes)
+
+    def _record(self, nbytes: int):
+        now = self.clock()
+        self.window_packets += 1
+        self.window_bytes += nbytes
+        elapsed = now - self.window_start
+        if elapsed >= RATE_WINDOW:
+            self.achieved_pps = self.window_packets / elapsed
+            self.achieved_bps = self.window_bytes / elapsed
+            self.window_start = now
+            self.window_packets = 0
+            self.window_bytes = 0
+
+    def stats(self) -> Dict[str, Optional[float]]:
+        with self._lock:
+            elapsed = self.clock() - self.window_start
+            achieved_pps, achieved_bps = self.achieved_pps, self.achieved_bps
+            if not achieved_pps and elapsed > 0:
+                # Nothing measured over a full window yet
+                achieved_pps = self.window_packets / elapsed
+                achieved_bps = self.window_bytes / elapsed
+            return {
+                "requested_pps": self.packets.rate,
+                "requested_bps": self.bytes.rate,
+                "burst_packets": self.packets.burst if self.packets.rate is not None else None,
+                "burst_bytes": self.bytes.burst if self.bytes.rate is not None else None,
+                "achieved_pps": achieved_pps,
+                "achieved_bps": achieved_bps,
+            }
@@ -0,0 +1,62 @@
+import importlib
+import logging
+from threading import Lock
+from typing import Dict, List, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+# Third-party radio packages declare drivers under this entry point group, e.g.
+#   [project.entry-points."wardriver.drivers"]
+#   hackrf = "wardriver_hackrf:HackRFModule"
+ENTRY_POINT_GROUP = 'wardriver.drivers'
+
+# module_type -> driver class, or "module:Class" imported the first time the type is used
+_drivers: Dict[str, Union[str, type]] = {}
+_entry_points_loaded = False
+_lock = Lock()
+
+
+def register_driver(module_type: str, driver: Union[str, type]):
+    """Register a radio driver class, or a lazy "module:Class" reference to one."""
+    with _lock:
+        if module_type in _drivers:
+            logger.warning(f"Replacing driver for module type {module_type}")
+        _drivers[module_type] = driver
+
+
+def _load_entry_points():
+    # Scanning installed distributions is not free, so it only happens on a lookup miss
+    global _entry_points_loaded
+    if _entry_points_loaded:
+        return
+    _entry_points_loaded = True
+    from importlib.metadata import entry_points
+    for entry_point in entry_points(group=ENTRY_POINT_GROUP):
+        if entry_point.name in _drivers:
+            logger.warning(f"Ignoring entry point driver {entry_point.value} for built-in type {entry_point.name}")
+            continue
+        _drivers[entry_point.name] = entry_point.value
+
+
+def get_driver(module_type: str) -> Optional[type]:
+    with _lock:
+        if module_type not in _drivers:
+            _load_entry_points()
+        driver = _drivers.get(module_type)
+        if isinstance(driver, str):
+            module_name, _, class_name = driver.partition(':')
+            driver = getattr(importlib.import_module(module_name), class_name)
+            _drivers[module_type] = driver
+        return driver
+
+
+def driver_types() -> List[str]:
+    with _lock:
+        _load_entry_points()
+        return sorted(_drivers)
+
+
+register_driver('cc2500', 'drivers.cc2500:CC2500Module')
+register_driver('cc2540', 'drivers.cc2540:CC2540Module')
+register_driver('cc1101', 'drivers.cc1101:CC1101Module')
+register_driver('dryrun', 'drivers.dryrun:DryRunModule')
@@ -0,0 +1,69 @@
+import math
+import time
+from typing import Optional
+
+# RFC 6298 gains, as used for TCP's retransmission timeout
+ALPHA = 1 / 8
+BETA = 1 / 4
+K = 4
+
+INITIAL_RTO = 1.0  # the old fixed serial timeout, until a target has answered once
+MIN_RTO = 0.005
+MAX_RTO = 5.0
+
+
+class RttEstimator:
+    """Smoothed round-trip time and variance for one target, giving a receive timeout.
+
+    Unlike TCP there is no exponential backoff on a timeout: a target that
+    stops answering keeps costing one RTO per case, which is what a fuzz
+    campaign wants, instead of an ever longer wait.
+    """
+
+    def __init__(self, initial_rto: float = INITIAL_RTO, min_rto: float = MIN_RTO, max_rto: float = MAX_RTO):
+        self.initial_rto = initial_rto
+        self.min_rto = min_rto
+        self.max_rto = max_rto
+        self.srtt: Optional[float] = None
+        self.rttvar: Optional[float] = None
+        self.samples = 0
+        self.timeouts = 0
+        self._sent_at: Optional[float] = None
+
+    def sent(self):
+        """Mark a request as sent; the next answer is timed against it."""
+        self._sent_at = time.monotonic()
+
+    def answered(self) -> Optional[float]:
+        """Time the answer to the last request; returns the round trip, if one was outstanding."""
+        if self._sent_at is None:
+            return None
+        rtt = time.monotonic() - self._sent_at
+        self.observe(rtt)
+        self._sent_at = None
+        return rtt
+
+    def timed_out(self):
+        # The request may still be answered late; not timing that answer keeps it out of the
+        # estimate, as Karn's algorithm does for retransmissions
+        self._sent_at = None
+        self.timeouts += 1
+
+    def observe(self, rtt: float):
+        if self.srtt is None:
+            self.srtt = rtt
+            self.rttvar = rtt / 2
+        else:
+            self.rttvar = (1 - BETA) * self.rttvar + BETA * abs(self.srtt - rtt)
+            self.srtt = (1 - ALPHA) * self.srtt + ALPHA * rtt
+        self.samples += 1
+
+    def timeout(self) -> float:
+        if self.srtt is None:
+            return self.initial_rto
+        return min(self.max_rto, max(self.min_rto, self.srtt + K * self.rttvar))
+
+    def as_dict(self):
+        return {"srtt": self.srtt if self.srtt is not None else math.nan,
+                "rttvar": self.rttvar if self.rttvar is not None else math.nan,
+                "rto": self.timeout(), "samples": self.samples, "timeouts": self.timeouts}
@@ -0,0 +1,178 @@
+import logging
+import statistics
+import time
+from collections import deque
+from threading import Event, Lock, Thread
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WINDOW = 30.0  # s of samples kept per channel
+NOISE_FLOOR = -100.0  # dBm
+BUSY_MARGIN = 10.0  # dB over the floor counted as busy when the radio reports no carrier sense
+STRENGTH_SPAN = 40.0  # dB over the floor that counts as full strength
+DEFAULT_MIN_SHARE = 0.02
+DEFAULT_REPLAN_INTERVAL = 1.0
+
+
+class ChannelActivity:
+    """One channel's samples within the window, with running sums so stats cost O(1) per sample."""
+
+    def __init__(self):
+        self.samples: Deque[Tuple[float, float, bool]] = deque()
+        self.hits = 0
+        self.rssi_sum = 0.0
+        # Strictly decreasing RSSI, so the window's peak is always at the front
+        self._peaks: Deque[Tuple[float, float]] = deque()
+        self.burst_starts: Deque[float] = deque()
+        self._busy = False
+
+    def add(self, timestamp: float, rssi: float, busy: bool):
+        self.samples.append((timestamp, rssi, busy))
+        self.hits += busy
+        self.rssi_sum += rssi
+        while self._peaks and self._peaks[-1][1] <= rssi:
+            self._peaks.pop()
+        self._peaks.append((timestamp, rssi))
+        if busy and not self._busy:
+            self.burst_starts.append(timestamp)
+        self._busy = busy
+
+    def expire(self, cutoff: float):
+        while self.samples and self.samples[0][0] < cutoff:
+            _, rssi, busy = self.samples.popleft()
+            self.hits -= busy
+            self.rssi_sum -= rssi
+        while self._peaks and self._peaks[0][0] < cutoff:
+            self._peaks.popleft()
+        while self.burst_starts and self.burst_starts[0] < cutoff:
+            self.burst_starts.popleft()
+
+    def stats(self) -> Dict[str, float]:
+        count = len(self.samples)
+        period = regularity = 0.0
+        if len(self.burst_starts) >= 3:
+            starts = list(self.burst_starts)
+            intervals = [later - earlier for earlier, later in zip(starts, starts[1:])]
+            period = statistics.median(intervals)
+            mean = statistics.fmean(intervals)
+            # 1 for a beacon on a fixed period, towards 0 as the intervals scatter
+            regularity = max(0.0, 1.0 - statistics.pstdev(intervals) / mean) if mean > 0 else 0.0
+        return {"samples": count,
+                "hit_rate": self.hits / count if count else 0.0,
+                "mean_rssi": self.rssi_sum / count if count else NOISE_FLOOR,
+                "peak_rssi": self._peaks[0][1] if self._peaks else NOISE_FLOOR,
+                "bursts": len(self.burst_starts),
+                "burst_period": period,
+                "burst_regularity": regularity}
+
+
+class ChannelSelector:
+    """Keeps per-channel activity over a sliding window and turns it into a weighted channel set.
+
+    A channel's score is its carrier-sense hit rate, scaled by how far its
+    peak RSSI stands over the noise floor. Scores are normalized into time
+    shares; quiet channels drop out, and every channel kept gets at least
+    min_share so a burst that starts on it is still noticed.
+    """
+
+    def __init__(self, window: float = DEFAULT_WINDOW, noise_floor: float = NOISE_FLOOR,
+                 min_share: float = DEFAULT_MIN_SHARE, max_channels: Optional[int] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        self.window = window
+        self.noise_floor = noise_floor
+        self.min_share = min_share
+        self.max_channels = max_channels
+        self.clock = clock
+        self.channels: Dict[float, ChannelActivity] = {}
+        self._lock = Lock()
+
+    def record(self, frequency: float, rssi: float, busy: Optional[bool] = None, timestamp: Optional[float] = None):
+        """One RSSI reading; busy is the radio's carrier sense, if it has one."""
+        timestamp = self.clock() if timestamp is None else timestamp
+        if busy is None:
+            busy = rssi >= self.noise_floor + BUSY_MARGIN
+        with self._lock:
+            activity = self.channels.get(frequency)
+            if activity is None:
+                activity = self.channels[frequency] = ChannelActivity()
+            activity.add(timestamp, rssi, bool(busy))
+            activity.expire(timestamp - self.window)
+
+    def _expire(self):
+        cutoff = self.clock() - self.window
+        for activity in self.channels.values():
+            activity.expire(cutoff)
+
+    def stats(self) -> Dict[float, Dict[str, float]]:
+        with self._lock:
+            self._expire()
+            return {frequency: activity.stats() for frequency, activity in sorted(self.channels.items())}
+
+    def _score(self, stats: Dict[str, float]) -> float:
+        strength = min(1.0, max(0.0, (stats["peak_rssi"] - self.noise_floor) / STRENGTH_SPAN))
+        return stats["hit_rate"] * (0.5 + 0.5 * strength)
+
+    def scores(self) -> Dict[float, float]:
+        """Unnormalized activity of every channel with samples in the window."""
+        return {frequency: self._score(stats) for frequency, stats in self.stats().items() if stats["samples"]}
+
+    def weights(self) -> Dict[float, float]:
+        """Time share per active channel, summing to 1; empty when nothing has been heard."""
+        scores = {frequency: score for frequency, score in self.scores().items() if score > 0}
+        if self.max_channels:
+            scores = dict(sorted(scores.items(), key=lambda item: -item[1])[:self.max_channels])
+        total = sum(scores.values())
+        if not total:
+            return {}
+        shares = {frequency: max(score / total, self.min_share) for frequency, score in scores.items()}
+        total = sum(shares.values())
+        return {frequency: share / total for frequency, share in sorted(shares.items())}
+
+    def plan(self, cycle: float, min_dwell: float = 0.0) -> List[Tuple[float, float]]:
+        """A hop plan of (frequency, dwell) that visits the active channels once per cycle seconds.
+
+        Channels are in frequency order, so consecutive retunes are small steps.
+        """
+        return [(frequency, max(min_dwell, share * cycle)) for frequency, share in self.weights().items()]
+
+
+class PlanUpdater(Thread):
+    """Swaps a running HopScheduler onto the selector's latest plan every interval seconds.
+
+    Until the selector has heard anything, and whenever everything goes
+    quiet, the scheduler runs the fallback plan (by default, the one it was started with).
+    """
+
+    def __init__(self, selector: ChannelSelector, scheduler, cycle: float, min_dwell: float = 0.0,
+                 interval: float = DEFAULT_REPLAN_INTERVAL, fallback: Optional[List[Tuple[float, float]]] = None,
+                 on_plan: Optional[Callable[[List[Tuple[float, float]]], None]] = None):
+        super().__init__(name="plan-updater", daemon=True)
+        self.selector = selector
+        self.scheduler = scheduler
+        self.cycle = cycle
+        self.min_dwell = min_dwell
+        self.interval = interval
+        self.on_plan = on_plan
+        self.fallback = list(fallback or scheduler.plan)
+        self.updates = 0
+        self._stop_event = Event()
+
+    def stop(self):
+        self._stop_event.set()
+        if self.is_alive():
+            self.join()
+
+    def run(self):
+        current = self.fallback
+        while not self._stop_event.wait(self.interval) and not self.scheduler.stopped():
+            plan = self.selector.plan(self.cycle, self.min_dwell) or self.fallback
+            if plan == current:
+                continue
+            if self.on_plan:
+                self.on_plan(plan)
+            self.scheduler.set_plan(plan)
+            current = plan
+            self.updates += 1
+            logger.info(f"Hop plan now {len(plan)} channel(s): "
+                        + ", ".join(f"{frequency}:{dwell * 1e3:.1f}ms" for frequency, dwell in plan))
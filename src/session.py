@@ -4,6 +4,7 @@ from threading import Thread
 from connection import Connection
 from target import Target
 from radio import RadioModule
+from checkpoint import DEFAULT_CHECKPOINT_INTERVAL, Checkpointer
 
 logger = logging.getLogger(__name__)
 
@@ -16,6 +17,7 @@ class Session:
         self.targets: List[Target] = []
         self.setup_func: Optional[Callable[[], None]] = None
         self.teardown_func: Optional[Callable[[], None]] = None
+        self.checkpointer: Optional[Checkpointer] = None
 
 
     def set_radio_module(self, module: RadioModule):
@@ -41,6 +43,17 @@ class Session:
         self.thread = Thread(target=self._run)
         self.thread.start()
 
+    def enable_checkpoints(self, path: str, interval: float = DEFAULT_CHECKPOINT_INTERVAL):
+        self.checkpointer = Checkpointer(path, self.snapshot, interval)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {"module": self.radio_module.snapshot() if self.radio_module else None}
+
+    def restore(self, state: Dict[str, Any]):
+        if self.radio_module and state.get("module"):
+            self.radio_module.restore(state["module"])
+            self.targets = self.radio_module.targets
+
     def set_setup(self, setup_func: Callable[[], None]):
         self.setup_func = setup_func
 
@@ -52,6 +65,8 @@ class Session:
             self.setup_func()
         if self.radio_module:
             self.radio_module.start()
+        if self.checkpointer:
+            self.checkpointer.start()
         if self.teardown_func:
             self.teardown_func()
 
@@ -59,6 +74,8 @@ class Session:
         self.running = False
         if self.radio_module:
             self.radio_module.stop()
+        if self.checkpointer:
+            self.checkpointer.stop()
 
         if self.thread and self.thread.is_alive():
             self.thread.join()
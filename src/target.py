@@ -1,27 +1,72 @@
 import time
 import warnings
 import logging
+from typing import Any, Callable, Dict, List, Optional
+from monitor import ALIVE, DEFAULT_INTERVAL, HealthChecker, MonitorEvent
+from rtt import RttEstimator
+from corpus import CorpusStore, open_store
+import tracing
+from profiling import span
 
 logger = logging.getLogger(__name__)
 
+
+def _as_bytes(data) -> bytes:
+    return data.encode() if isinstance(data, str) else bytes(data)
+
+
 class Target:
-    def __init__(self, name: str, rssi: int, baud_rate: int, com_port: str):
+    # Scans create thousands of these over a long run
+    __slots__ = ('name', 'rssi', 'baud_rate', 'com_port', 'frequency', 'connection', 'monitors', 'monitor_alive',
+                 'monitor_listeners', 'health', 'max_recv_bytes', 'rtt', 'corpus', '_last_sent', '_fuzz_data_logger')
+
+    def __init__(self, name: str, rssi: int, baud_rate: int, com_port: str, frequency: Optional[float] = None):
         self.name = name
         self.rssi = rssi
         self.baud_rate = baud_rate
         self.com_port = com_port
+        self.frequency = frequency  # MHz the target was seen on, if known
         self.connection = None
         self.monitors = []
         self.monitor_alive = []
+        self.monitor_listeners: List[Callable[['Target', MonitorEvent], None]] = []
+        self.health: Optional[HealthChecker] = None
         self.max_recv_bytes = 10000
+        self.rtt = RttEstimator()
+        self.corpus: Optional[CorpusStore] = None
+        self._last_sent = None
         self._fuzz_data_logger = None
 
     def __repr__(self):
-        return f"Target(name={self.name}, rssi={self.rssi}, baud_rate={self.baud_rate}, com_port={self.com_port})"
+        return (f"Target(name={self.name}, rssi={self.rssi}, baud_rate={self.baud_rate}, com_port={self.com_port}, "
+                f"frequency={self.frequency})")
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = {"name": self.name, "rssi": self.rssi, "baud_rate": self.baud_rate, "com_port": self.com_port,
+                "frequency": self.frequency}
+        if self.corpus is not None:
+            data["corpus"] = {"path": self.corpus.path, "position": self.corpus.flush()}
+        return data
 
-    def add_monitor(self, monitor):
-        """Add a monitor to the target."""
-        self.monitors.append(monitor)
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'Target':
+        target = cls(data["name"], data["rssi"], data["baud_rate"], data["com_port"], data.get("frequency"))
+        if data.get("corpus"):
+            target.set_corpus(open_store(data["corpus"]["path"]))
+            if target.corpus.flush() < data["corpus"]["position"]:
+                logger.warning(f"Corpus {data['corpus']['path']} is shorter than when checkpointed")
+        return target
+
+    def add_monitor(self, monitor, on_alive: Optional[Callable[[Any], None]] = None):
+        """Add a monitor to the target, and a callback for when a monitor comes alive; each only once."""
+        if monitor not in self.monitors:
+            self.monitors.append(monitor)
+        if on_alive is not None and on_alive not in self.monitor_alive:
+            self.monitor_alive.append(on_alive)
+
+    def set_corpus(self, corpus: CorpusStore):
+        """Keep the cases whose responses are new in corpus."""
+        self.corpus = corpus
 
     def set_fuzz_data_logger(self, fuzz_data_logger):
         """Set the fuzz data logger for sent and received data."""
@@ -53,35 +98,82 @@ class Target:
         """Send data to the target."""
         if not self.connection:
             raise ConnectionError(f"Target {self.name} is not connected.")
-        logger.info(f"Sending data to target {self.name}: {data}")
+        if tracing.enabled:
+            tracing.trace(tracing.TARGET_SEND, self.name, _as_bytes(data))
         if self._fuzz_data_logger:
-            self._fuzz_data_logger.log_info(f"Sending data to target {self.name}: {data}")
-        # Simulate sending data (implementation-specific)
-        # Replace with actual send logic
-        logger.info(f"Data sent to target {self.name}.")
+            with span('log'):
+                self._fuzz_data_logger.log_info(f"Sending data to target {self.name}: {data}")
+        with span('transmit'):
+            # Simulate sending data (implementation-specific)
+            # Replace with actual send logic
+            self._last_sent = data
+            self.rtt.sent()
         if self._fuzz_data_logger:
-            self._fuzz_data_logger.log_send(data)
+            with span('log'):
+                self._fuzz_data_logger.log_send(data)
 
-    def recv(self, max_bytes=None):
-        """Receive data from the target."""
+    def recv(self, max_bytes=None, timeout: Optional[float] = None):
+        """Receive data from the target, waiting at most timeout seconds (default: its learned RTO)."""
         if not self.connection:
             raise ConnectionError(f"Target {self.name} is not connected.")
         if max_bytes is None:
             max_bytes = self.max_recv_bytes
-        logger.info(f"Receiving data from target {self.name} (max {max_bytes} bytes)...")
+        if timeout is None:
+            timeout = self.rtt.timeout()
         if self._fuzz_data_logger:
-            self._fuzz_data_logger.log_info(f"Receiving data from target {self.name} (max {max_bytes} bytes)...")
-        # Simulate receiving data (implementation-specific)
-        data = "data received"  # Replace with actual receive logic
-        logger.info(f"Received data from target {self.name}: {data}")
+            with span('log'):
+                self._fuzz_data_logger.log_info(f"Receiving data from target {self.name} (max {max_bytes} bytes)...")
+        with span('receive'):
+            # Simulate receiving data (implementation-specific)
+            data = "data received"  # Replace with actual receive logic
+            latency = None
+            if data:
+                latency = self.rtt.answered()
+            else:
+                self.rtt.timed_out()
+        if self.corpus is not None and self._last_sent is not None:
+            with span('log'):
+                self.corpus.add(_as_bytes(self._last_sent), _as_bytes(data), latency if latency is not None else timeout)
+            self._last_sent = None
+        if tracing.enabled:
+            tracing.trace(tracing.TARGET_RECV, self.name, _as_bytes(data))
         if self._fuzz_data_logger:
-            self._fuzz_data_logger.log_recv(data)
+            with span('log'):
+                self._fuzz_data_logger.log_recv(data)
         return data
 
-    def monitors_alive(self):
-        """Wait for monitors to become alive and establish a connection."""
-        for monitor in self.monitors:
-            while not monitor.alive():
-                time.sleep(1)
+    def start_monitoring(self, interval: float = DEFAULT_INTERVAL):
+        """Probe the monitors in the background and publish their state changes."""
+        if self.health is not None:
+            return
+        self.health = HealthChecker(self.monitors, interval)
+        self.health.listeners.append(self._on_monitor_event)
+        self.health.start()
+
+    def stop_monitoring(self):
+        if self.health is not None:
+            self.health.stop()
+            self.health = None
+
+    def _on_monitor_event(self, event: MonitorEvent):
+        if event.state == ALIVE:
             for cb in self.monitor_alive:
-                cb(monitor)
+                cb(event.monitor)
+        for listener in list(self.monitor_listeners):
+            listener(self, event)
+
+    @property
+    def healthy(self) -> bool:
+        return self.health is None or self.health.all_alive()
+
+    def monitors_alive(self, timeout: Optional[float] = None) -> bool:
+        """Wait for monitors to become alive; False if timeout passes first."""
+        if not self.monitors:
+            return True
+        started = self.health is None
+        self.start_monitoring()
+        try:
+            return self.health.wait_alive(timeout)
+        finally:
+            if started:
+                self.stop_monitoring()
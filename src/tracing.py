@@ -0,0 +1,264 @@
+import json
+import logging
+import os
+import signal
+import struct
+import sys
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Optional, TextIO, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CAPACITY = 16384  # records per thread; 512 KB at 32 bytes each
+PREFIX_BYTES = 15
+# Module names get ids up to here; later names (targets named after rotating BLE addresses, say)
+# share OTHER_MODULE, so the table and the 16-bit id field never overflow on a multi-day run
+MAX_MODULES = 4096
+OTHER_MODULE = '(other)'
+# Rings of exited threads kept for the next dump; older ones are freed as new threads start tracing
+KEEP_DEAD_RINGS = 8
+MAGIC = b'WDTRACE1'
+# monotonic ns, event id, module id, length, prefix length, prefix: 32 bytes
+_RECORD = struct.Struct(f'<QHHIB{PREFIX_BYTES}s')
+_HEADER_LENGTH = struct.Struct('<I')
+
+# Call sites check this before building anything, so disabled tracing costs one attribute load
+enabled = False
+_sample = 1
+_capacity = DEFAULT_CAPACITY
+_crash_path: Optional[str] = None
+
+_local = threading.local()
+_rings: List['_Ring'] = []
+_rings_lock = threading.Lock()
+# id -> (name, how the record reads: 'hex', 'text', 'f64', or 'hop' for a frequency and lateness in µs)
+_events: List[Tuple[str, str]] = []
+_event_ids: Dict[str, int] = {}
+_modules: List[str] = []
+_module_ids: Dict[str, int] = {}
+_names_lock = threading.Lock()
+
+
+def register_event(name: str, render: str = 'hex') -> int:
+    """The id to trace name under; the same name always gets the same id."""
+    with _names_lock:
+        if name not in _event_ids:
+            _event_ids[name] = len(_events)
+            _events.append((name, render))
+        return _event_ids[name]
+
+
+SPI_WRITE = register_event('spi.write')
+SPI_READ = register_event('spi.read')
+SPI_TIMEOUT = register_event('spi.timeout')
+CONN_SEND = register_event('connection.send')
+CONN_RECV = register_event('connection.recv')
+TARGET_SEND = register_event('target.send')
+TARGET_RECV = register_event('target.recv')
+RADIO_TX = register_event('radio.tx')
+HOP = register_event('hop', 'hop')
+TUNE = register_event('tune')
+
+
+def _module_id(module: str) -> int:
+    with _names_lock:
+        if module not in _module_ids:
+            if len(_modules) >= MAX_MODULES - 1:
+                if OTHER_MODULE not in _module_ids:
+                    _module_ids[OTHER_MODULE] = len(_modules)
+                    _modules.append(OTHER_MODULE)
+                return _module_ids[OTHER_MODULE]
+            _module_ids[module] = len(_modules)
+            _modules.append(module)
+        return _module_ids[module]
+
+
+class _Ring:
+    __slots__ = ('thread', 'owner', 'capacity', 'buffer', 'written', 'seen')
+
+    def __init__(self, owner: threading.Thread, capacity: int):
+        self.thread = owner.name
+        self.owner = owner
+        self.capacity = capacity
+        self.buffer = bytearray(capacity * _RECORD.size)
+        self.written = 0
+        self.seen = 0
+
+    def records(self) -> bytes:
+        """The records held, oldest first."""
+        if self.written <= self.capacity:
+            return bytes(self.buffer[:self.written * _RECORD.size])
+        split = (self.written % self.capacity) * _RECORD.size
+        return bytes(self.buffer[split:] + self.buffer[:split])
+
+
+def _ring() -> _Ring:
+    # A new ring for a new thread, or after enable() changed the capacity
+    previous = getattr(_local, 'ring', None)
+    ring = _local.ring = _Ring(threading.current_thread(), _capacity)
+    with _rings_lock:
+        if previous is not None:
+            _rings.remove(previous)
+        dead = [other for other in _rings if not other.owner.is_alive()]
+        for other in dead[:max(0, len(dead) - KEEP_DEAD_RINGS)]:
+            _rings.remove(other)
+        _rings.append(ring)
+    return ring
+
+
+def trace(event: int, module: str, data: bytes = b'', length: Optional[int] = None):
+    """Record one event in this thread's ring: no locks, no formatting.
+
+    length defaults to len(data); only the first PREFIX_BYTES of data are kept.
+    """
+    ring = getattr(_local, 'ring', None)
+    if ring is None or ring.capacity != _capacity:
+        ring = _ring()
+    ring.seen += 1
+    if _sample > 1 and ring.seen % _sample:
+        return
+    module_id = _module_ids.get(module)
+    if module_id is None:
+        module_id = _module_id(module)
+    prefix = data[:PREFIX_BYTES]
+    _RECORD.pack_into(ring.buffer, (ring.written % ring.capacity) * _RECORD.size, time.monotonic_ns(), event,
+                      module_id, len(data) if length is None else length, len(prefix), prefix)
+    ring.written += 1
+
+
+def trace_value(event: int, module: str, value: float, length: int = 0):
+    """Record a number (a frequency, a delay) rather than bytes; the event should render as 'f64' or 'hop'."""
+    trace(event, module, struct.pack('<d', value), length)
+
+
+def enable(capacity: int = DEFAULT_CAPACITY, sample: int = 1):
+    """Start tracing every sample-th event of each thread into rings of capacity records."""
+    global enabled, _capacity, _sample
+    _capacity = capacity
+    _sample = max(1, sample)
+    enabled = True
+
+
+def disable():
+    global enabled
+    enabled = False
+
+
+def dump(path: str) -> int:
+    """Write every thread's ring to path; returns the number of records written."""
+    with _rings_lock:
+        rings = list(_rings)
+    with _names_lock:
+        events, modules = list(_events), list(_modules)
+    # Rings keep being written while they are copied; a record torn in the copy is a rare, harmless glitch
+    chunks = [(ring, ring.records()) for ring in rings]
+    header = {"record_size": _RECORD.size, "prefix_bytes": PREFIX_BYTES, "sample": _sample,
+              "events": events, "modules": modules,
+              "clock": {"monotonic_ns": time.monotonic_ns(), "time": time.time()},
+              "threads": [{"name": ring.thread, "records": len(data) // _RECORD.size,
+                           "overwritten": max(0, ring.written - ring.capacity), "seen": ring.seen}
+                          for ring, data in chunks]}
+    encoded = json.dumps(header).encode()
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as file:
+        file.write(MAGIC + _HEADER_LENGTH.pack(len(encoded)) + encoded)
+        for _, data in chunks:
+            file.write(data)
+    os.replace(tmp_path, path)
+    total = sum(thread["records"] for thread in header["threads"])
+    logger.info(f"Trace of {total} events from {len(chunks)} thread(s) written to {path}")
+    return total
+
+
+def crash_dump(reason: str):
+    """Dump to the crash path, if one is installed and tracing is on."""
+    if not (enabled and _crash_path):
+        return
+    try:
+        logger.error(f"Dumping trace after {reason}")
+        dump(_crash_path)
+    except Exception as e:
+        logger.error(f"Trace dump failed: {e}")
+
+
+def install_crash_handler(path: str, dump_signal: Optional[int] = getattr(signal, 'SIGUSR1', None)):
+    """Dump to path on an uncaught exception in any thread, and whenever dump_signal arrives."""
+    global _crash_path
+    if _crash_path is None:
+        previous_hook, previous_thread_hook = sys.excepthook, threading.excepthook
+
+        def excepthook(*args):
+            crash_dump(f"uncaught {args[0].__name__}")
+            previous_hook(*args)
+
+        def thread_excepthook(args):
+            crash_dump(f"uncaught {args.exc_type.__name__} in thread {args.thread.name if args.thread else '?'}")
+            previous_thread_hook(args)
+
+        sys.excepthook = excepthook
+        threading.excepthook = thread_excepthook
+    _crash_path = path
+    if dump_signal is not None and threading.current_thread() is threading.main_thread():
+        signal.signal(dump_signal, lambda signum, frame: dump(path) if enabled else None)
+
+
+def enable_from_env() -> bool:
+    """Trace if WARDRIVER_TRACE names a dump path (sampling from WARDRIVER_TRACE_SAMPLE), for the radio scripts."""
+    path = os.environ.get('WARDRIVER_TRACE')
+    if not path:
+        return False
+    enable(sample=int(os.environ.get('WARDRIVER_TRACE_SAMPLE', '1')))
+    install_crash_handler(path)
+    return True
+
+
+def read(path: str) -> Tuple[Dict[str, Any], Iterator[Tuple[str, int, int, int, int, bytes]]]:
+    """The header of a dump and its records as (thread, monotonic ns, event id, module id, length, prefix)."""
+    with open(path, 'rb') as file:
+        if file.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not a trace dump")
+        (header_length,) = _HEADER_LENGTH.unpack(file.read(_HEADER_LENGTH.size))
+        header = json.loads(file.read(header_length))
+        body = file.read()
+    record = struct.Struct(f"<QHHIB{header['prefix_bytes']}s")
+
+    def records():
+        offset = 0
+        for thread in header["threads"]:
+            for _ in range(thread["records"]):
+                timestamp, event, module, length, prefix_length, prefix = record.unpack_from(body, offset)
+                offset += record.size
+                yield thread["name"], timestamp, event, module, length, prefix[:prefix_length]
+
+    return header, records()
+
+
+def _render(kind: str, length: int, prefix: bytes) -> str:
+    if kind in ('f64', 'hop') and len(prefix) == 8:
+        value = f"{struct.unpack('<d', prefix)[0]:g}"
+        return f"{value} late={length}us" if kind == 'hop' else value
+    if kind == 'text':
+        return f"len={length} {prefix.decode(errors='replace')!r}"
+    return f"len={length} {prefix.hex()}{'...' if length > len(prefix) else ''}"
+
+
+def to_text(path: str, output: TextIO) -> int:
+    """Write a dump as one line per event, all threads merged in time order; returns the event count."""
+    header, records = read(path)
+    events, modules = header["events"], header["modules"]
+    # Wall clock of each event, from the monotonic/wall pair taken at dump time
+    offset = header["clock"]["time"] - header["clock"]["monotonic_ns"] / 1e9
+    count = 0
+    for thread, timestamp, event, module, length, prefix in sorted(records, key=lambda record: record[1]):
+        seconds = offset + timestamp / 1e9
+        name, kind = events[event] if event < len(events) else (f"event{event}", 'hex')
+        output.write(f"{time.strftime('%H:%M:%S', time.localtime(seconds))}.{int(seconds % 1 * 1e6):06d} "
+                     f"{thread} {modules[module] if module < len(modules) else module} {name} "
+                     f"{_render(kind, length, prefix)}\n")
+        count += 1
+    dropped = sum(thread["overwritten"] for thread in header["threads"])
+    if dropped:
+        output.write(f"# {dropped} older event(s) were overwritten before the dump\n")
+    return count
@@ -1,4 +1,16 @@
 from radio import RadioModule
+from target import Target
+from registry import get_driver
+from discovery import DiscoveryService
+from inventory import Inventory
+from allocation import Assignment, BandAllocator
+from checkpoint import DEFAULT_CHECKPOINT_INTERVAL, Checkpointer, load_checkpoint
+from metrics import get_metrics, update_metrics
+from observations import ObservationStore
+from gps import GpsReader
+from selection import ChannelSelector
+from memory import DEFAULT_REPORT_INTERVAL, MemoryBudget
+from priors import location_key
 import logging
 from typing import List, Dict, Any, Optional
 
@@ -7,34 +19,190 @@ logger = logging.getLogger(__name__)
 class WardriverManager:
     def __init__(self):
         self.radio_modules: List[RadioModule] = []
+        self.allocator = BandAllocator()
+        self.allocator.listeners.append(self._apply_assignments)
+        self.checkpointer: Optional[Checkpointer] = None
+        self.gps: Optional[GpsReader] = None
+        self.observations: Optional[ObservationStore] = None
+        # Channel activity from every module's RSSI sweeps, weighting the allocator's dwell split
+        self.selector = ChannelSelector()
+        self.memory: Optional[MemoryBudget] = None
 
     def load_radio_modules(self, configs: List[Dict[str, Any]]):
         for config in configs:
             module = self._create_module(config)
             if module:
+                module.failure_listeners.append(self._module_failed)
+                module.observation_listeners.append(self._record_observation)
                 self.radio_modules.append(module)
+                if self.memory:
+                    self._register_memory(module)
                 logger.info(f"Loaded radio module: {module.identifier}")
+        self.allocator.set_modules(self.radio_modules)
 
     def _create_module(self, config: Dict[str, Any]) -> Optional[RadioModule]:
         module_type = config.get('module_type')
-        if module_type == 'cc2500':
-            return RadioModule(config['identifier'], config)  # Placeholder, replace with actual class later
-        elif module_type == 'cc2540':
-            return RadioModule(config['identifier'], config)  # Placeholder, replace with actual class later
-        elif module_type == 'cc1101':
-            return RadioModule(config['identifier'], config)  # Placeholder, replace with actual class later
-        else:
+        driver = get_driver(module_type)
+        if driver is None:
             logger.error(f"Unknown module type: {module_type}")
             return None
+        return driver(config['identifier'], config)
+
+    def enable_observations(self, path: str, gps_source: Optional[str] = None):
+        """Store every scan result in path, geotagged from an NMEA GPS (serial port or replay file)."""
+        if gps_source:
+            self.gps = GpsReader(gps_source)
+            self.gps.start()
+        self.observations = ObservationStore(path, gps=self.gps)
+
+    def close_observations(self):
+        if self.observations:
+            self.observations.close()
+            self.observations = None
+        if self.gps:
+            self.gps.stop()
+            self.gps = None
+
+    def enable_memory_budget(self, ceiling: Optional[int] = None, interval: float = DEFAULT_REPORT_INTERVAL):
+        """Report what each subsystem holds every interval, and trim them while RSS is over ceiling bytes."""
+        self.memory = MemoryBudget(ceiling, interval)
+        self.memory.register('selector.samples',
+                             lambda: sum(len(activity.samples) for activity in list(self.selector.channels.values())))
+        self.memory.register('observations.pending', lambda: self.observations.pending() if self.observations else 0,
+                             evictions=lambda: self.observations.dropped if self.observations else 0)
+        for module in self.radio_modules:
+            self._register_memory(module)
+        self.memory.start()
+
+    def _register_memory(self, module: RadioModule):
+        self.memory.register_mapping(f"{module.identifier}.progress", module.progress)
+        self.memory.register(f"{module.identifier}.targets", lambda: len(module.targets))
+
+    def close_memory_budget(self):
+        if self.memory:
+            self.memory.stop()
+            self.memory = None
+
+    def _record_observation(self, module: RadioModule, kind: str, identifier: str, fields: Dict[str, Any]):
+        if kind == 'rssi' and fields.get('frequency') is not None and fields.get('rssi') is not None:
+            self.selector.record(fields['frequency'], fields['rssi'], (fields.get('extra') or {}).get('carrier_sense'))
+        if self.observations:
+            self.observations.record(kind, identifier, module=module.identifier, **fields)
+
+    def survey(self) -> Dict[str, List[Target]]:
+        """Scan with every module once; results go to the observation store when enabled."""
+        self._update_locations()
+        found = {module.identifier: module.scan() for module in self.radio_modules}
+        self.update_activity()
+        return found
+
+    def _update_locations(self):
+        # Modules keeping per-site channel history follow the GPS, unless their config names the site
+        fix = self.gps.fix if self.gps else None
+        if fix is None:
+            return
+        for module in self.radio_modules:
+            if getattr(module, 'priors', None) is not None and not module.config.get('location'):
+                module.location = location_key(fix.lat, fix.lon)
+
+    def update_activity(self) -> Dict[float, float]:
+        """Hand the selector's channel activity to the allocator, which reweights every module's dwell."""
+        scores = self.selector.scores()
+        if scores:
+            self.allocator.update_occupancy(scores)
+        return scores
 
     def configure_module(self, identifier: str, mode: str, attack_type: str, target: Optional[Any] = None):
+        """target may be a Target, its to_dict() form, or the name of a device the module finds."""
         module = self._find_module_by_id(identifier)
         if module:
-            module.set_mode(mode, attack_type, target)
+            module.set_mode(mode, attack_type, self._resolve_targets(module, target))
+
+    def _resolve_targets(self, module: RadioModule, target: Optional[Any]) -> Optional[List[Target]]:
+        if target is None or isinstance(target, Target):
+            return [target] if target else None
+        if isinstance(target, dict):
+            return [Target.from_dict(target)]
+        # A name, from the CLI or the dashboard: one of the module's current targets, else what it can see now
+        found = (next((candidate for candidate in module.targets if candidate.name == target), None)
+                 or next((candidate for candidate in module.scan() if candidate.name == target), None))
+        if found is None:
+            raise ValueError(f"Radio module {module.identifier} found no target named {target}")
+        return [found]
 
-    def run_modules(self):
+    def set_rate(self, identifier: str, pps: Optional[float] = None, bps: Optional[float] = None,
+                 burst_packets: Optional[float] = None, burst_bytes: Optional[float] = None,
+                 target: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        module = self._find_module_by_id(identifier)
+        if module is None:
+            return None
+        module.set_rate(pps, bps, burst_packets, burst_bytes, target)
+        return module.rate_stats()
+
+    def rate_stats(self, identifier: str) -> Optional[Dict[str, Any]]:
+        module = self._find_module_by_id(identifier)
+        return module.rate_stats() if module else None
+
+    def allocate(self, objective: str, targets: Optional[List[float]] = None,
+                 channels: Optional[List[float]] = None) -> Dict[str, Assignment]:
+        self.allocator.set_objective(objective, targets)
+        self.allocator.set_plan(channels)
+        return self.allocator.assignments
+
+    def _apply_assignments(self, assignments: Dict[str, Assignment]):
+        for module in self.radio_modules:
+            assignment = assignments.get(module.identifier)
+            # An empty assignment idles the module; failed modules get none and keep what they had
+            if assignment is not None:
+                module.assign_channels(assignment.channels, assignment.dwell)
+
+    def _module_failed(self, module: RadioModule):
+        self.allocator.module_failed(module.identifier)
+
+    def run_modules(self, checkpoint_path: Optional[str] = None,
+                    checkpoint_interval: float = DEFAULT_CHECKPOINT_INTERVAL):
+        self.allocator.reset_failures()
         for module in self.radio_modules:
             module.start()
+        if checkpoint_path:
+            if self.checkpointer:
+                self.checkpointer.stop()
+            self.checkpointer = Checkpointer(checkpoint_path, self.snapshot, checkpoint_interval,
+                                             finished=lambda: not any(module.running for module in self.radio_modules))
+            self.checkpointer.start()
+
+    def stop_modules(self):
+        """Stop every module, then the checkpointer, so its last save has their final state."""
+        for module in self.radio_modules:
+            module.stop()
+            module.close()
+        if self.checkpointer:
+            self.checkpointer.stop()
+            self.checkpointer = None
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {"modules": [module.snapshot() for module in self.radio_modules], "metrics": get_metrics()}
+
+    def resume(self, checkpoint_path: str) -> List[RadioModule]:
+        """Reopen the radios in a checkpoint and continue each from its last case."""
+        state = load_checkpoint(checkpoint_path)
+        if state is None:
+            raise FileNotFoundError(f"No checkpoint at {checkpoint_path}")
+        loaded = {module.identifier: module for module in self.radio_modules}
+        self.load_radio_modules([module_state["config"] for module_state in state["modules"]
+                                 if module_state["identifier"] not in loaded])
+        modules = {module.identifier: module for module in self.radio_modules}
+        resumed = []
+        for module_state in state["modules"]:
+            module = modules.get(module_state["identifier"])
+            if module is None:
+                logger.error(f"Cannot resume radio module {module_state['identifier']}")
+                continue
+            module.restore(module_state)
+            resumed.append(module)
+        update_metrics(state["metrics"])
+        self.run_modules(checkpoint_path)
+        return resumed
 
     def _find_module_by_id(self, identifier: str) -> Optional[RadioModule]:
         for module in self.radio_modules:
@@ -43,6 +211,11 @@ class WardriverManager:
         logger.error(f"Radio module with identifier {identifier} not found")
         return None
 
-    def scan_drivers(self) -> List[RadioModule]:
-        # This method can be used to dynamically scan and load drivers, if needed
-        return []
+    def scan_drivers(self, probe_unknown: bool = False, inventory: Optional[Inventory] = None,
+                     use_cache: bool = True) -> List[RadioModule]:
+        """Discover attached radios and load a module for each one not already loaded."""
+        loaded = {module.identifier for module in self.radio_modules}
+        configs = DiscoveryService(probe_unknown=probe_unknown, inventory=inventory,
+                                   use_cache=use_cache).discover_configs()
+        self.load_radio_modules([config for config in configs if config['identifier'] not in loaded])
+        return [module for module in self.radio_modules if module.identifier not in loaded]